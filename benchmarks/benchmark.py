@@ -0,0 +1,246 @@
+"""Throughput benchmarks for blended_turtle.
+
+Run headless from the root of the repository with
+
+    blender -b --python benchmarks/benchmark.py -- --out results.json
+
+or with the bpy module installed
+
+    python benchmarks/benchmark.py --out results.json
+
+Each workload is run for every size and mode and reports the number of
+turtle commands, wall time, commands per second and the peak memory
+allocated while it ran as JSON. Memory is measured in a second, untimed
+run. Pass --baseline old.json to compare against
+an earlier run. The script exits with status 1 if any workload is slower
+than the baseline by more than --tolerance.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import bpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import blended_turtle
+from blended_turtle.Utils.canvas import batch
+
+OPS = bpy.ops.turtle
+
+
+def new_canvas():
+    """Removes everything from the scene and adds an empty turtle world"""
+    if bpy.context.object is not None and bpy.context.object.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+    for obj in list(bpy.data.objects):
+        bpy.data.objects.remove(obj)
+    for mesh in list(bpy.data.meshes):
+        bpy.data.meshes.remove(mesh)
+    bpy.context.scene.cursor.location = (0, 0, 0)
+    OPS.primitive_turtle_add()
+
+
+# Each workload takes a turtle, which is either bpy.ops.turtle or a
+# TurtleEngine, and a size and returns the number of commands it ran
+
+def forward(t, n):
+    for i in range(n):
+        t.fd(d=1)
+    return n
+
+
+def spiral(t, n):
+    steps = n // 2
+    for i in range(steps):
+        t.fd(d=0.01 * i)
+        t.lt(d=89)
+    return steps * 2
+
+
+def curves(t, n):
+    steps = n // 2
+    for i in range(steps):
+        t.qc(cp=(0, 1, 0), ep=(1, 1, 0))
+        t.cc(cp1=(0, 1, 0), cp2=(1, 1, 0), ep=(1, 0, 0))
+    return steps * 2
+
+
+def fills(t, n):
+    shapes = max(n // 16, 1)
+    for i in range(shapes):
+        t.bp()
+        for side in range(6):
+            t.fd(d=1)
+            t.rt(d=60)
+        t.fp()
+        t.pu()
+        t.ri(d=3)
+        t.pd()
+    return shapes * 16
+
+
+def extrusions(t, n):
+    shapes = max(n // 15, 1)
+    for i in range(shapes):
+        t.bp()
+        for side in range(4):
+            t.fd(d=1)
+            t.rt(d=90)
+        t.fp()
+        t.selp()
+        t.ex(d=1)
+        t.da()
+        t.pu()
+        t.ri(d=2)
+        t.pd()
+    return shapes * 15
+
+
+WORKLOADS = {
+    'forward': forward,
+    'spiral': spiral,
+    'curves': curves,
+    'fill': fills,
+    'extrude': extrusions}
+
+# extruding needs the mesh so it can only be run through the operators
+BATCH_WORKLOADS = ('forward', 'spiral', 'curves', 'fill')
+
+
+class _Engine:
+    """Lets the workloads call a TurtleEngine with keyword arguments in the
+    same way as the operators"""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def __getattr__(self, name):
+        method = getattr(self.engine, name)
+        return lambda **kwargs: method(*kwargs.values())
+
+
+def _run(workload, mode, n, trace=False):
+    """Runs a workload on a new canvas and returns the number of commands,
+    the seconds it took and, if trace, the peak memory it allocated"""
+    new_canvas()
+    gc.collect()
+    if trace:
+        tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        if mode == 'ops':
+            ops = workload(OPS, n)
+        else:
+            with batch() as engine:
+                ops = workload(_Engine(engine), n)
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if trace else None
+    finally:
+        if trace:
+            tracemalloc.stop()
+    return ops, seconds, peak
+
+
+def run_workload(name, mode, n):
+    """Times a workload, then runs it again to measure its peak memory.
+    tracemalloc slows down every allocation so it is kept out of the timed
+    run"""
+    workload = WORKLOADS[name]
+    ops, seconds, _ = _run(workload, mode, n)
+    canvas = bpy.context.object
+    canvas.update_from_editmode()
+    verts = len(canvas.data.vertices)
+    _, _, peak = _run(workload, mode, n, trace=True)
+
+    return {
+        'workload': name,
+        'mode': mode,
+        'n': n,
+        'ops': ops,
+        'seconds': seconds,
+        'ops_per_sec': ops / seconds if seconds else None,
+        'peak_bytes': peak,
+        'verts': verts}
+
+
+def compare(results, baseline, tolerance):
+    """Returns a list of messages for workloads that have got slower"""
+    old = {
+        (result['workload'], result['mode'], result['n']): result
+        for result in baseline['results']}
+    regressions = []
+    for result in results:
+        previous = old.get((result['workload'], result['mode'], result['n']))
+        if previous is None or not previous['ops_per_sec'] or not result['ops_per_sec']:
+            continue
+        change = result['ops_per_sec'] / previous['ops_per_sec'] - 1
+        result['change'] = change
+        if change < -tolerance:
+            regressions.append("{workload} {mode} n={n}: {:.0%} slower".format(-change, **result))
+    return regressions
+
+
+def parse_args():
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else sys.argv[1:]
+    parser = argparse.ArgumentParser(description="blended_turtle benchmarks")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000, 100000])
+    parser.add_argument('--workloads', nargs='+', choices=sorted(WORKLOADS), default=list(WORKLOADS))
+    parser.add_argument('--modes', nargs='+', choices=('ops', 'batch'), default=['ops', 'batch'])
+    parser.add_argument('--out', help="file to write results to, defaults to stdout")
+    parser.add_argument('--baseline', help="results of an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    try:
+        blended_turtle.register()
+    except ValueError:
+        # already installed and enabled
+        pass
+
+    results = []
+    for name in args.workloads:
+        for mode in args.modes:
+            if mode == 'batch' and name not in BATCH_WORKLOADS:
+                continue
+            for n in args.sizes:
+                result = run_workload(name, mode, n)
+                results.append(result)
+                print("{workload:8} {mode:5} n={n:<7} {seconds:8.3f}s {ops_per_sec:12.0f} ops/s".format(
+                    **result), file=sys.stderr)
+
+    report = {
+        'blender': bpy.app.version_string,
+        'blended_turtle': '.'.join(str(i) for i in blended_turtle.bl_info['version']),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results}
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        report['regressions'] = regressions
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    for message in regressions:
+        print("REGRESSION " + message, file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
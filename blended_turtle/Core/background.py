@@ -0,0 +1,118 @@
+"""Runs turtle programs on a worker thread.
+
+The worker only fills GeometryBuffers, it never touches blender. Finished
+chunks are put on a queue for the main thread to write to the canvas, so
+the UI stays responsive while a big build is computed.
+"""
+import queue
+import threading
+import time
+
+
+class Chunk:
+    """Geometry drawn since the last chunk and the turtle's state at the end
+    of it
+
+    Keyword arguments:
+
+    engine -- TurtleEngine to take the geometry from
+    flipped -- (first, stop) ranges of faces already written that ep has
+    turned over since the last chunk
+    keep_paths -- see TurtleEngine.detach_buffer, for chunks part way
+    through a run
+    """
+
+    def __init__(self, engine, flipped=(), keep_paths=False):
+        self.buffer = engine.detach_buffer(keep_paths)
+        self.flipped = list(flipped)
+        self.location = engine.location.copy()
+        self.rotation = engine.rotation
+        self.pendown = engine.pendown
+        self.head = engine.head
+        self.paths = engine.path_state()
+        self.filled = engine.filled_state()
+        self.profile = engine.profile
+
+
+class BackgroundRun:
+    """Runs a step generator, see program.steps and logo.steps, on a thread.
+
+    The engine must not need anything from the canvas while it runs i.e. its
+    canvas must already be opened and find_vert and vert_cos should be None.
+    Faces in the canvas that ep turns over are passed back with the chunks
+    rather than flipped by the worker. Chunks part way through a run keep
+    the open path and filled paths, see TurtleEngine.detach_buffer.
+
+    Keyword arguments:
+
+    steps -- generator that runs one turtle command each time it is advanced
+    engine -- TurtleEngine the steps draw with
+    interval -- seconds between chunks, or None to only send one chunk at
+    the end
+    """
+
+    def __init__(self, steps, engine, interval=0.5):
+        self.steps = steps
+        self.engine = engine
+        self.interval = interval
+        self.chunks = queue.Queue()
+        self.done = 0
+        self.error = None
+        self._flipped = []
+        engine.flip_faces = lambda first, stop: self._flipped.append((first, stop))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._work, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Asks the worker to stop after the command it is running"""
+        self._stop.set()
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def is_finished(self):
+        """Returns whether the worker has stopped and every chunk has been
+        taken off the queue"""
+        return not self._thread.is_alive() and self.chunks.empty()
+
+    def _chunk(self, keep_paths=False):
+        flipped, self._flipped = self._flipped, []
+        self.chunks.put(Chunk(self.engine, flipped, keep_paths))
+
+    def _work(self):
+        last_chunk = time.perf_counter()
+        try:
+            for step in self.steps:
+                self.done += 1
+                if self._stop.is_set():
+                    break
+                # the clock is only read every so often
+                if self.done & 255 or self.interval is None:
+                    continue
+                if time.perf_counter() - last_chunk >= self.interval:
+                    self._chunk(keep_paths=True)
+                    last_chunk = time.perf_counter()
+        except Exception as err:
+            # reported by whoever applies the chunks
+            self.error = err
+        try:
+            self.engine.end_stroke()
+        except Exception as err:
+            if self.error is None:
+                self.error = err
+            # still send back everything that was drawn before it
+            self.engine.drop_stroke()
+        self._chunk()
+
+    def take(self):
+        """Returns the chunks that are ready in the order they were drawn"""
+        chunks = []
+        while True:
+            try:
+                chunks.append(self.chunks.get_nowait())
+            except queue.Empty:
+                return chunks
@@ -0,0 +1,82 @@
+from math import factorial
+
+import numpy as np
+
+from . stats import timed
+
+
+def evaluate(controls, t):
+    """Evaluates a Bezier curve of any degree using its Bernstein form
+
+    Keyword arguments:
+
+    controls -- (n + 1, 3) array of control points for a curve of degree n
+    t -- array of curve parameters between 0 and 1
+
+    returns -- (len(t), 3) array of points
+    """
+    controls = np.asarray(controls, dtype=float)
+    t = np.asarray(t, dtype=float)[:, None]
+    degree = len(controls) - 1
+    points = np.zeros((len(t), controls.shape[1]))
+    for i, control in enumerate(controls):
+        binomial = factorial(degree) // (factorial(i) * factorial(degree - i))
+        points += binomial * t ** i * (1 - t) ** (degree - i) * control
+    return points
+
+
+def split(controls, t=0.5):
+    """Splits a Bezier curve in two at t using De Casteljau's algorithm
+
+    returns -- control points of the two halves
+    """
+    controls = np.asarray(controls, dtype=float)
+    left, right = [controls[0]], [controls[-1]]
+    points = controls
+    while len(points) > 1:
+        points = points[:-1] + t * (points[1:] - points[:-1])
+        left.append(points[0])
+        right.append(points[-1])
+    return np.array(left), np.array(right[::-1])
+
+
+def flatness(controls):
+    """Returns the furthest distance of any control point from the chord
+    between the end points. The curve lies within the hull of its control
+    points so it is never further than this from a straight line."""
+    start, end = controls[0], controls[-1]
+    chord = end - start
+    inner = controls[1:-1] - start
+    length_sq = chord @ chord
+    if length_sq == 0:
+        return np.sqrt((inner ** 2).sum(axis=1)).max()
+    # distance from each control point to the nearest point on the chord
+    t = np.clip(inner @ chord / length_sq, 0, 1)
+    return np.sqrt(((inner - t[:, None] * chord) ** 2).sum(axis=1)).max()
+
+
+@timed('bezier.adaptive_points')
+def adaptive_points(controls, tolerance=0.001, max_depth=16):
+    """Returns the points of a Bezier curve, excluding the start point, with
+    just enough segments that the line through them is never further than
+    tolerance from the curve. Flat stretches of the curve get few segments
+    and tight bends get many.
+
+    Keyword arguments:
+
+    controls -- (n + 1, 3) array of control points for a curve of degree n
+    tolerance -- maximum distance between the curve and its segments
+    max_depth -- maximum number of times any part of the curve is split
+    """
+    points = []
+    # depth first so the points come out in order, left halves on top
+    stack = [(np.asarray(controls, dtype=float), 0)]
+    while stack:
+        curve, depth = stack.pop()
+        if depth >= max_depth or flatness(curve) <= tolerance:
+            points.append(curve[-1])
+        else:
+            left, right = split(curve)
+            stack.append((right, depth + 1))
+            stack.append((left, depth + 1))
+    return np.array(points)
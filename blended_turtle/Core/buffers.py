@@ -0,0 +1,156 @@
+import numpy as np
+
+
+def _grown(array, needed):
+    """Returns array, or a copy of it with room for at least needed rows"""
+    if needed <= len(array):
+        return array
+    capacity = max(needed, 2 * len(array))
+    new_array = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+    new_array[:len(array)] = array
+    return new_array
+
+
+class GeometryBuffer:
+    """Growable vertex, edge and face arrays the turtle draws into.
+
+    Vertex indices are global i.e. the first vertex in the buffer has the
+    index vert_offset. This means edges and faces can refer to vertices
+    that already exist in the mesh we will eventually write to.
+
+    Keyword arguments:
+
+    vert_offset -- number of vertices already in the target mesh
+    capacity -- initial number of rows allocated for each array
+    face_offset -- number of faces already in the target mesh
+    """
+
+    def __init__(self, vert_offset=0, capacity=256, face_offset=0):
+        self.vert_offset = vert_offset
+        self.face_offset = face_offset
+        self._verts = np.empty((capacity, 3))
+        self._edges = np.empty((capacity, 2), dtype=np.int64)
+        self._loops = np.empty(capacity, dtype=np.int64)
+        self._face_sizes = np.empty(capacity, dtype=np.int64)
+        self.vert_count = 0
+        self.edge_count = 0
+        self.loop_count = 0
+        self.face_count = 0
+
+    @property
+    def verts(self):
+        """(n, 3) array of vertex coordinates"""
+        return self._verts[:self.vert_count]
+
+    @property
+    def edges(self):
+        """(n, 2) array of global vertex indices"""
+        return self._edges[:self.edge_count]
+
+    @property
+    def loops(self):
+        """global vertex indices of every face corner, face after face"""
+        return self._loops[:self.loop_count]
+
+    @property
+    def face_sizes(self):
+        """number of corners in each face"""
+        return self._face_sizes[:self.face_count]
+
+    @property
+    def face_starts(self):
+        """index into loops of the first corner of each face"""
+        sizes = self.face_sizes
+        starts = np.zeros(len(sizes), dtype=np.int64)
+        np.cumsum(sizes[:-1], out=starts[1:])
+        return starts
+
+    @property
+    def next_index(self):
+        """global index the next vertex added will have"""
+        return self.vert_offset + self.vert_count
+
+    @property
+    def next_face(self):
+        """global index the next face added will have"""
+        return self.face_offset + self.face_count
+
+    def is_empty(self):
+        return self.vert_count == 0 and self.edge_count == 0 and self.face_count == 0
+
+    def add_vert(self, co):
+        """Appends a vertex and returns its global index"""
+        self._verts = _grown(self._verts, self.vert_count + 1)
+        self._verts[self.vert_count] = co
+        self.vert_count += 1
+        return self.vert_offset + self.vert_count - 1
+
+    def add_verts(self, cos):
+        """Appends an (n, 3) array of vertices and returns the global index of the first"""
+        cos = np.asarray(cos, dtype=float).reshape(-1, 3)
+        first = self.next_index
+        self._verts = _grown(self._verts, self.vert_count + len(cos))
+        self._verts[self.vert_count:self.vert_count + len(cos)] = cos
+        self.vert_count += len(cos)
+        return first
+
+    def add_edge(self, v1, v2):
+        self._edges = _grown(self._edges, self.edge_count + 1)
+        self._edges[self.edge_count] = (v1, v2)
+        self.edge_count += 1
+
+    def add_edges(self, edges):
+        """Appends an (n, 2) array of global vertex indices"""
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        self._edges = _grown(self._edges, self.edge_count + len(edges))
+        self._edges[self.edge_count:self.edge_count + len(edges)] = edges
+        self.edge_count += len(edges)
+
+    def add_face(self, indices):
+        """Appends a face made from a sequence of global vertex indices"""
+        self.add_faces(indices, (len(indices),))
+
+    def truncate(self, vert_count, edge_count, loop_count, face_count):
+        """Drops everything added after the buffer had these lengths"""
+        self.vert_count = min(self.vert_count, vert_count)
+        self.edge_count = min(self.edge_count, edge_count)
+        self.loop_count = min(self.loop_count, loop_count)
+        self.face_count = min(self.face_count, face_count)
+
+    def flip_faces(self, first, stop):
+        """Reverses the winding of the faces from first up to stop"""
+        starts = self.face_starts
+        sizes = self.face_sizes
+        for start, size in zip(starts[first:stop].tolist(), sizes[first:stop].tolist()):
+            self._loops[start:start + size] = self._loops[start:start + size][::-1].copy()
+
+    def take_faces(self, first, stop):
+        """Removes the faces from first up to stop, moving any after them
+        down, and returns their (loops, sizes)"""
+        starts = self.face_starts
+        loop_first = starts[first] if first < self.face_count else self.loop_count
+        loop_stop = starts[stop] if stop < self.face_count else self.loop_count
+        loops = self._loops[loop_first:loop_stop].copy()
+        sizes = self._face_sizes[first:stop].copy()
+        self._loops[loop_first:self.loop_count - len(loops)] = self._loops[loop_stop:self.loop_count]
+        self._face_sizes[first:self.face_count - len(sizes)] = self._face_sizes[stop:self.face_count]
+        self.loop_count -= len(loops)
+        self.face_count -= len(sizes)
+        return loops, sizes
+
+    def add_faces(self, loops, sizes):
+        """Appends several faces at once
+
+        Keyword arguments:
+
+        loops -- global vertex indices of every face corner, face after face
+        sizes -- number of corners in each face
+        """
+        loops = np.asarray(loops, dtype=np.int64).ravel()
+        sizes = np.asarray(sizes, dtype=np.int64).ravel()
+        self._loops = _grown(self._loops, self.loop_count + len(loops))
+        self._loops[self.loop_count:self.loop_count + len(loops)] = loops
+        self.loop_count += len(loops)
+        self._face_sizes = _grown(self._face_sizes, self.face_count + len(sizes))
+        self._face_sizes[self.face_count:self.face_count + len(sizes)] = sizes
+        self.face_count += len(sizes)
@@ -0,0 +1,136 @@
+"""Memoized motifs i.e. subprograms whose geometry is drawn once in the
+turtle's own frame and then stamped wherever the turtle is.
+
+Motifs are recorded with the turtle at the origin facing its default
+direction so they should only use relative commands. Absolute commands such
+as setp, seth and home are relative to the motif's frame rather than the
+canvas, and the control points of qc and cc turn with the turtle.
+"""
+import threading
+from collections import OrderedDict
+
+from . engine import TurtleEngine
+
+
+class Motif:
+    """Geometry drawn by a subprogram in the turtle's local frame.
+
+    Index 0 stands for the vert the turtle was sitting on when the motif
+    began. Every other index i is the (i - 1)th vert in verts.
+    """
+
+    def __init__(self, engine):
+        buffer = engine.buffer
+        self.verts = buffer.verts.copy()
+        self.edges = buffer.edges.copy()
+        self.loops = buffer.loops.copy()
+        self.face_sizes = buffer.face_sizes.copy()
+        self.location = engine.location.copy()
+        self.matrix = engine.matrix.copy()
+        self.pendown = engine.pendown
+        self.head = engine.head
+        self.path_start = engine.path_start
+        self.path_closed = engine.path_closed
+        self.path_filled = engine.path_filled
+        self.path_stop = engine.path_stop
+        # (first face, stop face, rings) of the paths filled since the
+        # last ep, so an ep after the motif extrudes them
+        self.filled = [
+            (first, stop, [ring.copy() for ring in rings])
+            for first, stop, rings in engine._filled]
+        self.profile = engine.profile
+        self.uses_head = bool(
+            (self.edges == 0).any() or (self.loops == 0).any()
+            or self.head == 0 or self.path_start == 0)
+
+    @property
+    def nbytes(self):
+        """memory taken up by the motif's arrays"""
+        return (
+            self.verts.nbytes + self.edges.nbytes + self.loops.nbytes + self.face_sizes.nbytes
+            + sum(ring.nbytes for first, stop, rings in self.filled for ring in rings))
+
+
+def record(build, pendown=True, curve_tolerance=0.001, weld_distance=0.001, profile=None):
+    """Runs build against a fresh TurtleEngine at the origin and returns
+    what it drew as a Motif
+
+    Keyword arguments:
+
+    build -- callable(engine) that draws the motif
+    pendown -- pen state at the start of the motif
+    profile -- tube profile at the start of the motif, see TurtleEngine.set_profile
+    """
+    engine = TurtleEngine(pendown=pendown, head=0 if pendown else None, vert_offset=1)
+    engine.curve_tolerance = curve_tolerance
+    engine.weld_distance = weld_distance
+    engine.profile = profile
+    build(engine)
+    engine.end_stroke()
+    return Motif(engine)
+
+
+class MotifCache:
+    """Least recently used cache of Motifs. It can be shared between threads,
+    motifs are recorded outside the lock so one thread's recording doesn't
+    hold up the others.
+
+    Keyword arguments:
+
+    maxsize -- maximum number of motifs to keep
+    maxbytes -- maximum memory the kept motifs can take up, see Motif.nbytes.
+    A motif bigger than this is drawn but not kept
+    """
+
+    def __init__(self, maxsize=128, maxbytes=64 * 1024 * 1024):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.nbytes = 0
+        self._motifs = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._motifs)
+
+    def clear(self):
+        with self._lock:
+            self._motifs.clear()
+            self.nbytes = 0
+
+    def get(self, key, build, pendown=True, curve_tolerance=0.001, weld_distance=0.001, profile=None):
+        """Returns the Motif for key, recording it with build if needed.
+        key must include everything that changes what build draws."""
+        key = (
+            key, pendown, curve_tolerance, weld_distance,
+            None if profile is None else profile.tobytes())
+        with self._lock:
+            motif = self._motifs.get(key)
+            if motif is not None:
+                self._motifs.move_to_end(key)
+                self.hits += 1
+                return motif
+            self.misses += 1
+
+        motif = record(build, pendown, curve_tolerance, weld_distance, profile)
+        with self._lock:
+            # another thread may have recorded it in the meantime
+            old = self._motifs.pop(key, None)
+            if old is not None:
+                self.nbytes -= old.nbytes
+            self._motifs[key] = motif
+            self.nbytes += motif.nbytes
+            while self._motifs and (len(self._motifs) > self.maxsize or self.nbytes > self.maxbytes):
+                self.nbytes -= self._motifs.popitem(last=False)[1].nbytes
+        return motif
+
+    def draw(self, engine, key, build):
+        """Draws the motif for key at the engine's pose e.g.
+
+        cache.draw(t, ('window', 1, 2), lambda e: window(e, 1, 2))
+        """
+        motif = self.get(
+            key, build, engine.pendown, engine.curve_tolerance, engine.weld_distance,
+            engine.profile)
+        engine.stamp(motif)
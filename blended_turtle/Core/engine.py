@@ -0,0 +1,830 @@
+from math import radians
+
+import numpy as np
+
+from . import bezier
+from . buffers import GeometryBuffer
+from . extrude import prisms
+from . pose import axis_matrix, euler_to_matrix, matrix_to_euler, orthonormalized, track_to_matrix
+from . spatial import SpatialHash
+from . sweep import circle_profile, frames, profile_points, ring_quads, rings
+from . triangulate import triangulate
+
+
+# (axis, degrees) -> rotation matrix. Programs tend to turn by the same few
+# angles over and over
+_turn_matrices = {}
+
+
+class TurtleEngine:
+    """Turtle that draws into a GeometryBuffer rather than into a blender mesh.
+
+    Each move appends at most one vertex and one edge to the buffer, which
+    can then be written to the canvas in one go once all commands have run.
+    Locations are in world space. The turtle's rotation is held as a
+    matrix and turns are applied in the turtle's own frame, so lt always
+    turns around the turtle's up axis however it has been pitched or
+    rolled. rotation gets and sets it as an XYZ euler in radians, the same
+    as the 3D cursor, which is only written once a batch is done.
+
+    Keyword arguments:
+
+    location -- turtle location
+    rotation -- turtle rotation
+    pendown -- pen state
+    head -- index of the vertex the turtle is sitting on or None
+    vert_offset -- number of vertices already in the canvas
+    origin -- location the turtle returns to on home
+    origin_rotation -- rotation the turtle returns to on home
+    path_start -- index of the vert the current path began at or None
+
+    Paths nest. bp inside an open path begins an inner path, which sp
+    closes as a hole in the path around it and fp fills as its own face.
+    Either way the turtle carries on with the outer path.
+    """
+
+    def __init__(
+            self,
+            location=(0, 0, 0),
+            rotation=(0, 0, 0),
+            pendown=True,
+            head=None,
+            vert_offset=0,
+            origin=(0, 0, 0),
+            origin_rotation=(0, 0, 0),
+            path_start=None):
+        self.location = np.array(location, dtype=float)
+        self.matrix = euler_to_matrix(rotation)
+        self._turns = 0
+        self.pendown = pendown
+        self.head = head
+        self.buffer = GeometryBuffer(vert_offset)
+        self.origin = np.array(origin, dtype=float)
+        self.origin_rotation = np.array(origin_rotation, dtype=float)
+        self.path_start = path_start
+        # starts of the open paths the current path is inside, outermost first
+        self.path_stack = []
+        # (depth, start, stop, filled) index ranges of the closed paths inside
+        # the open path at depth. Those closed with sp rather than filled are
+        # holes in it when it is filled
+        self.inner_paths = []
+        # whether the outermost path has been closed, so bp begins a new
+        # path rather than one inside it
+        self.path_closed = False
+        # whether the outermost path has been filled
+        self.path_filled = False
+        # index after the last vert of the outermost path once it has been
+        # closed, so verts drawn after it aren't part of it
+        self.path_stop = None
+        # (first face, stop face, rings) of the paths filled since the last
+        # ep, where faces are global indices like verts and rings are the
+        # outline's and holes' vert indices
+        self._filled = []
+        # (sorted indices, coordinates) of verts the open path and filled
+        # paths use that have been detached, see detach_buffer
+        self._kept = None
+        # maximum distance between a curve and the edges we draw for it
+        self.curve_tolerance = 0.001
+        # where a curve starts or ends this close to an existing vert we
+        # use that vert rather than adding a new one
+        self.weld_distance = 0.001
+        # callable(co, distance) that returns the index of a vert already in
+        # the canvas near co or None. Set by whatever owns the canvas
+        self.find_vert = None
+        # callable(indices) that returns the world space coordinates of
+        # verts already in the canvas. Set by whatever owns the canvas
+        self.vert_cos = None
+        # callable(first, stop) that turns over the faces from first up to
+        # stop that are already in the canvas. Set by whatever owns the
+        # canvas
+        self.flip_faces = None
+        # fill paths with triangles rather than one ngon, which keeps large
+        # non-convex outlines from shading badly
+        self.fill_triangles = False
+        # callable() that returns the number of verts in the canvas. If set
+        # it is used instead of vert_offset and only called once the turtle
+        # draws something, so moves with the pen up never touch the mesh
+        self.count_verts = None
+        # callable() that returns the number of faces in the canvas, called
+        # along with count_verts
+        self.count_faces = None
+        # (m, 2) cross section swept along the turtle's path while the pen
+        # is down, or None to draw edges
+        self.profile = None
+        # whether to cap the ends of tubes
+        self.tube_caps = True
+        # points of the tube being drawn that haven't been swept yet, the
+        # indices of the last ring swept and the normal there
+        self._stroke = []
+        self._stroke_ring = None
+        self._stroke_normal = None
+        # SpatialHash of the verts in the buffer, built the first time we weld
+        self._index = None
+        # turtle states saved by push
+        self._stack = []
+
+    def open_canvas(self):
+        """Finds out how many verts the canvas has before we add to it"""
+        if self.count_verts is not None:
+            self.buffer.vert_offset = self.count_verts()
+            self.count_verts = None
+        if self.count_faces is not None:
+            self.buffer.face_offset = self.count_faces()
+            self.count_faces = None
+
+    def is_opened(self):
+        """Returns whether the engine has needed anything from the canvas"""
+        return self.count_verts is None
+
+    def detach_buffer(self, keep_paths=False):
+        """Returns the buffer and starts a new empty one after it, so what
+        has been drawn so far can be written to the canvas part way
+        through a run. The turtle carries on from where it is, as does
+        any tube it is drawing.
+
+        Keyword arguments:
+
+        keep_paths -- carry on with the open path and filled paths without
+        reading the canvas. The coordinates of their verts are kept and the
+        faces of filled paths move to the new buffer, so ep can still turn
+        them over. Use this when the buffer is written somewhere that can't
+        be read back e.g. a file
+        """
+        self._sweep(True)
+        if keep_paths:
+            self._keep_paths()
+        buffer = self.buffer
+        self.buffer = GeometryBuffer(buffer.next_index, face_offset=buffer.next_face)
+        if keep_paths:
+            self._move_filled(buffer)
+        # verts we have drawn are in the canvas now so find_vert finds them
+        self._index = None
+        return buffer
+
+    def _keep_paths(self):
+        """Keeps the coordinates of the verts the open path and filled
+        paths use, and of the head vert as a path may begin on it, so they
+        can be read once the buffer is detached"""
+        needed = [ring for first, stop, rings in self._filled for ring in rings]
+        if self.head is not None:
+            needed.append(np.array([self.head]))
+        if self.path_start is not None:
+            start = min(self.path_stack + [self.path_start])
+            needed.append(np.arange(start, min(self._path_end(), self.buffer.next_index)))
+        if not needed:
+            self._kept = None
+            return
+        indices = np.unique(np.concatenate(needed).astype(np.int64))
+        if self.vert_cos is None:
+            # verts in the canvas that weren't kept can't be read at all
+            readable = indices >= self.buffer.vert_offset
+            if self._kept is not None:
+                readable |= np.isin(indices, self._kept[0])
+            indices = indices[readable]
+        self._kept = (indices, self._path_cos(indices)) if len(indices) else None
+
+    def _move_filled(self, old_buffer):
+        """Moves the faces of filled paths from old_buffer to the buffer"""
+        offset = old_buffer.face_offset
+        taken = []
+        for first, stop, rings in reversed(self._filled):
+            if first >= offset:
+                taken.append(old_buffer.take_faces(first - offset, stop - offset))
+            else:
+                taken.append(None)
+        # old_buffer has shrunk so the new one starts after it
+        self.buffer.face_offset = old_buffer.next_face
+        filled = []
+        for (first, stop, rings), faces in zip(self._filled, reversed(taken)):
+            if faces is not None:
+                first = self.buffer.next_face
+                self.buffer.add_faces(*faces)
+                stop = self.buffer.next_face
+            filled.append((first, stop, rings))
+        self._filled = filled
+
+    def _add_vert(self, co):
+        self.open_canvas()
+        if self._index is not None:
+            self._index.insert(co)
+        return self.buffer.add_vert(co)
+
+    def _add_verts(self, cos):
+        self.open_canvas()
+        if self._index is not None:
+            self._index.insert_many(cos)
+        return self.buffer.add_verts(cos)
+
+    def _weld_vert(self, co):
+        """Returns the index of a vert within weld_distance of co or None.
+
+        Only seams i.e. the ends of curves and the points where the pen
+        starts drawing are welded, so this is never a whole mesh search.
+        """
+        if self._index is None:
+            self._index = SpatialHash.from_points(self.buffer.verts)
+        found = self._index.query_point(co, self.weld_distance)
+        if len(found):
+            return self.buffer.vert_offset + int(found[0])
+        if self.find_vert is not None:
+            return self.find_vert(co, self.weld_distance)
+        return None
+
+    def _ensure_head(self):
+        """Makes sure there is a vert under the turtle to draw from"""
+        self.open_canvas()
+        if self.head is None and not self._starting_path():
+            self.head = self._weld_vert(self.location)
+        if self.head is None:
+            self.head = self._add_vert(self.location)
+
+    def _draw_to(self, co):
+        """adds an edge from the head vert to a new vert at co, or to the
+        start of the open path if co is on it"""
+        self._ensure_head()
+        new_vert = self._path_start_at(co)
+        if new_vert is None:
+            new_vert = self._add_vert(co)
+        self.buffer.add_edge(self.head, new_vert)
+        self.head = new_vert
+
+    def _path_start_at(self, co):
+        """Returns the index of the open path's first vert if it is within
+        weld_distance of co, so a path drawn back to where it began closes
+        on its first vert rather than on a copy of it, otherwise None"""
+        start = self.path_start
+        if start is None or self.path_closed or start == self.head or start >= self.buffer.next_index:
+            return None
+        offset = self.buffer.vert_offset
+        if start >= offset:
+            start_co = self.buffer.verts[start - offset]
+        else:
+            cos = self._path_cos(np.array([start]))
+            if cos is None:
+                return None
+            start_co = cos[0]
+        if np.sum((start_co - co) ** 2) > self.weld_distance ** 2:
+            return None
+        return start
+
+    def _draw_curve(self, controls, heading):
+        """moves the turtle along a Bezier curve, drawing it if the pen is
+        down, and turns the turtle to face along heading"""
+        points = bezier.adaptive_points(controls, self.curve_tolerance)
+        if self.pendown and self.profile is not None:
+            self._stroke_to(points[1:])
+        elif self.pendown:
+            self._ensure_head()
+            end = self._weld_vert(points[-1])
+            new_points = points if end is None else points[:-1]
+            first = self._add_verts(new_points)
+            indices = np.arange(first - 1, first + len(points))
+            indices[0] = self.head
+            if end is not None:
+                indices[-1] = end
+            edges = np.column_stack((indices[:-1], indices[1:]))
+            self.buffer.add_edges(edges[edges[:, 0] != edges[:, 1]])
+            self.head = int(indices[-1])
+        self.location = points[-1].copy()
+        self.matrix = track_to_matrix(heading)
+
+    def tube(self, radius, sides=8):
+        """Sweeps a polygon with sides sides along the turtle's path while
+        the pen is down rather than drawing edges. radius 0 goes back to
+        drawing edges"""
+        if radius > 0:
+            self.set_profile(circle_profile(radius, max(int(sides), 3)))
+        else:
+            self.set_profile(None)
+
+    def set_profile(self, profile):
+        """Sweeps profile, a sequence of 2D points, along the turtle's path
+        while the pen is down. Its x axis is the turtle's right and its y
+        axis the turtle's up. None goes back to drawing edges"""
+        self.end_stroke()
+        self.profile = None if profile is None else profile_points(profile)
+
+    def _stroke_to(self, points):
+        """Adds points to the tube the turtle is drawing"""
+        if self._stroke and not np.array_equal(self._stroke[-1], self.location):
+            # the turtle has jumped e.g. with pop so this is a new tube
+            self.end_stroke()
+        if not self._stroke:
+            self._stroke.append(self.location.copy())
+            if self._stroke_normal is None:
+                self._stroke_normal = self.matrix[:, 2].copy()
+        self._stroke.extend(points)
+        self.head = None
+
+    def end_stroke(self):
+        """Sweeps the profile along what is left of the tube the turtle is
+        drawing and caps it"""
+        self._sweep(False)
+
+    def drop_stroke(self):
+        """Forgets the part of the tube that hasn't been swept yet, leaving
+        what has been swept open"""
+        self._stroke = []
+        self._stroke_ring = None
+        self._stroke_normal = None
+
+    def _sweep(self, keep_going):
+        """Sweeps the profile along the points added since the last sweep.
+        If keep_going the next sweep carries on from the last ring"""
+        points = np.array(self._stroke).reshape(-1, 3)
+        if len(points):
+            # repeated points have no direction to sweep along
+            moved = np.ones(len(points), dtype=bool)
+            moved[1:] = np.any(np.diff(points, axis=0) != 0, axis=1)
+            points = points[moved]
+
+        size = len(self.profile) if self.profile is not None else 0
+        ring = self._stroke_ring
+        if len(points) >= 2:
+            tangents, normals = frames(points, self._stroke_normal)
+            cos = rings(points, self.profile, tangents, normals)
+            if ring is not None:
+                # the first ring was swept last time
+                cos = cos[1:]
+            first = self._add_verts(cos.reshape(-1, 3))
+            indices = np.arange(first, first + len(cos) * size)
+            if ring is not None:
+                indices = np.concatenate((ring, indices))
+            elif self.tube_caps:
+                self.buffer.add_face(indices[:size])
+            quads = ring_quads(len(points), size)
+            self.buffer.add_faces(indices[quads].ravel(), np.full(len(quads), 4))
+            ring = indices[-size:]
+            self._stroke_normal = normals[-1]
+
+        if keep_going and ring is not None:
+            self._stroke = [points[-1]]
+            self._stroke_ring = ring
+            return
+        if ring is not None and self.tube_caps:
+            self.buffer.add_face(ring[::-1])
+        self._stroke = []
+        self._stroke_ring = None
+        self._stroke_normal = None
+
+    @property
+    def rotation(self):
+        """XYZ euler in radians"""
+        return matrix_to_euler(self.matrix)
+
+    @rotation.setter
+    def rotation(self, euler):
+        self.matrix = euler_to_matrix(euler)
+
+    def turn(self, axis, angle):
+        """Rotates the turtle by angle degrees around its own X (0), Y (1)
+        or Z (2) axis"""
+        matrix = _turn_matrices.get((axis, angle))
+        if matrix is None:
+            if len(_turn_matrices) > 256:
+                _turn_matrices.clear()
+            matrix = _turn_matrices[axis, angle] = axis_matrix(axis, radians(angle))
+        self.matrix = self.matrix @ matrix
+        self._turns += 1
+        if self._turns % 64 == 0:
+            # stop rounding errors building up on long walks
+            self.matrix = orthonormalized(self.matrix)
+
+    def move(self, offset):
+        """Moves the turtle by offset in its own frame, drawing an edge if the pen is down"""
+        target = self.location + self.matrix @ offset
+        self.setp(target)
+
+    def setp(self, v):
+        """Moves the turtle to v in world space"""
+        target = np.array(v, dtype=float)
+        if self.pendown:
+            if self.profile is not None:
+                self._stroke_to(target[None])
+            else:
+                self._draw_to(target)
+        self.location = target
+
+    def fd(self, d):
+        self.move((0, d, 0))
+
+    def bk(self, d):
+        self.move((0, -d, 0))
+
+    def up(self, d):
+        self.move((0, 0, d))
+
+    def dn(self, d):
+        self.move((0, 0, -d))
+
+    def lf(self, d):
+        self.move((-d, 0, 0))
+
+    def ri(self, d):
+        self.move((d, 0, 0))
+
+    def lt(self, d):
+        self.turn(2, d)
+
+    def rt(self, d):
+        self.turn(2, -d)
+
+    def lu(self, d):
+        self.turn(0, d)
+
+    def ld(self, d):
+        self.turn(0, -d)
+
+    def rl(self, d):
+        self.turn(1, -d)
+
+    def rr(self, d):
+        self.turn(1, d)
+
+    def setrot(self, v):
+        """Sets the rotation. v = rotation in degrees"""
+        self.rotation = np.radians(np.array(v, dtype=float))
+
+    def _set_euler(self, axis, d):
+        euler = self.rotation
+        euler[axis] = radians(d)
+        self.rotation = euler
+
+    def seth(self, d):
+        self._set_euler(2, d)
+
+    def setpitch(self, d):
+        self._set_euler(0, d)
+
+    def setr(self, d):
+        self._set_euler(1, d)
+
+    def pu(self):
+        self.end_stroke()
+        self.pendown = False
+        self.head = None
+
+    def pd(self):
+        self.pendown = True
+
+    def push(self):
+        """Saves the turtle's location, rotation and pen state"""
+        self._stack.append((self.location.copy(), self.matrix, self.pendown, self.head))
+
+    def pop(self):
+        """Restores the turtle's state saved by the last push"""
+        if self._stack:
+            self.location, self.matrix, self.pendown, self.head = self._stack.pop()
+
+    def qc(self, cp, ep):
+        """Moves the turtle along a quadratic Bezier curve
+
+        Keyword arguments:
+
+        cp -- control point relative to the turtle
+        ep -- end point relative to the turtle
+        """
+        cp, ep = np.array(cp, dtype=float), np.array(ep, dtype=float)
+        self._draw_curve(
+            (self.location, self.location + cp, self.location + ep),
+            ep - cp)
+
+    def cc(self, cp1, cp2, ep):
+        """Moves the turtle along a cubic Bezier curve
+
+        Keyword arguments:
+
+        cp1, cp2 -- control points relative to the turtle
+        ep -- end point relative to the turtle
+        """
+        cp1 = np.array(cp1, dtype=float)
+        cp2 = np.array(cp2, dtype=float)
+        ep = np.array(ep, dtype=float)
+        self._draw_curve(
+            (self.location, self.location + cp1, self.location + cp2, self.location + ep),
+            ep - cp2)
+
+    def stamp(self, motif):
+        """Draws a Motif at the turtle's pose and moves the turtle to where
+        the motif left it. See Core.cache"""
+        self.end_stroke()
+        matrix = self.matrix
+        if motif.uses_head:
+            self._ensure_head()
+        # maps motif indices to buffer indices
+        indices = np.empty(len(motif.verts) + 1, dtype=np.int64)
+        indices[0] = -1 if self.head is None else self.head
+        if len(motif.verts):
+            first = self._add_verts(motif.verts @ matrix.T + self.location)
+            indices[1:] = np.arange(first, first + len(motif.verts))
+        if len(motif.edges):
+            self.buffer.add_edges(indices[motif.edges])
+        if len(motif.face_sizes):
+            first_face = self.buffer.next_face
+            self.buffer.add_faces(indices[motif.loops], motif.face_sizes)
+            for first, stop, rings in motif.filled:
+                self._filled.append((
+                    first_face + first, first_face + stop, [indices[ring] for ring in rings]))
+
+        self.location = self.location + matrix @ motif.location
+        self.matrix = matrix @ motif.matrix
+        self.pendown = motif.pendown
+        self.profile = motif.profile
+        self.head = None if motif.head is None else int(indices[motif.head])
+        if motif.path_start is not None:
+            if motif.path_start < len(indices):
+                self._begin_path(int(indices[motif.path_start]))
+            else:
+                # the motif began a path at the next vert to be drawn
+                self._begin_path(self.buffer.next_index)
+            if motif.path_closed:
+                stop = motif.path_stop
+                self._end_path(
+                    motif.path_filled, int(indices[stop]) if stop < len(indices) else None)
+
+    def home(self):
+        """Moves the turtle to the origin without drawing"""
+        self.end_stroke()
+        self.location = self.origin.copy()
+        self.rotation = self.origin_rotation
+        self.head = None
+
+    def path_state(self):
+        """Returns (path_start, path_stack, inner_paths, path_closed,
+        path_filled, path_stop) as plain ints and lists so they can be
+        stored on the canvas"""
+        return (
+            self.path_start, list(self.path_stack),
+            [tuple(inner) for inner in self.inner_paths], self.path_closed, self.path_filled,
+            self.path_stop)
+
+    def set_path_state(
+            self, path_start, path_stack=(), inner_paths=(), path_closed=False, path_filled=False,
+            path_stop=None):
+        """Restores paths saved by path_state"""
+        self.path_start = path_start
+        self.path_stack = [int(start) for start in path_stack]
+        self.inner_paths = [tuple(int(i) for i in inner) for inner in inner_paths]
+        self.path_closed = bool(path_closed)
+        self.path_filled = bool(path_filled)
+        self.path_stop = None if path_stop is None else int(path_stop)
+
+    def snapshot(self):
+        """Returns the turtle's state and the lengths of its buffer so
+        restore can go back to them. Everything drawn before is left
+        as it is, so only the few lists that grow are copied"""
+        buffer = self.buffer
+        return (
+            buffer, (buffer.vert_count, buffer.edge_count, buffer.loop_count, buffer.face_count),
+            self.location.copy(), self.matrix, self._turns, self.pendown, self.head,
+            self.path_state(), list(self._filled), self.profile,
+            (list(self._stroke), self._stroke_ring, self._stroke_normal), list(self._stack))
+
+    def restore(self, state, unflip=False):
+        """Goes back to a snapshot, dropping everything drawn since.
+
+        Keyword arguments:
+
+        state -- returned by snapshot
+        unflip -- whether an ep since the snapshot turned over the faces
+        of paths that were filled before it, which are turned back
+        """
+        (buffer, lengths, location, self.matrix, self._turns, self.pendown, self.head,
+            path_state, filled, self.profile, stroke, stack) = state
+        if buffer is not self.buffer:
+            raise ValueError("The buffer has been detached since the snapshot")
+        buffer.truncate(*lengths)
+        self.location = location.copy()
+        self.set_path_state(*path_state)
+        if unflip:
+            for first, stop, rings in filled:
+                if first >= buffer.face_offset:
+                    buffer.flip_faces(first - buffer.face_offset, stop - buffer.face_offset)
+        self._filled = list(filled)
+        self._stroke = list(stroke[0])
+        self._stroke_ring, self._stroke_normal = stroke[1:]
+        self._stack = list(stack)
+        # verts have gone so the spatial index is rebuilt when next needed
+        self._index = None
+
+    def _begin_path(self, start):
+        if self.path_start is not None and not self.path_closed:
+            self.path_stack.append(self.path_start)
+        else:
+            self.path_stack = []
+            self.inner_paths = []
+        self.path_start = start
+        self.path_closed = False
+        self.path_filled = False
+        self.path_stop = None
+
+    def _end_path(self, filled, stop=None):
+        """Goes back to the path the current one is inside, which it is then
+        a hole or island in. The outermost path is kept so selp and fp can
+        still use it. stop defaults to the next vert to be drawn"""
+        if stop is None:
+            stop = self.buffer.next_index
+        depth = len(self.path_stack)
+        if not depth:
+            if not self.path_closed:
+                self.path_stop = stop
+            self.path_closed = True
+            self.path_filled = self.path_filled or filled
+            return
+        start = self.path_start
+        self.inner_paths = [inner for inner in self.inner_paths if inner[0] < depth]
+        self.path_start = self.path_stack.pop()
+        self.inner_paths.append((depth - 1, start, stop, int(filled)))
+
+    def _close_path(self):
+        if self.head is not None and self.head != self.path_start:
+            self.buffer.add_edge(self.head, self.path_start)
+
+    def bp(self):
+        """Begins a path at the vert the turtle is on. If a path is already
+        open the new one is inside it"""
+        self.open_canvas()
+        if self.pendown:
+            self._ensure_head()
+            if self.head != self.buffer.next_index - 1:
+                # a path's verts are one run of indices, so it can't start
+                # on a vert drawn before the last one
+                self.head = self._add_vert(self.location)
+        self._begin_path(self.head if self.head is not None else self.buffer.next_index)
+
+    def _starting_path(self):
+        """Returns whether a path has begun but none of its verts have been
+        drawn, in which case its first vert has to be a new one"""
+        return (
+            self.path_start is not None and not self.path_closed
+            and self.path_start == self.buffer.next_index)
+
+    def sp(self):
+        """Draws an edge from the turtle back to the start of the path. An
+        inner path becomes a hole in the path around it"""
+        if self.path_start is None:
+            return
+        self._close_path()
+        self._end_path(False)
+
+    def fp(self):
+        """Closes the path and fills it with a face, leaving out any holes"""
+        self.open_canvas()
+        if self.path_start is None:
+            return
+        self._close_path()
+        self._fill(self._current_rings())
+        self._end_path(True)
+
+    def path_indices(self):
+        """Returns the indices of the verts drawn since the current path
+        began, holes and all"""
+        if self.path_start is None:
+            return np.empty(0, dtype=np.int64)
+        self.open_canvas()
+        return np.arange(self.path_start, self._path_end())
+
+    def _path_end(self):
+        """Returns the index after the last vert of the current path"""
+        if self.path_closed and not self.path_stack and self.path_stop is not None:
+            return self.path_stop
+        return self.buffer.next_index
+
+    def _path_rings(self, start, stop, inner_paths):
+        """Returns the indices of the outline of the path from start up to
+        stop, leaving out the (start, stop, filled) ranges of inner_paths,
+        followed by the indices of each unfilled one i.e. each hole"""
+        indices = np.arange(start, stop)
+        outline = np.ones(len(indices), dtype=bool)
+        holes = []
+        for inner_start, inner_stop, filled in inner_paths:
+            outline[inner_start - start:inner_stop - start] = False
+            if not filled and inner_stop - inner_start >= 3:
+                holes.append(np.arange(inner_start, inner_stop))
+        return [indices[outline]] + holes
+
+    def _current_rings(self):
+        depth = len(self.path_stack)
+        return self._path_rings(
+            self.path_start, self._path_end(), [inner[1:] for inner in self.inner_paths if inner[0] == depth])
+
+    def _fill(self, rings):
+        """Fills an outline leaving holes, see _path_rings"""
+        outline, holes = rings[0], rings[1:]
+        if len(outline) < 3:
+            return
+        first_face = self.buffer.next_face
+
+        # an ngon can't have holes so they are always triangulated
+        added = False
+        if holes or (self.fill_triangles and len(outline) > 3):
+            indices = np.concatenate(rings)
+            cos = self._path_cos(indices)
+            if cos is not None:
+                parts = np.split(cos, np.cumsum([len(ring) for ring in rings])[:-1])
+                triangles = indices[triangulate(parts[0], parts[1:])]
+                self.buffer.add_faces(triangles.ravel(), np.full(len(triangles), 3))
+                added = True
+        if not added:
+            self.buffer.add_face(outline)
+        self._filled.append((first_face, self.buffer.next_face, rings))
+
+    def ep(self, d, taper=0):
+        """Extrudes every path filled since the last ep into a prism. If
+        none have been the current path is filled and extruded. Sides and
+        caps are made for all the paths in one go.
+
+        Keyword arguments:
+
+        d -- distance to extrude along each path's normal, one for all the
+        paths or a sequence with one per path
+        taper -- how much the top shrinks towards the centre of the path,
+        0 for straight sides and 1 for a point
+
+        Extruding the outermost path ends it, so it isn't extruded or
+        filled again.
+        """
+        self.open_canvas()
+        filled = self._filled
+        caps = (False, True)
+        if filled:
+            paths = [rings for first, stop, rings in filled]
+        elif self.path_start is not None:
+            paths = [self._current_rings()]
+            if not self.path_filled:
+                caps = (True, True)
+        else:
+            return
+        paths = [rings for rings in paths if len(rings[0]) >= 3]
+        rings = [ring for path in paths for ring in path]
+        indices = np.concatenate(rings) if rings else np.empty(0, dtype=np.int64)
+        cos = self._path_cos(indices)
+        if cos is None:
+            raise ValueError("Can't read the verts of the paths to extrude")
+
+        self._filled = []
+        if not filled and not self.path_closed:
+            self._close_path()
+        if not self.path_stack and (self.path_closed or not filled):
+            # the outermost path has become a prism, so it is done with and
+            # neither ep nor fp use its verts again
+            self.set_path_state(None)
+        if not paths:
+            return
+        # fills face along the path's normal, so turn them over to face out
+        # of the bottom
+        self._flip_filled(filled)
+        top, loops, sizes = prisms(
+            cos, [len(ring) for ring in rings], d, taper,
+            np.repeat(np.arange(len(paths)), [len(path) for path in paths]), caps)
+
+        first = self._add_verts(top)
+        indices = np.concatenate((indices, np.arange(first, first + len(top))))
+        self.buffer.add_faces(indices[loops], sizes)
+
+    def _flip_filled(self, filled):
+        """Turns over the faces of filled paths, whether they are still in
+        the buffer or have been written to the canvas"""
+        offset = self.buffer.face_offset
+        for first, stop, rings in filled:
+            if first >= offset:
+                self.buffer.flip_faces(first - offset, stop - offset)
+            elif self.flip_faces is not None:
+                self.flip_faces(first, stop)
+            else:
+                raise ValueError(
+                    "Faces {} to {} have been written out and can't be turned over".format(
+                        first, stop))
+
+    def filled_state(self):
+        """Returns the paths filled since the last ep as (first face, stop
+        face, rings) with rings as lists of ints, so they can be stored on
+        the canvas and extruded by a later ep"""
+        return [
+            (int(first), int(stop), [ring.tolist() for ring in rings])
+            for first, stop, rings in self._filled]
+
+    def set_filled_state(self, filled):
+        """Restores filled paths saved by filled_state"""
+        self._filled = [
+            (int(first), int(stop), [np.array(ring, dtype=np.int64) for ring in rings])
+            for first, stop, rings in filled]
+
+    def _path_cos(self, indices):
+        """Returns the coordinates of the verts at indices or None if some
+        are in the canvas and we can't read them"""
+        offset = self.buffer.vert_offset
+        drawn = indices >= offset
+        cos = np.empty((len(indices), 3))
+        cos[drawn] = self.buffer.verts[indices[drawn] - offset]
+        if not drawn.all() and self._kept is not None:
+            kept, kept_cos = self._kept
+            found = np.minimum(np.searchsorted(kept, indices), len(kept) - 1)
+            found_kept = ~drawn & (kept[found] == indices)
+            cos[found_kept] = kept_cos[found[found_kept]]
+            drawn = drawn | found_kept
+        if not drawn.all():
+            if self.vert_cos is None:
+                return None
+            cos[~drawn] = self.vert_cos(indices[~drawn].tolist())
+        return cos
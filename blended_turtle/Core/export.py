@@ -0,0 +1,260 @@
+"""Writes what the turtle draws straight to OBJ, PLY or SVG files.
+
+Writers take GeometryBuffers one after another, as handed out by
+TurtleEngine.detach_buffer, and write each one with a few bulk numpy
+writes. Nothing is kept between buffers except counts, so a drawing of
+any size goes to disk in the memory of one buffer. Vertex indices in a
+buffer are global, so edges and faces can use verts written earlier.
+"""
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+
+class Writer(ABC):
+    """Base class for streaming geometry writers.
+
+    Keyword arguments:
+
+    path -- file to write
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.vert_count = 0
+        self.edge_count = 0
+        self.face_count = 0
+        # global index of the first vert written
+        self.base = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write(self, buffer):
+        """Writes the verts, edges and faces of a GeometryBuffer"""
+        if self.base is None:
+            self.base = buffer.vert_offset
+        if buffer.vert_offset != self.base + self.vert_count:
+            raise ValueError(
+                "Buffer starts at vert {} but {} verts have been written".format(
+                    buffer.vert_offset, self.base + self.vert_count))
+        base = self.base
+        self._write(buffer.verts, buffer.edges - base, buffer.loops - base, buffer.face_sizes)
+        self.vert_count += buffer.vert_count
+        self.edge_count += buffer.edge_count
+        self.face_count += buffer.face_count
+
+    @abstractmethod
+    def _write(self, verts, edges, loops, face_sizes):
+        """Writes one buffer's geometry. Indices in edges and loops count
+        from the first vert written"""
+
+    def close(self):
+        self.file.close()
+
+
+def _save(file, rows, fmt):
+    """Writes rows of numbers as lines of text, formatting them all with
+    one % so there is no python loop over the rows"""
+    if len(rows):
+        file.write(((fmt + '\n') * len(rows) % tuple(rows.ravel().tolist())).encode('ascii'))
+
+
+class OBJWriter(Writer):
+    """Writes a Wavefront OBJ file with edges as l lines"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.file.write(b'# blended_turtle\n')
+
+    def _write(self, verts, edges, loops, face_sizes):
+        _save(self.file, verts, 'v %.6f %.6f %.6f')
+        _save(self.file, edges + 1, 'l %d %d')
+        if not len(face_sizes):
+            return
+        # one format per corner so faces of any size keep their order
+        ends = np.cumsum(face_sizes)
+        corners = np.full(len(loops), ' %d', dtype=object)
+        corners[ends - face_sizes] = 'f %d'
+        corners[ends - 1] += '\n'
+        self.file.write((''.join(corners) % tuple((loops + 1).tolist())).encode('ascii'))
+
+
+class PLYWriter(Writer):
+    """Writes a binary little endian PLY file.
+
+    PLY wants every vert before any face, so faces and edges go to
+    temporary files until close, when they are copied after the verts. The
+    counts in the header are padded so it can be rewritten in place.
+    """
+
+    _COUNT = '{:012d}'
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._faces = tempfile.TemporaryFile()
+        self._edges = tempfile.TemporaryFile()
+        self.file.write(self._header())
+
+    def _header(self):
+        count = self._COUNT.format
+        return '\n'.join((
+            'ply',
+            'format binary_little_endian 1.0',
+            'comment blended_turtle',
+            'element vertex ' + count(self.vert_count),
+            'property float x',
+            'property float y',
+            'property float z',
+            'element face ' + count(self.face_count),
+            'property list int int vertex_indices',
+            'element edge ' + count(self.edge_count),
+            'property int vertex1',
+            'property int vertex2',
+            'end_header\n')).encode('ascii')
+
+    def _write(self, verts, edges, loops, face_sizes):
+        self.file.write(verts.astype('<f4').tobytes())
+        self._edges.write(edges.astype('<i4').tobytes())
+        if len(face_sizes):
+            # each face is its size followed by its corners
+            starts = np.cumsum(face_sizes) - face_sizes
+            self._faces.write(np.insert(loops, starts, face_sizes).astype('<i4').tobytes())
+
+    def close(self):
+        for part in (self._faces, self._edges):
+            part.seek(0)
+            shutil.copyfileobj(part, self.file)
+            part.close()
+        self.file.seek(0)
+        self.file.write(self._header())
+        super().close()
+
+
+class SVGWriter(Writer):
+    """Writes the X and Y of a drawing as an SVG file, for drawings that lie
+    in the XY plane. Faces are filled paths and edges are stroked lines,
+    one path element per buffer.
+
+    Keyword arguments:
+
+    path -- file to write
+    stroke -- line colour
+    fill -- face colour
+    stroke_width -- line width in drawing units
+    """
+
+    # room for the view box, which isn't known until the end
+    _VIEW_BOX = 96
+
+    def __init__(self, path, stroke='black', fill='lightgrey', stroke_width=0.05):
+        super().__init__(path)
+        self.stroke = stroke
+        self.fill = fill
+        self.stroke_width = stroke_width
+        self.lower = np.full(2, np.inf)
+        self.upper = np.full(2, -np.inf)
+        # 2D points of verts already written, for edges and faces that use them
+        self._earlier = tempfile.TemporaryFile()
+        self.file.write(
+            b'<svg xmlns="http://www.w3.org/2000/svg" ' + self._view_box() + b'>\n')
+
+    def _view_box(self):
+        if np.isfinite(self.lower).all():
+            margin = self.stroke_width
+            x, y = self.lower - margin
+            width, height = self.upper - self.lower + 2 * margin
+            box = 'viewBox="{:.6g} {:.6g} {:.6g} {:.6g}"'.format(x, y, width, height)
+        else:
+            box = ''
+        return box.ljust(self._VIEW_BOX).encode('ascii')
+
+    def _points(self, indices, points):
+        """Returns the points of indices, which can be in this buffer or in
+        ones written before"""
+        current = indices >= self.vert_count
+        if current.all():
+            return points[indices - self.vert_count]
+        self._earlier.flush()
+        earlier = np.memmap(self._earlier, dtype='<f8', mode='r', shape=(self.vert_count, 2))
+        result = np.empty(indices.shape + (2,))
+        result[current] = points[indices[current] - self.vert_count]
+        result[~current] = earlier[indices[~current]]
+        return result
+
+    def _write(self, verts, edges, loops, face_sizes):
+        # y goes down in SVG
+        points = verts[:, :2] * (1, -1)
+        if len(points):
+            self.lower = np.minimum(self.lower, points.min(axis=0))
+            self.upper = np.maximum(self.upper, points.max(axis=0))
+        if len(face_sizes):
+            corners = self._points(loops, points)
+            starts = np.cumsum(face_sizes) - face_sizes
+            lines = np.full(len(loops), 'L%.6g %.6g\n', dtype=object)
+            lines[starts] = 'M%.6g %.6g\n'
+            self.file.write('<path fill="{}" stroke="none" d="\n'.format(self.fill).encode('ascii'))
+            self.file.write((''.join(lines) % tuple(corners.ravel().tolist())).encode('ascii'))
+            self.file.write(b'Z"/>\n')
+        if len(edges):
+            ends = self._points(edges, points).reshape(-1, 4)
+            self.file.write(
+                '<path fill="none" stroke="{}" stroke-width="{}" d="\n'.format(
+                    self.stroke, self.stroke_width).encode('ascii'))
+            _save(self.file, ends, 'M%.6g %.6g L%.6g %.6g')
+            self.file.write(b'"/>\n')
+        self._earlier.write(points.astype('<f8').tobytes())
+
+    def close(self):
+        self.file.write(b'</svg>\n')
+        self.file.seek(len(b'<svg xmlns="http://www.w3.org/2000/svg" '))
+        self.file.write(self._view_box())
+        self._earlier.close()
+        super().close()
+
+
+WRITERS = {
+    '.obj': OBJWriter,
+    '.ply': PLYWriter,
+    '.svg': SVGWriter}
+
+
+def writer_for(path, **options):
+    """Returns a Writer for path chosen by its extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in WRITERS:
+        raise ValueError("Can't export to '{}' files".format(extension))
+    return WRITERS[extension](path, **options)
+
+
+def export(path, steps, engine, chunk_size=65536, **options):
+    """Runs a step generator, see program.steps and logo.steps, and writes
+    what it draws to path a buffer at a time, so the whole drawing is never
+    in memory. Welding only finds verts in the current buffer, while the
+    verts of open and filled paths are kept so fp and ep work across
+    buffers.
+
+    Keyword arguments:
+
+    path -- .obj, .ply or .svg file to write
+    steps -- generator that runs one turtle command each time it is advanced
+    engine -- TurtleEngine the steps draw with
+    chunk_size -- number of verts to draw before writing them out
+    options -- passed to the writer e.g. stroke for SVG
+
+    returns -- (verts, edges, faces) written
+    """
+    with writer_for(path, **options) as writer:
+        for step in steps:
+            if engine.buffer.vert_count >= chunk_size:
+                writer.write(engine.detach_buffer(keep_paths=True))
+        engine.end_stroke()
+        writer.write(engine.detach_buffer())
+    return writer.vert_count, writer.edge_count, writer.face_count
@@ -0,0 +1,134 @@
+"""Extrudes filled paths into prisms.
+
+Every path's outline and holes are passed as one flat array of points with
+the size of each ring, so the top rings and side quads of any number of
+paths are worked out in one go with numpy. Only caps of paths with holes
+are made one path at a time, as they have to be triangulated.
+"""
+import numpy as np
+
+from . triangulate import triangulate
+
+
+def _ring_next(sizes):
+    """Returns the position of the next point around its ring for every
+    point of rings of sizes"""
+    starts = np.cumsum(sizes) - sizes
+    nxt = np.arange(1, int(np.sum(sizes)) + 1)
+    nxt[starts + sizes - 1] = starts
+    return nxt
+
+
+def ring_normals(cos, sizes):
+    """Returns the unit Newell normal of every ring"""
+    cos = np.asarray(cos, dtype=float)
+    sizes = np.asarray(sizes, dtype=np.int64)
+    a, b = cos, cos[_ring_next(sizes)]
+    terms = np.column_stack((
+        (a[:, 1] - b[:, 1]) * (a[:, 2] + b[:, 2]),
+        (a[:, 2] - b[:, 2]) * (a[:, 0] + b[:, 0]),
+        (a[:, 0] - b[:, 0]) * (a[:, 1] + b[:, 1])))
+    normals = np.add.reduceat(terms, np.cumsum(sizes) - sizes)
+    lengths = np.linalg.norm(normals, axis=1)
+    normals[lengths == 0] = (0, 0, 1)
+    lengths[lengths == 0] = 1
+    return normals / lengths[:, None]
+
+
+def prisms(cos, sizes, heights=1.0, taper=0.0, paths=None, caps=(True, True)):
+    """Extrudes rings of points along their path's normal.
+
+    The first ring of each path is its outline, which is extruded the way
+    it goes anticlockwise around, and the rest are holes in it.
+
+    Keyword arguments:
+
+    cos -- (n, 3) array of the points of every ring, ring after ring
+    sizes -- number of points in each ring
+    heights -- distance to extrude, one for all paths or one per path
+    taper -- how much the top shrinks towards the outline's centre, 0 for
+    straight sides and 1 for a point. One for all paths or one per path
+    paths -- index of the path each ring belongs to, non decreasing.
+    Defaults to every ring being its own path
+    caps -- (bottom, top), whether to make each cap
+
+    returns -- (top, loops, face_sizes) where top is an (n, 3) array of the
+    top points and loops index into cos followed by top
+    """
+    cos = np.asarray(cos, dtype=float).reshape(-1, 3)
+    sizes = np.asarray(sizes, dtype=np.int64).ravel()
+    n = len(cos)
+    if paths is None:
+        paths = np.arange(len(sizes))
+    paths = np.asarray(paths, dtype=np.int64).ravel()
+
+    # the first ring of each path is its outline
+    outline = np.empty(len(sizes), dtype=bool)
+    outline[0] = True
+    outline[1:] = paths[1:] != paths[:-1]
+    path_of_ring = np.cumsum(outline) - 1
+    path_count = int(path_of_ring[-1]) + 1
+    starts = np.cumsum(sizes) - sizes
+
+    outlines = np.flatnonzero(outline)
+    all_normals = ring_normals(cos, sizes)
+    normals = all_normals[outlines]
+    centres = np.add.reduceat(cos, starts)[outlines] / sizes[outlines, None]
+    heights = np.broadcast_to(np.asarray(heights, dtype=float), (path_count,))
+    taper = np.broadcast_to(np.asarray(taper, dtype=float), (path_count,))
+
+    path_of_point = np.repeat(path_of_ring, sizes)
+    centre = centres[path_of_point]
+    top = (
+        centre + (cos - centre) * (1 - taper[path_of_point, None])
+        + normals[path_of_point] * heights[path_of_point, None])
+
+    points = np.arange(n)
+    ring_start = np.repeat(starts, sizes)
+    reversed_points = ring_start + np.repeat(starts + sizes - 1, sizes) - points
+
+    # one quad per edge of every ring, going round holes the opposite way
+    # to the outline so their sides face into the hole. Extruding
+    # backwards turns the prism inside out so those faces are flipped
+    same_way = np.einsum('ij,ij->i', all_normals, normals[path_of_ring]) > 0
+    order = np.where(np.repeat(~outline & same_way, sizes), reversed_points, points)
+    nxt = order[_ring_next(sizes)]
+    sides = np.column_stack((order, nxt, nxt + n, order + n))
+    backwards = heights < 0
+    flip = backwards[path_of_point]
+    sides[flip] = sides[flip, ::-1]
+
+    loops = [sides.ravel()]
+    face_sizes = [np.full(n, 4, dtype=np.int64)]
+
+    # paths without holes get ngon caps, made for all of them at once
+    rings_in_path = np.bincount(path_of_ring, minlength=path_count)
+    simple = rings_in_path[path_of_ring] == 1
+    simple_points = np.repeat(simple, sizes)
+    bottom_cap, top_cap = caps
+    if bottom_cap:
+        bottom = np.where(flip, points, reversed_points)[simple_points]
+        loops.append(bottom)
+        face_sizes.append(sizes[simple])
+    if top_cap:
+        top_loops = np.where(flip, reversed_points, points)[simple_points] + n
+        loops.append(top_loops)
+        face_sizes.append(sizes[simple])
+
+    # paths with holes are triangulated, the top with the same triangles
+    if bottom_cap or top_cap:
+        for path in np.flatnonzero(rings_in_path > 1).tolist():
+            rings = np.flatnonzero(path_of_ring == path)
+            ring_points = [np.arange(starts[r], starts[r] + sizes[r]) for r in rings]
+            indices = np.concatenate(ring_points)
+            triangles = indices[triangulate(cos[ring_points[0]], [cos[p] for p in ring_points[1:]])]
+            if backwards[path]:
+                triangles = triangles[:, ::-1]
+            if bottom_cap:
+                loops.append(triangles[:, ::-1].ravel())
+                face_sizes.append(np.full(len(triangles), 3, dtype=np.int64))
+            if top_cap:
+                loops.append(triangles.ravel() + n)
+                face_sizes.append(np.full(len(triangles), 3, dtype=np.int64))
+
+    return top, np.concatenate(loops), np.concatenate(face_sizes)
@@ -0,0 +1,292 @@
+"""Binary journal of the turtle commands that built a drawing.
+
+Every command run through a Journal is recorded as a one byte opcode with
+its arguments packed into one flat array of floats, so a million commands
+take a few megabytes and a saved journal can be memory mapped. Every
+interval commands a checkpoint of the turtle's pose and the lengths of
+its buffer is taken. Changing command k then only needs the buffer cut
+back to the last checkpoint before k and the commands from there run
+again, rather than the whole drawing.
+
+Only commands run through a Journal are recorded. Geometry written to the
+canvas by the operators or run_program can't be cut back, so journals are
+for Core only builds and batches.
+"""
+import numpy as np
+
+from . buffers import _grown
+from . program import COMMANDS, VECTOR, ProgramError, validate_command
+
+# position in OPCODES is what is written to journals, so new commands go
+# on the end
+OPCODES = (
+    'fd', 'bk', 'up', 'dn', 'lf', 'ri', 'lt', 'rt', 'lu', 'ld', 'rl', 'rr',
+    'setp', 'setrot', 'seth', 'setpitch', 'setr', 'qc', 'cc',
+    'pu', 'pd', 'home', 'bp', 'sp', 'fp', 'ep', 'tube', 'push', 'pop')
+
+_OPCODE = {name: i for i, name in enumerate(OPCODES)}
+
+# number of floats each opcode's arguments are packed into
+ARITY = np.array([
+    sum(3 if arg_type == VECTOR else 1 for arg_type in COMMANDS[name])
+    for name in OPCODES], dtype=np.int64)
+
+CHECKPOINT = np.dtype([
+    ('command', '<i8'),
+    ('arg', '<i8'),
+    ('lengths', '<i8', (4,)),
+    ('location', '<f8', (3,)),
+    ('matrix', '<f8', (3, 3))])
+
+_MAGIC = b'TJNL'
+_VERSION = 1
+_HEADER = np.dtype([
+    ('magic', 'S4'),
+    ('version', '<u4'),
+    ('count', '<i8'),
+    ('arg_count', '<i8'),
+    ('checkpoint_count', '<i8'),
+    ('interval', '<i8')])
+
+
+def _padded(size):
+    return -(-size // 8) * 8
+
+
+def _pack(args):
+    """Returns a command's arguments as a flat list of floats"""
+    packed = []
+    for arg in args:
+        if isinstance(arg, tuple):
+            packed.extend(arg)
+        else:
+            packed.append(arg)
+    return packed
+
+
+def _unpack(name, values):
+    args = []
+    for arg_type in COMMANDS[name]:
+        if arg_type == VECTOR:
+            args.append(tuple(values[:3]))
+            values = values[3:]
+        else:
+            args.append(values[0])
+            values = values[1:]
+    return tuple(args)
+
+
+class Journal:
+    """Runs turtle commands against a TurtleEngine and records them.
+
+    The engine's state when the journal is made is the first checkpoint.
+    Checkpoints can only be gone back to while the engine is drawing into
+    the same buffer, so don't detach_buffer part way through.
+
+    Keyword arguments:
+
+    engine -- TurtleEngine to draw with
+    interval -- number of commands between checkpoints
+    """
+
+    def __init__(self, engine, interval=1024):
+        self.engine = engine
+        self.interval = max(int(interval), 1)
+        self.count = 0
+        self.arg_count = 0
+        self._ops = np.empty(1024, dtype=np.uint8)
+        self._args = np.empty(1024)
+        self._checkpoints = np.empty(16, dtype=CHECKPOINT)
+        self.checkpoint_count = 0
+        # engine.snapshot of each checkpoint, None where it was loaded
+        # from a file and the engine's state isn't known
+        self._states = []
+        self._methods = {name: getattr(engine, name) for name in OPCODES}
+        self.checkpoint()
+
+    @property
+    def ops(self):
+        """opcode of every command, see OPCODES"""
+        return self._ops[:self.count]
+
+    @property
+    def args(self):
+        """arguments of every command, command after command"""
+        return self._args[:self.arg_count]
+
+    @property
+    def checkpoints(self):
+        """structured array of CHECKPOINT"""
+        return self._checkpoints[:self.checkpoint_count]
+
+    def __len__(self):
+        return self.count
+
+    def checkpoint(self):
+        """Records the engine's state before the next command"""
+        engine = self.engine
+        self._checkpoints = _grown(self._checkpoints, self.checkpoint_count + 1)
+        buffer = engine.buffer
+        self._checkpoints[self.checkpoint_count] = (
+            self.count, self.arg_count,
+            (buffer.vert_count, buffer.edge_count, buffer.loop_count, buffer.face_count),
+            engine.location, engine.matrix)
+        self.checkpoint_count += 1
+        self._states.append(engine.snapshot())
+
+    def record(self, name, args):
+        """Appends a command that has been run to the journal"""
+        values = _pack(args)
+        self._ops = _grown(self._ops, self.count + 1)
+        self._ops[self.count] = _OPCODE[name]
+        self._args = _grown(self._args, self.arg_count + len(values))
+        self._args[self.arg_count:self.arg_count + len(values)] = values
+        self.count += 1
+        self.arg_count += len(values)
+
+    def steps(self, commands):
+        """Runs validated commands, see program.parse_program, recording
+        each one and yielding after it so the run can be paused"""
+        methods = self._methods
+        interval = self.interval
+        for name, args in commands:
+            if self.count and self.count % interval == 0 and (
+                    self._checkpoints[self.checkpoint_count - 1]['command'] != self.count):
+                self.checkpoint()
+            methods[name](*args)
+            self.record(name, args)
+            yield
+
+    def run(self, commands):
+        """Runs validated commands and records them"""
+        for step in self.steps(commands):
+            pass
+
+    def commands(self, start=0, stop=None):
+        """Returns the recorded commands from start up to stop as (name,
+        args) tuples, ready to be run again"""
+        stop = self.count if stop is None else min(stop, self.count)
+        start = min(start, stop)
+        ops = self.ops[start:stop]
+        sizes = ARITY[ops]
+        first = self._arg_offset(start)
+        values = self.args[first:first + int(np.sum(sizes))].tolist()
+        commands = []
+        i = 0
+        for op, size in zip(ops.tolist(), sizes.tolist()):
+            name = OPCODES[op]
+            commands.append((name, _unpack(name, values[i:i + size])))
+            i += size
+        return commands
+
+    def _arg_offset(self, command):
+        """Returns the position in args of the first argument of command"""
+        checkpoint = self._nearest(command, False)
+        mark = self._checkpoints[checkpoint]
+        skipped = self.ops[int(mark['command']):command]
+        return int(mark['arg']) + int(np.sum(ARITY[skipped]))
+
+    def _nearest(self, command, needs_state=True):
+        """Returns the last checkpoint at or before command"""
+        marks = self.checkpoints['command']
+        checkpoint = int(np.searchsorted(marks, command, side='right')) - 1
+        if needs_state:
+            while checkpoint > 0 and self._states[checkpoint] is None:
+                checkpoint -= 1
+            if self._states[checkpoint] is None:
+                raise ValueError("There is no checkpoint to replay from")
+        return checkpoint
+
+    def splice(self, start, stop, commands):
+        """Replaces the commands from start up to stop with commands and
+        redraws from the last checkpoint before start.
+
+        Keyword arguments:
+
+        start, stop -- range of recorded commands to replace
+        commands -- commands to put in their place, validated with
+        program.validate_command
+
+        returns -- number of commands run again
+        """
+        start = max(0, min(int(start), self.count))
+        stop = max(start, min(int(stop), self.count))
+        validated = []
+        for i, command in enumerate(commands):
+            try:
+                validated.append(validate_command(command))
+            except ProgramError as err:
+                raise ProgramError("Command {}: {}".format(start + i, err)) from None
+
+        checkpoint = self._nearest(start)
+        mark = self._checkpoints[checkpoint]
+        first = int(mark['command'])
+        # ep turns over the faces of paths filled before it
+        unflip = bool(np.any(self.ops[first:] == _OPCODE['ep']))
+        replay = self.commands(first, start) + validated + self.commands(stop)
+
+        self.engine.restore(self._states[checkpoint], unflip)
+        self.count = first
+        self.arg_count = int(mark['arg'])
+        self.checkpoint_count = checkpoint + 1
+        del self._states[checkpoint + 1:]
+        self.run(replay)
+        return len(replay)
+
+    def replace(self, command_index, command):
+        """Replaces one command, see splice"""
+        return self.splice(command_index, command_index + 1, (command,))
+
+    def truncate(self, command_index):
+        """Undoes every command from command_index on"""
+        return self.splice(command_index, self.count, ())
+
+    def save(self, path):
+        """Writes the journal to path. Checkpoints keep the turtle's pose
+        and buffer lengths but not the rest of its state, so a loaded
+        journal replays from the start"""
+        header = np.array(
+            [(_MAGIC, _VERSION, self.count, self.arg_count, self.checkpoint_count, self.interval)],
+            dtype=_HEADER)
+        with open(path, 'wb') as file:
+            file.write(header.tobytes())
+            file.write(self.ops.tobytes())
+            file.write(bytes(_padded(self.count) - self.count))
+            file.write(self.args.astype('<f8').tobytes())
+            file.write(self.checkpoints.tobytes())
+
+    @classmethod
+    def load(cls, path, engine):
+        """Memory maps a journal written by save to record onto engine.
+        Its commands aren't run, see replay"""
+        header = np.fromfile(path, dtype=_HEADER, count=1)
+        if not len(header) or header['magic'][0] != _MAGIC:
+            raise ValueError("'{}' isn't a turtle journal".format(path))
+        if header['version'][0] != _VERSION:
+            raise ValueError("Journal version {} isn't supported".format(header['version'][0]))
+        count, arg_count, checkpoint_count, interval = (
+            int(header[name][0]) for name in ('count', 'arg_count', 'checkpoint_count', 'interval'))
+
+        journal = cls(engine, interval)
+        # the first checkpoint is where engine is now
+        first = journal._checkpoints[:1].copy()
+        offset = _HEADER.itemsize
+        # copy on write, so the file is never changed
+        if count:
+            journal._ops = np.memmap(path, np.uint8, 'c', offset, (count,))
+        offset += _padded(count)
+        if arg_count:
+            journal._args = np.memmap(path, '<f8', 'c', offset, (arg_count,))
+        offset += 8 * arg_count
+        if checkpoint_count:
+            journal._checkpoints = np.memmap(path, CHECKPOINT, 'c', offset, (checkpoint_count,))
+            journal._checkpoints[:1] = first
+        journal.count, journal.arg_count = count, arg_count
+        journal.checkpoint_count = max(checkpoint_count, 1)
+        journal._states = [journal._states[0]] + [None] * (journal.checkpoint_count - 1)
+        return journal
+
+    def replay(self):
+        """Draws every command again from the first checkpoint, e.g. after
+        load, taking fresh checkpoints on the way"""
+        return self.splice(0, 0, ())
@@ -0,0 +1,564 @@
+"""Logo front end for the turtle.
+
+Source is parsed once and compiled to a small bytecode which is run by an
+iterative virtual machine. Procedure calls push a frame on the VM's own
+stack rather than recursing in python, so deeply recursive Logo programs
+don't hit python's recursion limit.
+
+Supported:
+
+    TO name :arg ... END, procedure calls and recursion
+    REPEAT n [ ... ], REPCOUNT, IF cond [ ... ], IFELSE cond [ ... ] [ ... ]
+    MAKE "name value, LOCAL "name, :name, STOP, OUTPUT value
+    CACHE "name to draw a procedure once per set of arguments and reuse it
+    + - * / = < > <= >= <> and brackets
+    SIN COS TAN ARCTAN SQRT ABS INT ROUND POWER REMAINDER QUOTIENT
+    SUM DIFFERENCE PRODUCT RANDOM NOT AND OR
+    every turtle command e.g. FD 10, QC 0 1 0 1 1 0, PUSH, POP
+    FORWARD BACK LEFT RIGHT PENUP PENDOWN SETHEADING aliases
+
+Comments start with a semicolon. Names are case insensitive.
+"""
+import math
+import random
+import re
+
+from . cache import MotifCache
+from . program import COMMANDS, VECTOR, ProgramError
+
+# Logo names for turtle commands that differ from the engine's
+_ALIASES = {
+    'forward': 'fd',
+    'back': 'bk',
+    'left': 'lt',
+    'right': 'rt',
+    'penup': 'pu',
+    'pendown': 'pd',
+    'beginpath': 'bp',
+    'strokepath': 'sp',
+    'fillpath': 'fp',
+    'extrudepath': 'ep',
+    'setpos': 'setp'}
+
+# Logo headings go clockwise from north whereas seth goes anticlockwise
+_CLOCKWISE = ('setheading', 'seth')
+
+_FUNCTIONS = {
+    'sin': (1, lambda a: math.sin(math.radians(a))),
+    'cos': (1, lambda a: math.cos(math.radians(a))),
+    'tan': (1, lambda a: math.tan(math.radians(a))),
+    'arctan': (1, lambda a: math.degrees(math.atan(a))),
+    'sqrt': (1, math.sqrt),
+    'abs': (1, abs),
+    'int': (1, lambda a: float(int(a))),
+    'round': (1, lambda a: float(round(a))),
+    'random': (1, lambda a: float(random.randrange(int(a)))),
+    'not': (1, lambda a: not a),
+    'power': (2, lambda a, b: a ** b),
+    'remainder': (2, math.fmod),
+    'quotient': (2, lambda a, b: a / b),
+    'sum': (2, lambda a, b: a + b),
+    'difference': (2, lambda a, b: a - b),
+    'product': (2, lambda a, b: a * b),
+    'and': (2, lambda a, b: bool(a and b)),
+    'or': (2, lambda a, b: bool(a or b))}
+
+_BINARY = {
+    '+': lambda a, b: a + b,
+    '-': lambda a, b: a - b,
+    '*': lambda a, b: a * b,
+    '/': lambda a, b: a / b,
+    '=': lambda a, b: a == b,
+    '<>': lambda a, b: a != b,
+    '<': lambda a, b: a < b,
+    '>': lambda a, b: a > b,
+    '<=': lambda a, b: a <= b,
+    '>=': lambda a, b: a >= b}
+
+# opcodes
+CONST, LOAD, STORE, LOCAL, BINARY, NEGATE, FUNC, TURTLE, CALL, RETURN, \
+    JUMP, JUMP_IF_FALSE, REPEAT, REPEAT_NEXT, REPCOUNT = range(15)
+
+_TOKEN = re.compile(r'''
+    (?P<comment>;[^\n]*)
+    | (?P<newline>\n)
+    | (?P<space>[ \t\r]+)
+    | (?P<number>(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?)
+    | (?P<var>:[A-Za-z_][\w.]*)
+    | (?P<word>"[^\s\[\]()]*)
+    | (?P<op><=|>=|<>|[-+*/=<>()\[\]])
+    | (?P<name>[A-Za-z_][\w.?]*)
+    ''', re.VERBOSE)
+
+_MAX_DEPTH = 100000
+
+
+class LogoError(ProgramError):
+    """Raised for syntax and runtime errors in Logo programs"""
+
+
+class _Token:
+    __slots__ = ('kind', 'value', 'line')
+
+    def __init__(self, kind, value, line):
+        self.kind, self.value, self.line = kind, value, line
+
+
+def _is_unary_minus(source, start, end):
+    """Returns whether the - from start to end negates what follows it
+    rather than subtracting it. Like UCBLogo it does if there is a space
+    or bracket before it and none after it, so SETP 1 -2 3 takes three
+    numbers but 1 - 2 and 1-2 are both subtractions"""
+    before = source[start - 1] if start else ' '
+    after = source[end] if end < len(source) else ' '
+    return before in ' \t\r\n([' and after not in ' \t\r\n'
+
+
+def tokenize(source):
+    tokens = []
+    line = 1
+    pos = 0
+    while pos < len(source):
+        match = _TOKEN.match(source, pos)
+        if match is None:
+            raise LogoError("Line {}: unexpected '{}'".format(line, source[pos]))
+        kind, text = match.lastgroup, match.group()
+        if kind == 'newline':
+            line += 1
+        elif kind == 'number':
+            tokens.append(_Token(kind, float(text), line))
+        elif kind == 'var':
+            tokens.append(_Token(kind, text[1:].lower(), line))
+        elif kind == 'word':
+            tokens.append(_Token(kind, text[1:].lower(), line))
+        elif kind == 'op' and text == '-' and _is_unary_minus(source, pos, match.end()):
+            tokens.append(_Token('negate', text, line))
+        elif kind in ('op', 'name'):
+            tokens.append(_Token(kind, text.lower(), line))
+        pos = match.end()
+    return tokens
+
+
+class _Code(list):
+    """Bytecode that remembers the source line each instruction came from,
+    so runtime errors can say where they happened"""
+
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+        # line of the statement being compiled
+        self.line = 1
+
+    def append(self, instruction):
+        super().append(instruction)
+        self.lines.append(self.line)
+
+
+class Procedure:
+    """Compiled Logo procedure"""
+
+    def __init__(self, name, params):
+        self.name = name
+        self.params = params
+        self.code = _Code()
+        # set by CACHE "name. Cached procedures are drawn once for each
+        # set of arguments and then stamped, see Core.cache
+        self.cached = False
+
+
+def _turtle_command(name):
+    """Returns (engine command, number of numbers it takes) for a Logo
+    name or None if it isn't a turtle command"""
+    command = _ALIASES.get(name, name)
+    if name in _CLOCKWISE:
+        command = 'seth'
+    if command not in COMMANDS:
+        return None
+    size = sum(3 if arg_type == VECTOR else 1 for arg_type in COMMANDS[command])
+    return command, size
+
+
+class Compiler:
+    """Compiles Logo source into a main Procedure and a dict of named ones"""
+
+    def __init__(self, source):
+        self.tokens = tokenize(source)
+        self.pos = 0
+        self.procedures = {}
+        self._find_procedures()
+
+    def _find_procedures(self):
+        """First pass that records every procedure's parameters so calls
+        can be compiled before the procedure is defined"""
+        tokens = self.tokens
+        for i, token in enumerate(tokens):
+            if token.kind == 'name' and token.value == 'to':
+                if i + 1 >= len(tokens) or tokens[i + 1].kind != 'name':
+                    raise LogoError("Line {}: TO needs a procedure name".format(token.line))
+                name = tokens[i + 1].value
+                if _turtle_command(name) or name in _FUNCTIONS:
+                    raise LogoError("Line {}: {} is already a primitive".format(token.line, name))
+                params = []
+                j = i + 2
+                while j < len(tokens) and tokens[j].kind == 'var':
+                    params.append(tokens[j].value)
+                    j += 1
+                self.procedures[name] = Procedure(name, params)
+
+    # token helpers
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _next(self):
+        token = self._peek()
+        if token is None:
+            line = self.tokens[-1].line if self.tokens else 1
+            raise LogoError("Line {}: unexpected end of program".format(line))
+        self.pos += 1
+        return token
+
+    def _expect(self, value):
+        token = self._next()
+        if token.value != value or token.kind not in ('op', 'name'):
+            raise LogoError("Line {}: expected '{}' but got '{}'".format(
+                token.line, value, token.value))
+        return token
+
+    def _at(self, value):
+        token = self._peek()
+        return token is not None and token.kind in ('op', 'name') and token.value == value
+
+    # compilation
+
+    def compile(self):
+        main = Procedure('', [])
+        while self._peek() is not None:
+            if self._at('to'):
+                self._definition()
+            else:
+                self._statement(main.code)
+        main.code.append((RETURN, False))
+        return main, self.procedures
+
+    def _definition(self):
+        start = self._expect('to')
+        procedure = self.procedures[self._next().value]
+        self.pos += len(procedure.params)
+        while not self._at('end'):
+            if self._peek() is None:
+                raise LogoError("Line {}: TO without END".format(start.line))
+            if self._at('to'):
+                raise LogoError("Line {}: TO inside TO".format(self._peek().line))
+            self._statement(procedure.code)
+        self._expect('end')
+        procedure.code.append((RETURN, False))
+
+    def _block(self, code):
+        self._expect('[')
+        while not self._at(']'):
+            if self._peek() is None:
+                raise LogoError("Line {}: missing ]".format(self.tokens[-1].line))
+            self._statement(code)
+        self._expect(']')
+
+    def _statement(self, code):
+        token = self._next()
+        if token.kind != 'name':
+            raise LogoError(
+                "Line {}: expected a command but got '{}'".format(token.line, token.value))
+        outer, code.line = code.line, token.line
+        self._command(token, code)
+        code.line = outer
+
+    def _command(self, token, code):
+        name = token.value
+        if name == 'repeat':
+            self._expression(code)
+            code.append((REPEAT, None))
+            loop = len(code)
+            code.append(None)
+            self._block(code)
+            code.append((JUMP, loop))
+            code[loop] = (REPEAT_NEXT, len(code))
+        elif name == 'if':
+            self._expression(code)
+            branch = len(code)
+            code.append(None)
+            self._block(code)
+            code[branch] = (JUMP_IF_FALSE, len(code))
+        elif name == 'ifelse':
+            self._expression(code)
+            branch = len(code)
+            code.append(None)
+            self._block(code)
+            skip = len(code)
+            code.append(None)
+            code[branch] = (JUMP_IF_FALSE, len(code))
+            self._block(code)
+            code[skip] = (JUMP, len(code))
+        elif name == 'make':
+            word = self._next()
+            if word.kind != 'word':
+                raise LogoError("Line {}: MAKE needs a quoted name".format(token.line))
+            self._expression(code)
+            code.append((STORE, word.value))
+        elif name == 'local':
+            word = self._next()
+            if word.kind != 'word':
+                raise LogoError("Line {}: LOCAL needs a quoted name".format(token.line))
+            code.append((LOCAL, word.value))
+        elif name == 'cache':
+            word = self._next()
+            if word.kind != 'word' or word.value not in self.procedures:
+                raise LogoError("Line {}: CACHE needs a quoted procedure name".format(token.line))
+            self.procedures[word.value].cached = True
+        elif name == 'stop':
+            code.append((RETURN, False))
+        elif name in ('output', 'op'):
+            self._expression(code)
+            code.append((RETURN, True))
+        elif _turtle_command(name):
+            command, size = _turtle_command(name)
+            for i in range(size):
+                self._expression(code)
+            if name in _CLOCKWISE:
+                code.append((NEGATE, None))
+            code.append((TURTLE, (command, size)))
+        elif name in self.procedures:
+            self._call(name, code, False)
+        elif name in _FUNCTIONS:
+            raise LogoError("Line {}: you don't say what to do with {}".format(token.line, name))
+        else:
+            raise LogoError("Line {}: I don't know how to {}".format(token.line, name))
+
+    def _call(self, name, code, reporter):
+        procedure = self.procedures[name]
+        for param in procedure.params:
+            self._expression(code)
+        code.append((CALL, (procedure, reporter)))
+
+    def _expression(self, code):
+        self._additive(code)
+        while self._peek() is not None and self._peek().value in ('=', '<>', '<', '>', '<=', '>='):
+            op = self._next().value
+            self._additive(code)
+            code.append((BINARY, _BINARY[op]))
+
+    def _additive(self, code):
+        self._term(code)
+        while self._at('+') or self._at('-'):
+            op = self._next().value
+            self._term(code)
+            code.append((BINARY, _BINARY[op]))
+
+    def _term(self, code):
+        self._unary(code)
+        while self._at('*') or self._at('/'):
+            op = self._next().value
+            self._unary(code)
+            code.append((BINARY, _BINARY[op]))
+
+    def _unary(self, code):
+        token = self._peek()
+        if self._at('-') or (token is not None and token.kind == 'negate'):
+            self._next()
+            self._unary(code)
+            code.append((NEGATE, None))
+        else:
+            self._primary(code)
+
+    def _primary(self, code):
+        token = self._next()
+        kind, value = token.kind, token.value
+        if kind == 'number':
+            code.append((CONST, value))
+        elif kind == 'var':
+            code.append((LOAD, value))
+        elif kind == 'word':
+            code.append((CONST, value))
+        elif kind == 'op' and value == '(':
+            self._expression(code)
+            self._expect(')')
+        elif kind == 'name' and value == 'repcount':
+            code.append((REPCOUNT, None))
+        elif kind == 'name' and value in ('true', 'false'):
+            code.append((CONST, value == 'true'))
+        elif kind == 'name' and value in _FUNCTIONS:
+            nargs, function = _FUNCTIONS[value]
+            for i in range(nargs):
+                self._expression(code)
+            code.append((FUNC, (function, nargs)))
+        elif kind == 'name' and value in self.procedures:
+            self._call(value, code, True)
+        else:
+            raise LogoError("Line {}: expected a value but got '{}'".format(token.line, value))
+
+
+def compile_logo(source):
+    """Parses and compiles Logo source
+
+    returns -- main Procedure and dict of name -> Procedure
+    """
+    return Compiler(source).compile()
+
+
+class _Frame:
+    __slots__ = ('code', 'pc', 'names', 'loops', 'reporter')
+
+    def __init__(self, code, names, reporter):
+        self.code = code
+        self.pc = 0
+        self.names = names
+        # [count, repcount] of each REPEAT we are inside
+        self.loops = []
+        # whether the caller expects a value back
+        self.reporter = reporter
+
+
+def run(main, engine, cache=None):
+    """Runs a compiled Logo program against a TurtleEngine
+
+    Keyword arguments:
+
+    main -- Procedure returned by compile_logo
+    engine -- TurtleEngine to draw with
+    cache -- MotifCache for cached procedures, defaults to a new one
+    """
+    for step in steps(main, engine, cache):
+        pass
+
+
+def steps(main, engine, cache=None):
+    """Runs a compiled Logo program one turtle command at a time, yielding
+    after each one, so it can be paused and resumed. See run"""
+    if cache is None:
+        cache = MotifCache()
+    try:
+        yield from _run(main, engine, cache)
+    except LogoError:
+        raise
+    except (ArithmeticError, ValueError, TypeError) as err:
+        raise LogoError("Logo error: {}".format(err)) from None
+
+
+def _drain(steps):
+    for step in steps:
+        pass
+
+
+def _line(frame):
+    """Returns the source line of the instruction frame is running"""
+    return frame.code.lines[frame.pc - 1]
+
+
+def _run(main, engine, cache, names=None):
+    frames = [_Frame(main.code, {} if names is None else names, False)]
+    try:
+        yield from _execute(frames, engine, cache)
+    except LogoError:
+        raise
+    except (ArithmeticError, ValueError, TypeError) as err:
+        # e.g. adding a word to a number
+        raise LogoError("Line {}: {}".format(_line(frames[-1]), err)) from None
+
+
+def _execute(frames, engine, cache):
+    methods = {name: getattr(engine, name) for name in COMMANDS}
+    frame = frames[-1]
+    globals_ = frame.names
+    stack = []
+
+    def lookup(name):
+        # Logo is dynamically scoped so look through every active frame
+        for f in reversed(frames):
+            if name in f.names:
+                return f.names
+        return None
+
+    while True:
+        op, arg = frame.code[frame.pc]
+        frame.pc += 1
+
+        if op == CONST:
+            stack.append(arg)
+        elif op == LOAD:
+            names = lookup(arg)
+            if names is None:
+                raise LogoError("Line {}: {} has no value".format(_line(frame), arg))
+            stack.append(names[arg])
+        elif op == TURTLE:
+            command, size = arg
+            args = stack[-size:] if size else []
+            del stack[len(stack) - size:]
+            if VECTOR in COMMANDS[command]:
+                args = [tuple(args[i:i + 3]) for i in range(0, size, 3)]
+            try:
+                methods[command](*args)
+            except TypeError:
+                raise LogoError("Line {}: {} needs numbers, not {}".format(
+                    _line(frame), command, args)) from None
+            yield
+        elif op == BINARY:
+            b = stack.pop()
+            stack[-1] = arg(stack[-1], b)
+        elif op == JUMP:
+            frame.pc = arg
+        elif op == JUMP_IF_FALSE:
+            if not stack.pop():
+                frame.pc = arg
+        elif op == REPEAT_NEXT:
+            loop = frame.loops[-1]
+            if loop[1] >= loop[0]:
+                frame.loops.pop()
+                frame.pc = arg
+            else:
+                loop[1] += 1
+        elif op == REPEAT:
+            frame.loops.append([int(stack.pop()), 0])
+        elif op == REPCOUNT:
+            stack.append(float(frame.loops[-1][1]) if frame.loops else -1.0)
+        elif op == NEGATE:
+            stack[-1] = -stack[-1]
+        elif op == FUNC:
+            function, nargs = arg
+            args = stack[len(stack) - nargs:]
+            del stack[len(stack) - nargs:]
+            stack.append(function(*args))
+        elif op == CALL:
+            procedure, reporter = arg
+            nparams = len(procedure.params)
+            names = dict(zip(procedure.params, stack[len(stack) - nparams:]))
+            del stack[len(stack) - nparams:]
+            if procedure.cached and not reporter:
+                # cached procedures only see their own arguments
+                key = (procedure.name, tuple(names[param] for param in procedure.params))
+                cache.draw(engine, key, lambda e: _drain(_run(procedure, e, cache, dict(names))))
+                yield
+                continue
+            if len(frames) >= _MAX_DEPTH:
+                raise LogoError("Line {}: {} has recursed too deeply".format(
+                    _line(frame), procedure.name))
+            frame = _Frame(procedure.code, names, reporter)
+            frames.append(frame)
+        elif op == RETURN:
+            if arg:
+                value = stack.pop()
+            frames.pop()
+            if not frames:
+                return
+            if frame.reporter:
+                if not arg:
+                    raise LogoError("Line {}: a procedure didn't output a value".format(
+                        _line(frames[-1])))
+                stack.append(value)
+            elif arg:
+                raise LogoError("Line {}: you don't say what to do with {}".format(
+                    _line(frames[-1]), value))
+            frame = frames[-1]
+        elif op == STORE:
+            names = lookup(arg)
+            (globals_ if names is None else names)[arg] = stack.pop()
+        elif op == LOCAL:
+            frame.names.setdefault(arg, 0.0)
+
@@ -0,0 +1,136 @@
+"""L-systems that drive the turtle.
+
+The expanded string is never built. Symbols are produced one at a time by
+walking the rules depth first, so memory use depends on the number of
+iterations rather than on the length of the output.
+"""
+from . program import ProgramError, validate_command
+
+
+def parse_rules(rules):
+    """Returns production rules as a dict of symbol -> replacement.
+
+    Keyword arguments:
+
+    rules -- dict or string of rules separated by semicolons or new lines
+    e.g. "F=F[+F]F[-F]F; X=F-[[X]+X]+F[+FX]-X"
+    """
+    if isinstance(rules, dict):
+        return dict(rules)
+
+    parsed = {}
+    for rule in rules.replace(';', '\n').splitlines():
+        rule = rule.strip()
+        if not rule:
+            continue
+        symbol, sep, replacement = rule.partition('=')
+        symbol = symbol.strip()
+        if not sep or len(symbol) != 1:
+            raise ProgramError("Bad rule '{}'. Rules look like F=F+F".format(rule))
+        parsed[symbol] = replacement.strip().replace(' ', '')
+    return parsed
+
+
+def default_mapping(angle=90, step=1):
+    """Returns the usual turtle interpretation of L-system symbols
+
+    F, G -- move forward drawing an edge
+    f -- move forward without drawing
+    + - -- turn left / right
+    & ^ -- pitch down / up
+    \\ / -- roll left / right
+    | -- turn around
+    [ ] -- save / restore the turtle's state
+    """
+    return {
+        'F': [('fd', step)],
+        'G': [('fd', step)],
+        'f': [('pu',), ('fd', step), ('pd',)],
+        '+': [('lt', angle)],
+        '-': [('rt', angle)],
+        '&': [('ld', angle)],
+        '^': [('lu', angle)],
+        '\\': [('rl', angle)],
+        '/': [('rr', angle)],
+        '|': [('lt', 180)],
+        '[': [('push',)],
+        ']': [('pop',)]}
+
+
+class LSystem:
+    """Deterministic L-system
+
+    Keyword arguments:
+
+    axiom -- starting string
+    rules -- dict or string of production rules, see parse_rules
+    iterations -- number of times to apply the rules
+    """
+
+    def __init__(self, axiom, rules, iterations):
+        self.axiom = axiom.replace(' ', '')
+        self.rules = parse_rules(rules)
+        self.iterations = iterations
+
+    def symbols(self):
+        """Yields the symbols of the fully expanded string one at a time"""
+        rules = self.rules
+        iterations = self.iterations
+        # one iterator per level of expansion we are part way through
+        stack = [(iter(self.axiom), 0)]
+        while stack:
+            symbols, depth = stack[-1]
+            for symbol in symbols:
+                if depth < iterations and symbol in rules:
+                    stack.append((iter(rules[symbol]), depth + 1))
+                    break
+                yield symbol
+            else:
+                stack.pop()
+
+    def length(self, weights=None):
+        """Returns the length of the fully expanded string without
+        expanding it.
+
+        Keyword arguments:
+
+        weights -- dict of symbol -> weight. If given returns the sum of
+        the weights of the expanded symbols instead e.g. the number of
+        commands they map to
+        """
+        # size of each symbol after 0, 1, 2... iterations
+        sizes = {}
+        symbols = set(self.axiom)
+        for replacement in self.rules.values():
+            symbols.update(replacement)
+        for symbol in symbols:
+            sizes[symbol] = 1 if weights is None else weights.get(symbol, 0)
+        for i in range(self.iterations):
+            sizes = {
+                symbol: sum(sizes[s] for s in self.rules[symbol]) if symbol in self.rules else size
+                for symbol, size in sizes.items()}
+        return sum(sizes[symbol] for symbol in self.axiom)
+
+    def commands(self, mapping=None):
+        """Yields validated turtle commands for the expanded string.
+
+        Keyword arguments:
+
+        mapping -- dict of symbol -> list of commands. Symbols that are not
+        in the mapping are ignored. Defaults to default_mapping()
+        """
+        if mapping is None:
+            mapping = default_mapping()
+
+        # validate the mapping once rather than every command we yield
+        compiled = {}
+        for symbol, commands in mapping.items():
+            try:
+                compiled[symbol] = [validate_command(command) for command in commands]
+            except ProgramError as err:
+                raise ProgramError("Symbol '{}': {}".format(symbol, err)) from None
+
+        for symbol in self.symbols():
+            commands = compiled.get(symbol)
+            if commands:
+                yield from commands
@@ -0,0 +1,100 @@
+"""Draws independent parts of a scene in separate processes.
+
+Each Job is drawn by its own TurtleEngine in a worker process and sent back
+as plain vert, edge and face arrays, which are then appended to one buffer
+with their indices offset. Jobs are not welded to each other so they should
+be separate pieces e.g. buildings in a block or cells of a grid.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from . engine import TurtleEngine
+from . logo import compile_logo, run
+from . lsystem import LSystem, default_mapping
+from . program import ProgramError, execute, parse_program
+
+KINDS = ('program', 'logo', 'lsystem')
+
+
+class Job:
+    """Something to draw in a worker process
+
+    Keyword arguments:
+
+    kind -- 'program', 'logo' or 'lsystem'
+    source -- program string or list for 'program', Logo source for 'logo'
+    or (axiom, rules, iterations) for 'lsystem'
+    location -- where the turtle starts
+    rotation -- turtle rotation in radians
+    options -- angle, step and mapping for 'lsystem'
+    """
+
+    def __init__(self, kind, source, location=(0, 0, 0), rotation=(0, 0, 0), **options):
+        if kind not in KINDS:
+            raise ProgramError("Unknown job kind '{}'".format(kind))
+        self.kind = kind
+        self.source = source
+        self.location = tuple(location)
+        self.rotation = tuple(rotation)
+        self.options = options
+
+
+def draw_job(job):
+    """Draws a Job and returns its (verts, edges, loops, face_sizes) with
+    vert indices starting at 0"""
+    engine = TurtleEngine(job.location, job.rotation, origin=job.location, origin_rotation=job.rotation)
+    if job.kind == 'program':
+        execute(parse_program(job.source), engine)
+    elif job.kind == 'logo':
+        run(compile_logo(job.source)[0], engine)
+    else:
+        axiom, rules, iterations = job.source
+        mapping = job.options.get('mapping')
+        if mapping is None:
+            mapping = default_mapping(job.options.get('angle', 90), job.options.get('step', 1))
+        execute(LSystem(axiom, rules, iterations).commands(mapping), engine)
+
+    engine.end_stroke()
+    buffer = engine.buffer
+    return buffer.verts.copy(), buffer.edges.copy(), buffer.loops.copy(), buffer.face_sizes.copy()
+
+
+def append_result(buffer, result):
+    """Appends the arrays returned by draw_job to a GeometryBuffer"""
+    verts, edges, loops, face_sizes = result
+    if not len(verts):
+        return
+    first = buffer.add_verts(verts)
+    if len(edges):
+        buffer.add_edges(edges + first)
+    if len(face_sizes):
+        buffer.add_faces(loops + first, face_sizes)
+
+
+def _context():
+    # forking a process with threads running, as blender has, can leave
+    # the child holding locks that are never released. Spawned workers
+    # start fresh and import blended_turtle, which works without bpy
+    return multiprocessing.get_context('spawn')
+
+
+def generate(buffer, jobs, max_workers=None):
+    """Draws jobs in a pool of processes and appends them to buffer in the
+    order they were given. Results are appended as they arrive so only a
+    few of them are held in memory at a time.
+
+    Keyword arguments:
+
+    buffer -- GeometryBuffer to append to
+    jobs -- iterable of Jobs
+    max_workers -- number of processes, defaults to the number of CPUs
+    """
+    jobs = list(jobs)
+    if max_workers == 1 or len(jobs) < 2:
+        for job in jobs:
+            append_result(buffer, draw_job(job))
+        return
+
+    with ProcessPoolExecutor(max_workers, mp_context=_context()) as executor:
+        for result in executor.map(draw_job, jobs):
+            append_result(buffer, result)
@@ -0,0 +1,73 @@
+from math import asin, atan2, cos, sin
+
+import numpy as np
+
+
+def euler_to_matrix(euler):
+    """Returns the 3x3 rotation matrix of an XYZ euler in radians.
+
+    This matches blender's 'XYZ' rotation mode i.e. the rotation is
+    applied around X first, then Y, then Z.
+    """
+    cx, cy, cz = cos(euler[0]), cos(euler[1]), cos(euler[2])
+    sx, sy, sz = sin(euler[0]), sin(euler[1]), sin(euler[2])
+
+    return np.array((
+        (cy * cz, sx * sy * cz - cx * sz, cx * sy * cz + sx * sz),
+        (cy * sz, sx * sy * sz + cx * cz, cx * sy * sz - sx * cz),
+        (-sy, sx * cy, cx * cy)))
+
+
+def axis_matrix(axis, angle):
+    """Returns the 3x3 matrix of a rotation of angle radians around X (0),
+    Y (1) or Z (2)"""
+    c, s = cos(angle), sin(angle)
+    if axis == 0:
+        return np.array(((1.0, 0.0, 0.0), (0.0, c, -s), (0.0, s, c)))
+    if axis == 1:
+        return np.array(((c, 0.0, s), (0.0, 1.0, 0.0), (-s, 0.0, c)))
+    return np.array(((c, -s, 0.0), (s, c, 0.0), (0.0, 0.0, 1.0)))
+
+
+def orthonormalized(matrix):
+    """Returns the closest rotation matrix to one that has drifted after
+    many multiplies, keeping its Y (heading) axis"""
+    y_axis = matrix[:, 1] / np.linalg.norm(matrix[:, 1])
+    x_axis = np.cross(y_axis, matrix[:, 2])
+    x_axis /= np.linalg.norm(x_axis)
+    z_axis = np.cross(x_axis, y_axis)
+    return np.column_stack((x_axis, y_axis, z_axis))
+
+
+def matrix_to_euler(matrix):
+    """Returns the XYZ euler in radians of a 3x3 rotation matrix"""
+    sin_y = min(1.0, max(-1.0, -matrix[2][0]))
+    y = asin(sin_y)
+    if abs(sin_y) < 0.999999:
+        x = atan2(matrix[2][1], matrix[2][2])
+        z = atan2(matrix[1][0], matrix[0][0])
+    else:
+        # gimbal lock, put all of the rotation around X
+        x = atan2(-matrix[1][2], matrix[1][1])
+        z = 0.0
+    return np.array((x, y, z))
+
+
+def track_to_matrix(direction):
+    """Returns a rotation matrix that points Y along direction with Z as
+    close to world Z as possible. The same as mathutils
+    Vector.to_track_quat('Y', 'Z')"""
+    y_axis = np.array(direction, dtype=float)
+    length = np.linalg.norm(y_axis)
+    if length == 0:
+        return np.identity(3)
+    y_axis /= length
+
+    z_axis = np.array((0.0, 0.0, 1.0)) - y_axis[2] * y_axis
+    if np.linalg.norm(z_axis) < 1e-6:
+        # looking straight up or down so any up vector will do
+        z_axis = np.array((0.0, -y_axis[2], 0.0))
+    z_axis /= np.linalg.norm(z_axis)
+    x_axis = np.cross(y_axis, z_axis)
+
+    return np.column_stack((x_axis, y_axis, z_axis))
@@ -0,0 +1,152 @@
+"""Turtle programs i.e. sequences of turtle commands that are validated once
+and then run against a TurtleEngine in one go.
+
+A program can be a string such as
+
+    "fd 1 rt 90 fd 1 qc (0, 1, 0) (1, 1, 0)"
+
+where brackets, commas and semicolons are optional, or a list of commands
+such as
+
+    [('fd', 1), ('rt', 90), ('qc', (0, 1, 0), (1, 1, 0))]
+"""
+import re
+
+FLOAT = 'FLOAT'
+VECTOR = 'VECTOR'
+
+# argument types of every command a program can contain
+COMMANDS = {
+    'fd': (FLOAT,),
+    'bk': (FLOAT,),
+    'up': (FLOAT,),
+    'dn': (FLOAT,),
+    'lf': (FLOAT,),
+    'ri': (FLOAT,),
+    'lt': (FLOAT,),
+    'rt': (FLOAT,),
+    'lu': (FLOAT,),
+    'ld': (FLOAT,),
+    'rl': (FLOAT,),
+    'rr': (FLOAT,),
+    'setp': (VECTOR,),
+    'setrot': (VECTOR,),
+    'seth': (FLOAT,),
+    'setpitch': (FLOAT,),
+    'setr': (FLOAT,),
+    'qc': (VECTOR, VECTOR),
+    'cc': (VECTOR, VECTOR, VECTOR),
+    'pu': (),
+    'pd': (),
+    'home': (),
+    'bp': (),
+    'sp': (),
+    'fp': (),
+    'ep': (FLOAT, FLOAT),
+    'tube': (FLOAT, FLOAT),
+    'push': (),
+    'pop': ()}
+
+
+class ProgramError(ValueError):
+    """Raised when a program contains an unknown command or bad arguments"""
+
+
+def _tokenize(source):
+    return [token for token in re.split(r'[\s(),;]+', source) if token]
+
+
+def _parse_string(source):
+    """Splits a program string into commands with their raw arguments"""
+    tokens = _tokenize(source)
+    commands = []
+    i = 0
+    while i < len(tokens):
+        name = tokens[i].lower()
+        if name not in COMMANDS:
+            raise ProgramError("Unknown command '{}'".format(tokens[i]))
+        size = sum(3 if arg_type == VECTOR else 1 for arg_type in COMMANDS[name])
+        values = tokens[i + 1:i + 1 + size]
+        if len(values) != size:
+            raise ProgramError(
+                "'{}' expects {} numbers but got {}".format(name, size, len(values)))
+        args = []
+        for arg_type in COMMANDS[name]:
+            if arg_type == VECTOR:
+                args.append(tuple(values[:3]))
+                values = values[3:]
+            else:
+                args.append(values.pop(0))
+        commands.append((name, *args))
+        i += 1 + size
+    return commands
+
+
+def validate_command(command):
+    """Returns a command as a (name, args) tuple with its arguments
+    converted to floats and tuples of floats.
+
+    Keyword arguments:
+
+    command -- tuple or list of command name followed by its arguments
+    """
+    if isinstance(command, str):
+        command = (command,)
+    name, args = str(command[0]).lower(), command[1:]
+    if name not in COMMANDS:
+        raise ProgramError("Unknown command '{}'".format(command[0]))
+    arg_types = COMMANDS[name]
+    if len(args) != len(arg_types):
+        raise ProgramError(
+            "'{}' expects {} arguments but got {}".format(name, len(arg_types), len(args)))
+
+    converted = []
+    try:
+        for arg_type, arg in zip(arg_types, args):
+            if arg_type == VECTOR:
+                vector = tuple(float(value) for value in arg)
+                if len(vector) != 3:
+                    raise ValueError
+                converted.append(vector)
+            else:
+                converted.append(float(arg))
+    except (TypeError, ValueError):
+        raise ProgramError("Bad arguments for '{}': {}".format(name, args)) from None
+
+    return name, tuple(converted)
+
+
+def parse_program(program):
+    """Validates a whole program and returns it as a list of (name, args)
+    tuples ready to be run
+
+    Keyword arguments:
+
+    program -- string or list of commands
+    """
+    if isinstance(program, str):
+        program = _parse_string(program)
+
+    commands = []
+    for i, command in enumerate(program):
+        try:
+            commands.append(validate_command(command))
+        except ProgramError as err:
+            raise ProgramError("Command {}: {}".format(i, err)) from None
+    return commands
+
+
+def execute(commands, engine):
+    """Runs validated commands against a TurtleEngine"""
+    methods = {name: getattr(engine, name) for name in COMMANDS}
+    for name, args in commands:
+        methods[name](*args)
+
+
+def steps(commands, engine):
+    """Runs validated commands against a TurtleEngine, yielding after each
+    one so the run can be paused and resumed"""
+    methods = {name: getattr(engine, name) for name in COMMANDS}
+    for name, args in commands:
+        methods[name](*args)
+        yield
@@ -0,0 +1,125 @@
+import numpy as np
+
+from . buffers import _grown
+
+# number of cells we are prepared to visit before a query falls back to
+# testing every point
+_MAX_QUERY_CELLS = 4096
+
+
+def _cell_keys(cells):
+    """Packs (n, 3) integer cell coordinates into one int64 key per cell"""
+    cells = cells.astype(np.int64) & 0x1FFFFF
+    return (cells[:, 0] << 42) | (cells[:, 1] << 21) | cells[:, 2]
+
+
+class SpatialHash:
+    """Uniform grid of points for fast box and point queries.
+
+    Points are indexed 0, 1, 2... in the order they are inserted, which
+    matches the order verts are added to a mesh. Most points live in a pair
+    of arrays sorted by cell that are looked up with a binary search. Points
+    inserted since the arrays were last sorted live in a dict of cells until
+    there are enough of them to be worth merging, so inserting is cheap.
+
+    Keyword arguments:
+
+    cell_size -- edge length of a grid cell
+    """
+
+    def __init__(self, cell_size=1.0):
+        self.cell_size = float(cell_size)
+        self._co = np.empty((256, 3))
+        self._count = 0
+        # points [0, _sorted_count) are in _keys / _order
+        self._keys = np.empty(0, dtype=np.int64)
+        self._order = np.empty(0, dtype=np.int64)
+        self._sorted_count = 0
+        # key -> list of indices of points inserted since the last sort
+        self._recent = {}
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def points(self):
+        """(n, 3) array of the points in the order they were inserted"""
+        return self._co[:self._count]
+
+    @classmethod
+    def from_points(cls, cos, cell_size=None):
+        """Returns a SpatialHash of an (n, 3) array of points, picking a
+        cell size that puts roughly one point in each cell if none is given"""
+        cos = np.asarray(cos, dtype=float).reshape(-1, 3)
+        if cell_size is None:
+            cell_size = 1.0
+            if len(cos) > 1:
+                extent = float(np.ptp(cos, axis=0).max())
+                cell_size = max(extent / max(len(cos) ** (1 / 3), 1.0), 1e-3)
+        index = cls(cell_size)
+        index.insert_many(cos)
+        index._sort()
+        return index
+
+    def _cells(self, cos):
+        return np.floor(cos / self.cell_size).astype(np.int64)
+
+    def _sort(self):
+        """Merges recently inserted points into the sorted arrays"""
+        keys = _cell_keys(self._cells(self._co[:self._count]))
+        self._order = np.argsort(keys, kind='stable')
+        self._keys = keys[self._order]
+        self._sorted_count = self._count
+        self._recent.clear()
+
+    def insert(self, co):
+        """Adds a point and returns its index"""
+        return self.insert_many((co,))
+
+    def insert_many(self, cos):
+        """Adds an (n, 3) array of points and returns the index of the first"""
+        cos = np.asarray(cos, dtype=float).reshape(-1, 3)
+        first = self._count
+        self._co = _grown(self._co, self._count + len(cos))
+        self._co[first:first + len(cos)] = cos
+        self._count += len(cos)
+
+        if self._count - self._sorted_count > max(1024, self._sorted_count // 4):
+            self._sort()
+        else:
+            keys = _cell_keys(self._cells(cos)).tolist()
+            for index, key in enumerate(keys, first):
+                self._recent.setdefault(key, []).append(index)
+        return first
+
+    def query_box(self, lbound, ubound):
+        """Returns an array of the indices of all points inside a box"""
+        lbound = np.asarray(lbound, dtype=float)
+        ubound = np.asarray(ubound, dtype=float)
+        cos = self._co[:self._count]
+
+        low, high = self._cells(lbound[None])[0], self._cells(ubound[None])[0]
+        if np.prod(high - low + 1) > _MAX_QUERY_CELLS:
+            candidates = np.arange(self._count)
+        else:
+            grid = np.mgrid[low[0]:high[0] + 1, low[1]:high[1] + 1, low[2]:high[2] + 1]
+            keys = _cell_keys(grid.reshape(3, -1).T)
+            starts = np.searchsorted(self._keys, keys, side='left')
+            ends = np.searchsorted(self._keys, keys, side='right')
+            found = [self._order[start:end] for start, end in zip(starts, ends) if end > start]
+            for key in keys.tolist():
+                if key in self._recent:
+                    found.append(np.array(self._recent[key], dtype=np.int64))
+            if not found:
+                return np.empty(0, dtype=np.int64)
+            candidates = np.concatenate(found)
+
+        points = cos[candidates]
+        inside = np.all((points >= lbound) & (points <= ubound), axis=1)
+        return np.sort(candidates[inside])
+
+    def query_point(self, co, radius=0.001):
+        """Returns an array of the indices of all points within radius of co
+        along each axis"""
+        co = np.asarray(co, dtype=float)
+        return self.query_box(co - radius, co + radius)
@@ -0,0 +1,109 @@
+"""Optional profiling counters.
+
+Timers record the number of calls and the total and longest wall time of
+turtle commands and internal hot paths. Counters record how often something
+happens e.g. bpy.ops calls or verts scanned. Nothing is recorded unless
+enable() has been called and while disabled a timed function costs one
+extra call and a flag check.
+"""
+from functools import wraps
+from time import perf_counter
+
+enabled = False
+
+# name -> [calls, total seconds, max seconds]
+_timers = {}
+# name -> count
+_counters = {}
+
+
+def enable(on=True):
+    global enabled
+    enabled = on
+
+
+def reset():
+    _timers.clear()
+    _counters.clear()
+
+
+def count(name, n=1):
+    """Adds n to the counter called name"""
+    if enabled:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def record(name, seconds):
+    """Records one call to name that took seconds"""
+    timer = _timers.get(name)
+    if timer is None:
+        _timers[name] = [1, seconds, seconds]
+    else:
+        timer[0] += 1
+        timer[1] += seconds
+        if seconds > timer[2]:
+            timer[2] = seconds
+
+
+def timed(name):
+    """Decorator that times every call to a function while stats are enabled"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def timed_execute(cls):
+    """Times an operator's execute method under its bl_idname.
+
+    blender checks the number of arguments execute takes so the wrapper
+    has to take exactly self and context.
+    """
+    execute = cls.execute
+    name = cls.bl_idname
+
+    def wrapper(self, context):
+        if not enabled:
+            return execute(self, context)
+        start = perf_counter()
+        try:
+            return execute(self, context)
+        finally:
+            record(name, perf_counter() - start)
+
+    wrapper.__doc__ = execute.__doc__
+    wrapper.__wrapped__ = execute
+    cls.execute = wrapper
+    return cls
+
+
+def timers():
+    """Returns a list of (name, calls, total seconds, max seconds) sorted by
+    total time"""
+    rows = [(name, calls, total, longest) for name, (calls, total, longest) in _timers.items()]
+    return sorted(rows, key=lambda row: row[2], reverse=True)
+
+
+def counters():
+    """Returns a list of (name, count) sorted by name"""
+    return sorted(_counters.items())
+
+
+def report():
+    """Returns the timers and counters as lines of text"""
+    lines = ["{:32} {:>8} {:>10} {:>10} {:>10}".format('timer', 'calls', 'total ms', 'mean ms', 'max ms')]
+    for name, calls, total, longest in timers():
+        lines.append("{:32} {:8d} {:10.3f} {:10.3f} {:10.3f}".format(
+            name, calls, total * 1000, total * 1000 / calls, longest * 1000))
+    lines.append("{:32} {:>8}".format('counter', 'count'))
+    for name, value in counters():
+        lines.append("{:32} {:8d}".format(name, value))
+    return lines
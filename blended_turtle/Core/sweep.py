@@ -0,0 +1,132 @@
+"""Sweeps a 2D profile along a path to make tubes, rails and branches.
+
+Frames along the path are found by parallel transport, which turns the
+frame as little as possible from one point to the next so the tube doesn't
+twist. The rotation between each pair of tangents is worked out for every
+point at once and the rotations are then chained together with a scan of
+batched matrix products, so there is no python loop over the points.
+"""
+import numpy as np
+
+
+def circle_profile(radius, sides=8):
+    """Returns an (n, 2) array of the points of a regular polygon"""
+    angles = np.linspace(0, 2 * np.pi, int(sides), endpoint=False)
+    return radius * np.column_stack((np.cos(angles), np.sin(angles)))
+
+
+def _unit(vectors):
+    lengths = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    lengths[lengths == 0] = 1
+    return vectors / lengths
+
+
+def _rotations(a, b):
+    """Returns (n, 3, 3) matrices that each rotate unit vector a[i] onto b[i]
+    by the smallest angle"""
+    v = np.cross(a, b)
+    c = np.einsum('ij,ij->i', a, b)
+    cross = np.zeros((len(a), 3, 3))
+    cross[:, 0, 1], cross[:, 0, 2] = -v[:, 2], v[:, 1]
+    cross[:, 1, 0], cross[:, 1, 2] = v[:, 2], -v[:, 0]
+    cross[:, 2, 0], cross[:, 2, 1] = -v[:, 1], v[:, 0]
+    opposite = c < -1 + 1e-9
+    scale = np.where(opposite, 0, 1 / np.where(opposite, 1, 1 + c))
+    rotations = np.eye(3) + cross + (cross @ cross) * scale[:, None, None]
+
+    if opposite.any():
+        # half turn around any axis at right angles to a
+        u = np.cross(a[opposite], (1, 0, 0))
+        small = np.linalg.norm(u, axis=1) < 1e-6
+        u[small] = np.cross(a[opposite][small], (0, 1, 0))
+        u = _unit(u)
+        rotations[opposite] = 2 * np.einsum('ij,ik->ijk', u, u) - np.eye(3)
+    return rotations
+
+
+def _chain(rotations):
+    """Returns the running products R[i] @ ... @ R[0] of (n, 3, 3) matrices
+    using log2(n) batched products"""
+    products = rotations.copy()
+    step = 1
+    while step < len(products):
+        products[step:] = products[step:] @ products[:-step]
+        step *= 2
+    return products
+
+
+def frames(points, normal):
+    """Returns (tangents, normals) along a path by parallel transport.
+
+    Keyword arguments:
+
+    points -- (n, 3) array of points on the path, no two the same in a row
+    normal -- normal at the first point, which is made square to the path
+    """
+    directions = _unit(np.diff(points, axis=0))
+    # tangents at corners bisect the segments either side
+    tangents = np.concatenate((directions[:1], directions[:-1] + directions[1:], directions[-1:]))
+    tangents = _unit(tangents)
+    zero = np.linalg.norm(tangents, axis=1) == 0
+    tangents[zero] = np.concatenate((directions, directions[-1:]))[zero]
+
+    first = np.asarray(normal, dtype=float)
+    first = first - tangents[0] * np.dot(first, tangents[0])
+    if np.linalg.norm(first) < 1e-9:
+        first = np.cross(tangents[0], (1, 0, 0))
+        if np.linalg.norm(first) < 1e-9:
+            first = np.cross(tangents[0], (0, 1, 0))
+    first = first / np.linalg.norm(first)
+
+    normals = np.empty_like(tangents)
+    normals[0] = first
+    if len(tangents) > 1:
+        chained = _chain(_rotations(tangents[:-1], tangents[1:]))
+        normals[1:] = chained @ first
+    # keep them square to the tangents as rounding errors build up
+    normals = _unit(normals - tangents * np.einsum('ij,ij->i', normals, tangents)[:, None])
+    return tangents, normals
+
+
+def rings(points, profile, tangents, normals, max_miter=4):
+    """Returns an (n, m, 3) array of the profile placed at every point.
+
+    The profile's x axis follows tangent x normal and its y axis follows
+    normal. At corners rings are stretched across the bend so the tube
+    keeps its thickness.
+    """
+    points = np.asarray(points, dtype=float)
+    binormals = np.cross(tangents, normals)
+    offsets = (
+        profile[None, :, 0, None] * binormals[:, None, :]
+        + profile[None, :, 1, None] * normals[:, None, :])
+
+    if len(points) > 2:
+        directions = _unit(np.diff(points, axis=0))
+        bend = directions[1:] - directions[:-1]
+        cos_half = np.einsum('ij,ij->i', tangents[1:-1], directions[1:])
+        stretch = np.minimum(1 / np.maximum(cos_half, 1e-9), max_miter) - 1
+        bend = _unit(bend)
+        along = np.einsum('imj,ij->im', offsets[1:-1], bend)
+        offsets[1:-1] += along[:, :, None] * bend[:, None, :] * stretch[:, None, None]
+
+    return points[:, None, :] + offsets
+
+
+def ring_quads(ring_count, ring_size):
+    """Returns (q, 4) positions into flattened rings of the quads joining
+    each ring to the next, facing out of the tube. Rings go clockwise
+    around the tangent, as x follows tangent x normal"""
+    i = np.arange(ring_count - 1)[:, None] * ring_size
+    j = np.arange(ring_size)[None, :]
+    k = (j + 1) % ring_size
+    return np.stack((i + j, i + j + ring_size, i + k + ring_size, i + k), axis=-1).reshape(-1, 4)
+
+
+def profile_points(profile):
+    """Returns profile as an (m, 2) array going anticlockwise"""
+    profile = np.asarray(profile, dtype=float).reshape(-1, 2)
+    x, y = profile[:, 0], profile[:, 1]
+    if np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y) < 0:
+        profile = profile[::-1]
+    return profile
@@ -0,0 +1,298 @@
+"""Ear clipping triangulation of planar polygons with holes.
+
+Points are projected onto the polygon's plane, holes are joined to the
+outline with bridge edges so there is one ring of points to clip, and ears
+are clipped one at a time. Testing whether an ear contains another point is
+only done against reflex points, as no convex point can be inside an ear,
+and only against those in the cells of a grid that the ear overlaps.
+"""
+import numpy as np
+
+# number of grid cells an ear can cover before it is tested against every
+# reflex point instead
+_MAX_EAR_CELLS = 256
+
+
+def newell_normal(cos):
+    """Returns the unit normal of a polygon, pointing the way its points
+    wind anticlockwise"""
+    cos = np.asarray(cos, dtype=float)
+    nxt = np.roll(cos, -1, axis=0)
+    normal = np.array((
+        np.sum((cos[:, 1] - nxt[:, 1]) * (cos[:, 2] + nxt[:, 2])),
+        np.sum((cos[:, 2] - nxt[:, 2]) * (cos[:, 0] + nxt[:, 0])),
+        np.sum((cos[:, 0] - nxt[:, 0]) * (cos[:, 1] + nxt[:, 1]))))
+    length = np.linalg.norm(normal)
+    if length == 0:
+        return np.array((0.0, 0.0, 1.0))
+    return normal / length
+
+
+def project(cos, normal):
+    """Returns (n, 2) coordinates of points in the plane with normal, with
+    axes chosen so that anticlockwise around normal is anticlockwise in 2D"""
+    cos = np.asarray(cos, dtype=float)
+    reference = np.array((1.0, 0.0, 0.0)) if abs(normal[0]) < 0.9 else np.array((0.0, 1.0, 0.0))
+    u = np.cross(reference, normal)
+    u /= np.linalg.norm(u)
+    v = np.cross(normal, u)
+    return np.column_stack((cos @ u, cos @ v))
+
+
+def _signed_area(points):
+    x, y = points[:, 0], points[:, 1]
+    return 0.5 * float(np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y))
+
+
+def _turns(points, ring):
+    """Returns the cross product at each point of ring, which is positive
+    where it's convex and negative where it's reflex"""
+    p = points[ring]
+    a = np.roll(p, 1, axis=0)
+    c = np.roll(p, -1, axis=0)
+    return (p[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (p[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+
+
+def _in_triangle(points, a, b, c):
+    """Returns a mask of the points inside or on the edge of triangle abc
+    that aren't at one of its corners"""
+    d1 = (points[:, 0] - b[0]) * (a[1] - b[1]) - (a[0] - b[0]) * (points[:, 1] - b[1])
+    d2 = (points[:, 0] - c[0]) * (b[1] - c[1]) - (b[0] - c[0]) * (points[:, 1] - c[1])
+    d3 = (points[:, 0] - a[0]) * (c[1] - a[1]) - (c[0] - a[0]) * (points[:, 1] - a[1])
+    inside = ~(((d1 < 0) | (d2 < 0) | (d3 < 0)) & ((d1 > 0) | (d2 > 0) | (d3 > 0)))
+    for corner in (a, b, c):
+        inside &= np.any(points != corner, axis=1)
+    return inside
+
+
+def _in_corner(a, b, c, point):
+    """Returns whether point is inside the corner of an anticlockwise ring
+    at b, between its edges to a and c"""
+    def cross(u, v):
+        return u[0] * v[1] - u[1] * v[0]
+    to_a = (a[0] - b[0], a[1] - b[1])
+    to_c = (c[0] - b[0], c[1] - b[1])
+    to_point = (point[0] - b[0], point[1] - b[1])
+    if cross(to_c, to_a) > 0:
+        return cross(to_c, to_point) > 0 and cross(to_point, to_a) > 0
+    return not (cross(to_a, to_point) >= 0 and cross(to_point, to_c) >= 0)
+
+
+def _bridge(points, ring, hole):
+    """Returns ring with hole spliced into it through a pair of bridge edges
+    from the hole's rightmost point to a point of ring it can see"""
+    hole_points = points[hole]
+    m = int(np.argmax(hole_points[:, 0]))
+    mx, my = hole_points[m]
+
+    # cast a ray in +x from M and find the closest edge of ring it hits
+    ring = np.asarray(ring)
+    p1 = points[ring]
+    p2 = points[np.roll(ring, -1)]
+    spans = ((p1[:, 1] <= my) & (p2[:, 1] >= my)) | ((p1[:, 1] >= my) & (p2[:, 1] <= my))
+    spans &= p1[:, 1] != p2[:, 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = p1[:, 0] + (my - p1[:, 1]) * (p2[:, 0] - p1[:, 0]) / (p2[:, 1] - p1[:, 1])
+    hits = np.flatnonzero(spans & (x >= mx))
+    if not len(hits):
+        # hole isn't inside the ring, bridge to the closest point instead
+        visible = int(np.argmin(np.sum((p1 - (mx, my)) ** 2, axis=1)))
+    else:
+        edge = int(hits[np.argmin(x[hits])])
+        ix = x[edge]
+        # the end of the edge furthest along the ray is a candidate
+        visible = edge if p1[edge, 0] > p2[edge, 0] else (edge + 1) % len(ring)
+        if ix != points[ring[visible], 0]:
+            # but a reflex point of ring inside (M, I, P) may block it, in
+            # which case use the one closest in angle to the ray
+            reflex = np.flatnonzero(_turns(points, ring) < 0)
+            reflex = reflex[reflex != visible]
+            if len(reflex):
+                inside = _in_triangle(
+                    points[ring[reflex]], (mx, my), (ix, my), points[ring[visible]])
+                blocking = reflex[inside]
+                if len(blocking):
+                    offsets = points[ring[blocking]] - (mx, my)
+                    angles = np.abs(np.arctan2(offsets[:, 1], offsets[:, 0]))
+                    distances = np.sum(offsets ** 2, axis=1)
+                    visible = int(blocking[np.lexsort((distances, angles))[0]])
+
+    # P can already be in ring more than once if other holes are bridged to
+    # it, in which case splice into the copy whose corner M is inside of
+    copies = np.flatnonzero(np.all(points[ring] == points[ring[visible]], axis=1))
+    if len(copies) > 1:
+        for copy in copies.tolist():
+            if _in_corner(
+                    points[ring[copy - 1]], points[ring[copy]],
+                    points[ring[(copy + 1) % len(ring)]], (mx, my)):
+                visible = copy
+                break
+
+    ring = ring.tolist()
+    hole = list(hole[m:]) + list(hole[:m + 1])
+    return ring[:visible + 1] + hole + ring[visible:]
+
+
+class _ReflexGrid:
+    """Uniform grid of the reflex points of a ring, so ears only need testing
+    against the reflex points near them.
+
+    Keyword arguments:
+
+    ring_points -- (n, 2) points of the ring
+    reflex -- mask of the reflex points
+    """
+
+    def __init__(self, ring_points, reflex):
+        self.ring_points = ring_points
+        self.lower = ring_points.min(axis=0)
+        extent = ring_points.max(axis=0) - self.lower
+        count = max(int(np.count_nonzero(reflex)), 1)
+        # roughly one reflex point per cell
+        self.size = max(
+            float(np.sqrt(extent[0] * extent[1] / count)), float(extent.max()) / count, 1e-12)
+        self.cells = {}
+        positions = np.flatnonzero(reflex)
+        self.count = len(positions)
+        keys = self._cells(ring_points[positions]).tolist()
+        for position, key in zip(positions.tolist(), keys):
+            self.cells.setdefault(tuple(key), set()).add(position)
+
+    def _cells(self, points):
+        return np.floor((points - self.lower) / self.size).astype(np.int64)
+
+    def remove(self, position):
+        """Removes a point that is no longer reflex"""
+        key = tuple(self._cells(self.ring_points[position][None])[0].tolist())
+        self.cells[key].discard(position)
+        self.count -= 1
+
+    def near(self, lower, upper):
+        """Returns the positions of the reflex points in the cells a box
+        overlaps, or None if it overlaps too many cells to be worth it"""
+        (x0, y0), (x1, y1) = self._cells(np.array((lower, upper))).tolist()
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > _MAX_EAR_CELLS:
+            return None
+        cells = self.cells
+        near = []
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                cell = cells.get((x, y))
+                if cell:
+                    near.extend(cell)
+        return near
+
+
+def _clip(points, ring):
+    """Ear clips a simple anticlockwise ring and returns triangles of
+    positions in ring"""
+    n = len(ring)
+    ring_points = points[ring]
+    prev = [n - 1] + list(range(n - 1))
+    nxt = list(range(1, n)) + [0]
+    turns = _turns(points, ring)
+    convex = (turns > 0).tolist()
+    # only reflex points can be inside an ear so they're all we test against
+    reflex = turns < 0
+    grid = _ReflexGrid(ring_points, reflex)
+
+    def turn(b):
+        pa, pb, pc = ring_points[prev[b]], ring_points[b], ring_points[nxt[b]]
+        return (pb[0] - pa[0]) * (pc[1] - pa[1]) - (pb[1] - pa[1]) * (pc[0] - pa[0])
+
+    def is_ear(b):
+        if not convex[b]:
+            return False
+        if not grid.count:
+            return True
+        a, c = prev[b], nxt[b]
+        corners = ring_points[[a, b, c]]
+        candidates = grid.near(corners.min(axis=0), corners.max(axis=0))
+        if candidates is None:
+            candidates = np.flatnonzero(reflex)
+        else:
+            candidates = np.array(candidates, dtype=np.int64)
+        candidates = candidates[(candidates != a) & (candidates != c)]
+        if not len(candidates):
+            return True
+        return not _in_triangle(
+            ring_points[candidates], ring_points[a], ring_points[b], ring_points[c]).any()
+
+    triangles = []
+    remaining = n
+    i = 0
+    misses = 0
+    while remaining > 3:
+        if is_ear(i) or misses > remaining:
+            # if nothing is an ear the ring is degenerate, so clip anyway
+            a, c = prev[i], nxt[i]
+            triangles.append((a, i, c))
+            nxt[a], prev[c] = c, a
+            remaining -= 1
+            misses = 0
+            if reflex[i]:
+                reflex[i] = False
+                grid.remove(i)
+            for j in (a, c):
+                j_turn = turn(j)
+                convex[j] = j_turn > 0
+                if reflex[j] and j_turn >= 0:
+                    reflex[j] = False
+                    grid.remove(j)
+            # skipping ahead rather than going back to a stops the ears
+            # fanning out from one point into long slivers
+            i = nxt[c]
+        else:
+            i = nxt[i]
+            misses += 1
+    triangles.append((prev[i], i, nxt[i]))
+    return triangles
+
+
+def triangulate(cos, holes=()):
+    """Triangulates a planar polygon with holes.
+
+    Keyword arguments:
+
+    cos -- (n, 3) array of the outline's points in order
+    holes -- list of (m, 3) arrays of points of holes inside the outline
+
+    returns -- (t, 3) array of indices into the outline's points followed
+    by each hole's points, wound the same way as the outline
+    """
+    outline = np.asarray(cos, dtype=float).reshape(-1, 3)
+    holes = [np.asarray(hole, dtype=float).reshape(-1, 3) for hole in holes]
+    if len(outline) < 3:
+        return np.empty((0, 3), dtype=np.int64)
+
+    normal = newell_normal(outline)
+    points = project(np.concatenate([outline] + holes), normal)
+
+    ring = list(range(len(outline)))
+    hole_rings = []
+    start = len(outline)
+    for hole in holes:
+        hole_ring = list(range(start, start + len(hole)))
+        start += len(hole)
+        if len(hole) < 3:
+            continue
+        # holes have to wind the opposite way to the outline
+        if _signed_area(points[hole_ring]) > 0:
+            hole_ring.reverse()
+        hole_rings.append(hole_ring)
+
+    # join holes from right to left so bridges don't cross each other
+    hole_rings.sort(key=lambda hole: points[hole, 0].max(), reverse=True)
+    for hole in hole_rings:
+        ring = _bridge(points, ring, hole)
+
+    triangles = _clip(points, ring)
+    ring = np.array(ring, dtype=np.int64)
+    triangles = ring[np.array(triangles, dtype=np.int64)]
+    # both ends of a bridge are in ring twice, so drop the slivers that
+    # use the same point twice
+    keep = (
+        (triangles[:, 0] != triangles[:, 1])
+        & (triangles[:, 1] != triangles[:, 2])
+        & (triangles[:, 2] != triangles[:, 0]))
+    return triangles[keep]
@@ -72,6 +72,9 @@ class OBJECT_OT_add_turtle(Operator, AddObjectHelper):
         # index of active vert when beginpath is called
         new_world['beginpath_active_vert'] = 0
 
+        # index of the vert the turtle is sitting on
+        new_world['turtle_head_vert'] = 0
+
         return {'FINISHED'}
 
     # TODO: find suitable icon or make one
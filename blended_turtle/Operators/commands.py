@@ -1,11 +1,34 @@
-from math import degrees, radians
 import bpy
-from bpy.props import StringProperty, FloatProperty, FloatVectorProperty, IntProperty
+from bpy.props import StringProperty, FloatProperty, FloatVectorProperty, IntProperty, BoolProperty
 import bmesh
-from mathutils import Vector
-from .. Utils.utils import select_by_loc
-
-
+from .. Utils.canvas import (
+    engine_from_context, apply_engine, set_head_vert, turn, read_paths, write_paths, write_filled)
+from .. Utils.session import get_session
+from .. Core.buffers import GeometryBuffer
+from .. Core.stats import count, timed_execute
+
+
+def select_path(session, first_vert, stop=None):
+    """Selects the verts from first_vert up to stop, or the last vert of the
+    canvas, and the edges and faces between them. Only the path's verts are
+    looked at"""
+    bm = session.bm
+    bm.verts.ensure_lookup_table()
+    verts = bm.verts[first_vert:stop]
+    path = set(verts)
+    for vert in verts:
+        vert.select = True
+        for edge in vert.link_edges:
+            if edge.other_vert(vert) in path:
+                edge.select = True
+        for face in vert.link_faces:
+            if all(v in path for v in face.verts):
+                face.select = True
+    session.dirty = True
+    session.flush()
+
+
+@timed_execute
 class TURTLE_OT_clear_screen(bpy.types.Operator):
     bl_idname = "turtle.cs"
     bl_label = "Clear Turtle World"
@@ -23,6 +46,7 @@ class TURTLE_OT_clear_screen(bpy.types.Operator):
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_home(bpy.types.Operator):
     bl_idname = "turtle.home"
     bl_label = "Home Turtle"
@@ -39,6 +63,7 @@ class TURTLE_OT_home(bpy.types.Operator):
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_clean(bpy.types.Operator):
     bl_idname = "turtle.clean"
     bl_label = "Clean"
@@ -49,13 +74,42 @@ class TURTLE_OT_clean(bpy.types.Operator):
         return context.object.mode == 'EDIT'
 
     def execute(self, context):
+        count('bpy.ops.mesh.select_all')
         bpy.ops.mesh.select_all(action='SELECT')
+        count('bpy.ops.mesh.delete')
         bpy.ops.mesh.delete()
-        context.object['beginpath_active_vert'] = 0
+        write_paths(context.object, None)
+        write_filled(context.object, ())
+        set_head_vert(context.object, None)
+
+        return {'FINISHED'}
+
+
+@timed_execute
+class TURTLE_OT_merge(bpy.types.Operator):
+    bl_idname = "turtle.merge"
+    bl_label = "Merge Doubles"
+    bl_description = "Merges verts across the whole mesh. d = merge distance in blender units"
+
+    d: FloatProperty(default=0.0001, min=0)
+
+    @classmethod
+    def poll(cls, context):
+        return context.object.mode == 'EDIT'
+
+    def execute(self, context):
+        count('bpy.ops.mesh.select_all')
+        bpy.ops.mesh.select_all(action='SELECT')
+        count('bpy.ops.mesh.remove_doubles')
+        bpy.ops.mesh.remove_doubles(threshold=self.d)
+        count('bpy.ops.mesh.select_all')
+        bpy.ops.mesh.select_all(action='DESELECT')
+        get_session(context.object).touch()
 
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_pen_down(bpy.types.Operator):
     bl_idname = "turtle.pd"
     bl_label = "Pend Down"
@@ -66,15 +120,20 @@ class TURTLE_OT_pen_down(bpy.types.Operator):
         return context.object.mode == 'EDIT'
 
     def execute(self, context):
-        bpy.ops.mesh.primitive_vert_add()
-        bpy.context.object['pendownp'] = True
+        # add a vert under the turtle for it to draw from
+        session = get_session(context.object)
+        buffer = GeometryBuffer(session.vert_count())
+        head = buffer.add_vert(context.scene.cursor.location)
+        session.commit(buffer, head)
+        session.flush()
+        set_head_vert(context.object, head)
 
-        bpy.ops.object.editmode_toggle()
-        bpy.ops.object.editmode_toggle()
+        bpy.context.object['pendownp'] = True
 
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_pen_up(bpy.types.Operator):
     bl_idname = "turtle.pu"
     bl_label = "Pen Up"
@@ -86,14 +145,14 @@ class TURTLE_OT_pen_up(bpy.types.Operator):
 
     def execute(self, context):
         bpy.context.object['pendownp'] = False
+        set_head_vert(context.object, None)
+        count('bpy.ops.mesh.select_all')
         bpy.ops.mesh.select_all(action='DESELECT')
 
-        bpy.ops.object.editmode_toggle()
-        bpy.ops.object.editmode_toggle()
-
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_forward(bpy.types.Operator):
     bl_idname = "turtle.fd"
     bl_label = "Move Forward"
@@ -106,40 +165,14 @@ class TURTLE_OT_forward(bpy.types.Operator):
         return context.object.mode == 'EDIT'
 
     def execute(self, context):
-        # make sure selection is properly updated
-        bpy.ops.object.editmode_toggle()
-        bpy.ops.object.editmode_toggle()
-
-        """ check our object has a "pendownp" property that
-         describes the pen state and if not add one"""
-        if bpy.context.object.get('pendownp') is None:
-            # pen state
-            bpy.context.object['pendownp'] = True
-
-        # check if pen is down
-        if context.object['pendownp']:
-            if len(bpy.context.object.data.vertices) == 0:
-                bpy.ops.mesh.primitive_vert_add()
-
-            # ensure that we only select the vert that the cursor is on
-            turtle_location = bpy.context.scene.cursor.location
-            select_by_loc(lbound=turtle_location, ubound=turtle_location)
-
-            # extrude vert along cursor Y
-            bpy.ops.mesh.extrude_vertices_move(
-                TRANSFORM_OT_translate={
-                    "value": (0, self.d, 0),
-                    "orient_type": 'CURSOR'})
-
-        # move turtle forward
-        bpy.ops.transform.translate(
-            value=(0, self.d, 0),
-            orient_type='CURSOR',
-            cursor_transform=True)
+        engine = engine_from_context(context)
+        engine.fd(self.d)
+        apply_engine(context, engine)
 
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_backward(bpy.types.Operator):
     bl_idname = "turtle.bk"
     bl_label = "Move Backward"
@@ -152,30 +185,14 @@ class TURTLE_OT_backward(bpy.types.Operator):
         return context.object.mode == 'EDIT'
 
     def execute(self, context):
-        bpy.ops.object.editmode_toggle()
-        bpy.ops.object.editmode_toggle()
-
-        if bpy.context.object.get('pendownp') is None:
-            # pen state
-            bpy.context.object['pendownp'] = True
-
-        if context.object['pendownp']:
-            if len(bpy.context.object.data.vertices) == 0:
-                bpy.ops.mesh.primitive_vert_add()
-
-            bpy.ops.mesh.extrude_vertices_move(
-                TRANSFORM_OT_translate={
-                    "value": (0, -self.d, 0),
-                    "orient_type": 'CURSOR'})
-
-        bpy.ops.transform.translate(
-            value=(0, -self.d, 0),
-            orient_type='CURSOR',
-            cursor_transform=True)
+        engine = engine_from_context(context)
+        engine.bk(self.d)
+        apply_engine(context, engine)
 
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_up(bpy.types.Operator):
     bl_idname = "turtle.up"
     bl_label = "Move Up"
@@ -188,30 +205,14 @@ class TURTLE_OT_up(bpy.types.Operator):
         return context.object.mode == 'EDIT'
 
     def execute(self, context):
-        bpy.ops.object.editmode_toggle()
-        bpy.ops.object.editmode_toggle()
-
-        if bpy.context.object.get('pendownp') is None:
-            # pen state
-            bpy.context.object['pendownp'] = True
-
-        if context.object['pendownp']:
-            if len(bpy.context.object.data.vertices) == 0:
-                bpy.ops.mesh.primitive_vert_add()
-
-            bpy.ops.mesh.extrude_vertices_move(
-                TRANSFORM_OT_translate={
-                    "value": (0, 0, self.d),
-                    "orient_type": 'CURSOR'})
-
-        bpy.ops.transform.translate(
-            value=(0, 0, self.d),
-            orient_type='CURSOR',
-            cursor_transform=True)
+        engine = engine_from_context(context)
+        engine.up(self.d)
+        apply_engine(context, engine)
 
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_down(bpy.types.Operator):
     bl_idname = "turtle.dn"
     bl_label = "Move Down"
@@ -224,31 +225,14 @@ class TURTLE_OT_down(bpy.types.Operator):
         return context.object.mode == 'EDIT'
 
     def execute(self, context):
-        bpy.ops.object.editmode_toggle()
-        bpy.ops.object.editmode_toggle()
-
-        if bpy.context.object.get('pendownp') is None:
-            # pen state
-            bpy.context.object['pendownp'] = True
-
-        if context.object['pendownp']:
-
-            if len(bpy.context.object.data.vertices) == 0:
-                bpy.ops.mesh.primitive_vert_add()
-
-            bpy.ops.mesh.extrude_vertices_move(
-                TRANSFORM_OT_translate={
-                    "value": (0, 0, -self.d),
-                    "orient_type": 'CURSOR'})
-
-        bpy.ops.transform.translate(
-            value=(0, 0, -self.d),
-            orient_type='CURSOR',
-            cursor_transform=True)
+        engine = engine_from_context(context)
+        engine.dn(self.d)
+        apply_engine(context, engine)
 
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_left(bpy.types.Operator):
     bl_idname = "turtle.lf"
     bl_label = "Move Left"
@@ -261,29 +245,14 @@ class TURTLE_OT_left(bpy.types.Operator):
         return context.object.mode == 'EDIT'
 
     def execute(self, context):
-        bpy.ops.object.editmode_toggle()
-        bpy.ops.object.editmode_toggle()
+        engine = engine_from_context(context)
+        engine.lf(self.d)
+        apply_engine(context, engine)
 
-        if bpy.context.object.get('pendownp') is None:
-            # pen state
-            bpy.context.object['pendownp'] = True
-
-        if context.object['pendownp']:
-            if len(bpy.context.object.data.vertices) == 0:
-                bpy.ops.mesh.primitive_vert_add()
-
-            bpy.ops.mesh.extrude_vertices_move(
-                TRANSFORM_OT_translate={
-                    "value": (-self.d, 0, 0),
-                    "orient_type": 'CURSOR'})
-
-        bpy.ops.transform.translate(
-            value=(-self.d, 0, 0),
-            orient_type='CURSOR',
-            cursor_transform=True)
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_right(bpy.types.Operator):
     bl_idname = "turtle.ri"
     bl_label = "Move Right"
@@ -296,29 +265,14 @@ class TURTLE_OT_right(bpy.types.Operator):
         return context.object.mode == 'EDIT'
 
     def execute(self, context):
-        bpy.ops.object.editmode_toggle()
-        bpy.ops.object.editmode_toggle()
-
-        if bpy.context.object.get('pendownp') is None:
-            # pen state
-            bpy.context.object['pendownp'] = True
+        engine = engine_from_context(context)
+        engine.ri(self.d)
+        apply_engine(context, engine)
 
-        if context.object['pendownp']:
-            if len(bpy.context.object.data.vertices) == 0:
-                bpy.ops.mesh.primitive_vert_add()
-
-            bpy.ops.mesh.extrude_vertices_move(
-                TRANSFORM_OT_translate={
-                    "value": (self.d, 0, 0),
-                    "orient_type": 'CURSOR'})
-
-        bpy.ops.transform.translate(
-            value=(self.d, 0, 0),
-            orient_type='CURSOR',
-            cursor_transform=True)
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_left_turn(bpy.types.Operator):
     bl_idname = "turtle.lt"
     bl_label = "Rotate left"
@@ -331,15 +285,12 @@ class TURTLE_OT_left_turn(bpy.types.Operator):
         return context.object.mode == 'EDIT'
 
     def execute(self, context):
+        turn(context, 'lt', self.d)
 
-        turtle = bpy.context.scene.cursor
-        turtle.rotation_euler = [
-            turtle.rotation_euler[0],
-            turtle.rotation_euler[1],
-            turtle.rotation_euler[2] + radians(self.d)]
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_right_turn(bpy.types.Operator):
     bl_idname = "turtle.rt"
     bl_label = "Rotate reight"
@@ -352,14 +303,12 @@ class TURTLE_OT_right_turn(bpy.types.Operator):
         return context.object.mode == 'EDIT'
 
     def execute(self, context):
-        turtle = bpy.context.scene.cursor
-        turtle.rotation_euler = [
-            turtle.rotation_euler[0],
-            turtle.rotation_euler[1],
-            turtle.rotation_euler[2] - radians(self.d)]
+        turn(context, 'rt', self.d)
+
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_look_up(bpy.types.Operator):
     bl_idname = "turtle.lu"
     bl_label = "Turtle look up"
@@ -372,14 +321,12 @@ class TURTLE_OT_look_up(bpy.types.Operator):
         return context.object.mode == 'EDIT'
 
     def execute(self, context):
-        turtle = bpy.context.scene.cursor
-        turtle.rotation_euler = [
-            turtle.rotation_euler[0] + radians(self.d),
-            turtle.rotation_euler[1],
-            turtle.rotation_euler[2]]
+        turn(context, 'lu', self.d)
+
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_look_down(bpy.types.Operator):
     bl_idname = "turtle.ld"
     bl_label = "Turtle look down"
@@ -392,14 +339,12 @@ class TURTLE_OT_look_down(bpy.types.Operator):
         return context.object.mode == 'EDIT'
 
     def execute(self, context):
-        turtle = bpy.context.scene.cursor
-        turtle.rotation_euler = [
-            turtle.rotation_euler[0] - radians(self.d),
-            turtle.rotation_euler[1],
-            turtle.rotation_euler[2]]
+        turn(context, 'ld', self.d)
+
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_roll_left(bpy.types.Operator):
     bl_idname = "turtle.rl"
     bl_label = "Turtle roll left"
@@ -412,14 +357,12 @@ class TURTLE_OT_roll_left(bpy.types.Operator):
         return context.object.mode == 'EDIT'
 
     def execute(self, context):
-        turtle = bpy.context.scene.cursor
-        turtle.rotation_euler = [
-            turtle.rotation_euler[0],
-            turtle.rotation_euler[1] - radians(self.d),
-            turtle.rotation_euler[2]]
+        turn(context, 'rl', self.d)
+
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_roll_right(bpy.types.Operator):
     bl_idname = "turtle.rr"
     bl_label = "Turtle roll right"
@@ -432,14 +375,12 @@ class TURTLE_OT_roll_right(bpy.types.Operator):
         return context.object.mode == 'EDIT'
 
     def execute(self, context):
-        turtle = bpy.context.scene.cursor
-        turtle.rotation_euler = [
-            turtle.rotation_euler[0],
-            turtle.rotation_euler[1] + radians(self.d),
-            turtle.rotation_euler[2]]
+        turn(context, 'rr', self.d)
+
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_set_pos(bpy.types.Operator):
     bl_idname = "turtle.setp"
     bl_label = "Set turtle posiiton"
@@ -452,27 +393,14 @@ class TURTLE_OT_set_pos(bpy.types.Operator):
         return context.object.mode == 'EDIT'
 
     def execute(self, context):
+        engine = engine_from_context(context)
+        engine.setp(self.v)
+        apply_engine(context, engine)
 
-        if bpy.context.object.get('pendownp') is None:
-            # pen state
-            bpy.context.object['pendownp'] = True
-
-        bpy.ops.object.editmode_toggle()
-        bpy.ops.object.editmode_toggle()
-
-        if bpy.context.object['pendownp']:
-            if len(bpy.context.object.data.vertices) == 0:
-                bpy.ops.mesh.primitive_vert_add()
-
-            bpy.ops.mesh.extrude_vertices_move(
-                TRANSFORM_OT_translate={
-                    "value": (self.v),
-                    "orient_type": 'CURSOR'})
-
-        bpy.context.scene.cursor.location = (self.v)
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_set_rotation(bpy.types.Operator):
     bl_idname = "turtle.setrot"
     bl_label = "Set turtle rotation"
@@ -485,15 +413,12 @@ class TURTLE_OT_set_rotation(bpy.types.Operator):
         return context.object.mode == 'EDIT'
 
     def execute(self, context):
-        turtle = bpy.context.scene.cursor
+        turn(context, 'setrot', self.v)
 
-        turtle.rotation_euler = [
-            radians(self.v[0]),
-            radians(self.v[1]),
-            radians(self.v[2])]
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_set_heading(bpy.types.Operator):
     bl_idname = "turtle.seth"
     bl_label = "Set turtle heading"
@@ -506,15 +431,12 @@ class TURTLE_OT_set_heading(bpy.types.Operator):
         return context.object.mode == 'EDIT'
 
     def execute(self, context):
-        turtle = bpy.context.scene.cursor
+        turn(context, 'seth', self.d)
 
-        turtle.rotation_euler = [
-            turtle.rotation_euler[0],
-            turtle.rotation_euler[1],
-            radians(self.d)]
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_set_pitch(bpy.types.Operator):
     bl_idname = "turtle.setpitch"
     bl_label = "Set turtle pitch"
@@ -527,15 +449,12 @@ class TURTLE_OT_set_pitch(bpy.types.Operator):
         return context.object.mode == 'EDIT'
 
     def execute(self, context):
-        turtle = bpy.context.scene.cursor
+        turn(context, 'setpitch', self.d)
 
-        turtle.rotation_euler = [
-            radians(self.d),
-            turtle.rotation_euler[1],
-            turtle.rotation_euler[2]]
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_set_roll(bpy.types.Operator):
     bl_idname = "turtle.setr"
     bl_label = "Set turtle roll"
@@ -548,215 +467,85 @@ class TURTLE_OT_set_roll(bpy.types.Operator):
         return context.object.mode == 'EDIT'
 
     def execute(self, context):
-        turtle = bpy.context.scene.cursor
+        turn(context, 'setr', self.d)
 
-        turtle.rotation_euler = [
-            turtle.rotation_euler[1],
-            radians(self.d),
-            turtle.rotation_euler[2]]
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_quadratic_curve(bpy.types.Operator):
     bl_idname = "turtle.qc"
     bl_label = "Quadratic curve"
     bl_description = "moves the turtle on a path described by a quadratic Bezier curve. \
- Keyword Arguments: cp = coordinates of control point, ep = end point"
+ Keyword Arguments: cp = coordinates of control point, ep = end point, \
+tol = maximum distance between the curve and the edges drawn"
 
     cp: FloatVectorProperty()
     ep: FloatVectorProperty()
+    tol: FloatProperty(default=0.001, min=0.00001)
 
     @classmethod
     def poll(cls, context):
         return context.object.mode == 'EDIT'
 
     def execute(self, context):
-        turtle = bpy.context.scene.cursor
-
-        if bpy.context.object.get('pendownp') is None:
-            # pen state
-            bpy.context.object['pendownp'] = True
-
-        if bpy.context.object['pendownp']:
-            world = bpy.context.object
-            world_name = world.name
-            bpy.ops.curve.primitive_bezier_curve_add(
-                radius=1,
-                enter_editmode=True)
-
-            bpy.ops.curve.select_all(action='DESELECT')
-
-            # set location of first spline point and control point
-            bpy.context.active_object.data.splines[0].bezier_points[0].co = (0, 0, 0)
-            bpy.context.active_object.data.splines[0].bezier_points[0].handle_right = self.cp
-
-            # set location of second control point.
-            bpy.context.active_object.data.splines[0].bezier_points[1].co = self.ep
-            bpy.context.active_object.data.splines[0].bezier_points[1].handle_right = self.ep
-
-            # set turtle location
-            turtle.location = turtle.location + Vector(self.ep)
-
-            # set turtle rotation
-            direction_vec = Vector(self.ep) - Vector(self.cp)
-            rot_quat = direction_vec.to_track_quat('Y', 'Z')
-            turtle.rotation_mode = 'QUATERNION'
-            turtle.rotation_quaternion = rot_quat
-            turtle.rotation_mode = 'XYZ'
-
-            bpy.ops.object.editmode_toggle()
-
-            # convert curve to mesh and join to turtle_world object
-            bpy.ops.object.convert(target='MESH')
-            bpy.data.objects[world.name].select_set(True)
-            bpy.ops.object.join()
-            bpy.context.object.name = world_name
-
-            # merge vertices
-            bpy.ops.object.editmode_toggle()
-            bpy.ops.mesh.select_all(action='SELECT')
-            bpy.ops.mesh.remove_doubles()
-
-            bpy.ops.mesh.select_all(action='DESELECT')
-
-            # select last vert of converted curve
-            lbound = turtle.location
-            ubound = turtle.location
-            select_by_loc(
-                lbound,
-                ubound,
-                select_mode='VERT',
-                coords='GLOBAL',
-                buffer=0.001)
-        else:
-            # set turtle location without drawing anything
-            turtle.location = self.ep
-
-            # set turtle rotation
-            direction_vec = Vector(self.ep) - Vector(self.cp)
-            rot_quat = direction_vec.to_track_quat('Y', 'Z')
-            turtle.rotation_mode = 'QUATERNION'
-            turtle.rotation_quaternion = rot_quat
-            turtle.rotation_mode = 'XYZ'
+        engine = engine_from_context(context)
+        engine.curve_tolerance = self.tol
+        engine.qc(self.cp, self.ep)
+        apply_engine(context, engine)
 
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_cubic_curve(bpy.types.Operator):
     bl_idname = "turtle.cc"
     bl_label = "Cubic curve"
     bl_description = "moves the turtle on a path described by a cubic Bezier curve.\
-Keyword Arguments: cp1 / cp2 = coordinates of control points, ep = end point"
+Keyword Arguments: cp1 / cp2 = coordinates of control points, ep = end point, \
+tol = maximum distance between the curve and the edges drawn"
 
     cp1: FloatVectorProperty()
     cp2: FloatVectorProperty()
     ep: FloatVectorProperty()
+    tol: FloatProperty(default=0.001, min=0.00001)
 
     @classmethod
     def poll(cls, context):
         return context.object.mode == 'EDIT'
 
     def execute(self, context):
-
-        turtle = bpy.context.scene.cursor
-
-        if bpy.context.object.get('pendownp') is None:
-            # pen state
-            bpy.context.object['pendownp'] = True
-
-        if bpy.context.object['pendownp']:
-            canvas = bpy.context.object
-            canvas_name = canvas.name
-            bpy.ops.curve.primitive_bezier_curve_add(
-                radius=1,
-                enter_editmode=True)
-            bpy.ops.curve.select_all(action='DESELECT')
-            p0 = bpy.context.active_object.data.splines[0].bezier_points[0]
-            p1 = bpy.context.active_object.data.splines[0].bezier_points[1]
-
-            # set location of first spline point and control point
-            p0.co = (0, 0, 0)
-            bpy.ops.curve.select_all(action='DESELECT')
-            p0.select_right_handle = True
-            p0.handle_right = self.cp1
-
-            # set location of second spline point and control point
-            p1.co = self.ep
-            bpy.ops.curve.select_all(action='DESELECT')
-            p1.select_left_handle = True
-            p1.handle_left = self.cp2
-
-            # set turtle location
-            turtle.location = turtle.location + Vector(self.ep)
-
-            # set turtle rotation
-            direction_vec = Vector(self.ep) - Vector(self.cp2)
-            rot_quat = direction_vec.to_track_quat('Y', 'Z')
-            turtle.rotation_mode = 'QUATERNION'
-            turtle.rotation_quaternion = rot_quat
-            turtle.rotation_mode = 'XYZ'
-
-            bpy.ops.object.editmode_toggle()
-
-            # convert curve to mesh and join to canvas
-            bpy.ops.object.convert(target='MESH')
-            bpy.data.objects[canvas.name].select_set(True)
-            bpy.ops.object.join()
-            bpy.context.object.name = canvas_name
-
-            # merge vertices
-            bpy.ops.object.editmode_toggle()
-            bpy.ops.mesh.select_all(action='SELECT')
-            bpy.ops.mesh.remove_doubles()
-
-            bpy.ops.mesh.select_all(action='DESELECT')
-
-            # select last vert of converted curve
-            lbound = turtle.location
-            ubound = turtle.location
-            select_by_loc(
-                lbound,
-                ubound,
-                select_mode='VERT',
-                coords='GLOBAL',
-                buffer=0.001)
-        else:
-            # set turtle location without drawing anything
-            turtle.location = self.ep
-
-            # set turtle rotation
-            direction_vec = Vector(self.ep) - Vector(self.cp2)
-            rot_quat = direction_vec.to_track_quat('Y', 'Z')
-            turtle.rotation_mode = 'QUATERNION'
-            turtle.rotation_quaternion = rot_quat
-            turtle.rotation_mode = 'XYZ'
+        engine = engine_from_context(context)
+        engine.curve_tolerance = self.tol
+        engine.cc(self.cp1, self.cp2, self.ep)
+        apply_engine(context, engine)
 
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_begin_path(bpy.types.Operator):
     bl_idname = "turtle.bp"
     bl_label = "Begin path"
-    bl_description = "Sets begin_path_vert to index of last vert that has been drawn"
+    bl_description = "Begins a path at the vert the turtle is on. A path begun inside another one is closed with sp to make a hole in it or fp to fill it"
 
     @classmethod
     def poll(cls, context):
         return context.object.mode == 'EDIT'
 
     def execute(self, context):
-        bpy.ops.object.editmode_toggle()
-        bpy.ops.object.editmode_toggle()
-
-        verts = bpy.context.object.data.vertices
-        bpy.context.object['beginpath_active_vert'] = verts.values()[-1].index
+        engine = engine_from_context(context)
+        engine.bp()
+        apply_engine(context, engine)
 
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_stroke_path(bpy.types.Operator):
     bl_idname = "turtle.sp"
     bl_label = "Stroke path"
-    bl_description = "draws an edge between selected vert and vert indexed in beginpath"
+    bl_description = "draws an edge between selected vert and vert indexed in beginpath. An inner path becomes a hole in the path around it"
 
     @classmethod
     def poll(cls, context):
@@ -766,31 +555,21 @@ class TURTLE_OT_stroke_path(bpy.types.Operator):
         if bpy.context.object.get('beginpath_active_vert') is None:
             return {'PASS_THROUGH'}
 
-        bpy.ops.object.editmode_toggle()
-
-        verts = bpy.context.object.data.vertices
-
-        bpy.context.object.data.vertices[-1].select = True
-        bpy.context.object.data.vertices[bpy.context.object['beginpath_active_vert']].select = True
-
-        bpy.ops.object.editmode_toggle()
-
-        bpy.ops.mesh.edge_face_add()
-        bpy.ops.mesh.select_all(action='DESELECT')
-
-        bpy.ops.object.editmode_toggle()
-
-        bpy.context.object.data.vertices[-1].select = True
-
-        bpy.ops.object.editmode_toggle()
+        engine = engine_from_context(context)
+        engine.sp()
+        apply_engine(context, engine)
 
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_fill_path(bpy.types.Operator):
     bl_idname = "turtle.fp"
     bl_label = "Fill path"
-    bl_description = "draws an edge between selected vert and vert indexed in beginpath and then creates a face between all verts created since last beginpath statement"
+    bl_description = "draws an edge between selected vert and vert indexed in beginpath and then creates a face between all verts created since last beginpath statement, leaving out any holes. \
+Keyword Arguments: tri = fill with triangles rather than one ngon, for large non-convex outlines"
+
+    tri: BoolProperty(default=False)
 
     @classmethod
     def poll(cls, context):
@@ -801,31 +580,17 @@ class TURTLE_OT_fill_path(bpy.types.Operator):
         if bpy.context.object.get('beginpath_active_vert') is None:
             return {'PASS_THROUGH'}
 
-        bpy.ops.object.editmode_toggle()
-
-        verts = bpy.context.object.data.vertices
-
-        i = bpy.context.object['beginpath_active_vert']
-
-        while i <= verts.values()[-1].index:
-            bpy.context.object.data.vertices[i].select = True
-            i += 1
-
-        bpy.ops.object.editmode_toggle()
-
-        bpy.ops.mesh.edge_face_add()
-        bpy.ops.mesh.edge_face_add()
-
-        bpy.ops.mesh.select_all(action='DESELECT')
-
-        bpy.ops.object.editmode_toggle()
-        bpy.ops.object.editmode_toggle()
-
-        bpy.context.object.data.vertices[-1].select = True
+        # build the face straight from the path's vert indices rather than
+        # selecting the path and running edge_face_add
+        engine = engine_from_context(context)
+        engine.fill_triangles = self.tri
+        engine.fp()
+        apply_engine(context, engine)
 
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_select_path(bpy.types.Operator):
     bl_idname = "turtle.selp"
     bl_label = "Select Path"
@@ -836,20 +601,17 @@ class TURTLE_OT_select_path(bpy.types.Operator):
         return context.object.mode == 'EDIT'
 
     def execute(self, context):
-        bpy.ops.object.editmode_toggle()
-
-        verts = bpy.context.object.data.vertices
-
-        i = bpy.context.object['beginpath_active_vert']
-        while i <= verts.values()[-1].index:
-            bpy.context.object.data.vertices[i].select = True
-            i += 1
+        path_start, path_stack, _, path_closed, _, path_stop = read_paths(context.object)
+        if path_start is None:
+            return {'PASS_THROUGH'}
 
-        bpy.ops.object.editmode_toggle()
+        session = get_session(context.object)
+        select_path(session, path_start, path_stop if path_closed and not path_stack else None)
 
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_select_all(bpy.types.Operator):
     bl_idname = "turtle.sa"
     bl_label = "Select All"
@@ -860,15 +622,13 @@ class TURTLE_OT_select_all(bpy.types.Operator):
         return context.object.mode == 'EDIT'
 
     def execute(self, context):
-
-        bpy.ops.object.editmode_toggle()
-        bpy.ops.object.editmode_toggle()
-
+        count('bpy.ops.mesh.select_all')
         bpy.ops.mesh.select_all(action='SELECT')
 
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_deselect_all(bpy.types.Operator):
     bl_idname = "turtle.da"
     bl_label = "Select All"
@@ -879,15 +639,13 @@ class TURTLE_OT_deselect_all(bpy.types.Operator):
         return context.object.mode == 'EDIT'
 
     def execute(self, context):
-
-        bpy.ops.object.editmode_toggle()
-        bpy.ops.object.editmode_toggle()
-
+        count('bpy.ops.mesh.select_all')
         bpy.ops.mesh.select_all(action='DESELECT')
 
         return {'FINISHED'}
 
 
+@timed_execute
 class TURTLE_OT_extrude(bpy.types.Operator):
     bl_idname = "turtle.ex"
     bl_label = "Extrude Selected"
@@ -900,6 +658,55 @@ class TURTLE_OT_extrude(bpy.types.Operator):
         return context.object.mode == 'EDIT'
 
     def execute(self, context):
+        count('bpy.ops.mesh.extrude_region_move')
         bpy.ops.mesh.extrude_region_move(
             TRANSFORM_OT_translate={"value": (0, 0, self.d),"orient_type": 'NORMAL'})
         return {'FINISHED'}
+
+
+@timed_execute
+class TURTLE_OT_extrude_path(bpy.types.Operator):
+    bl_idname = "turtle.ep"
+    bl_label = "Extrude Path"
+    bl_description = "Extrudes the path into a prism with sides and caps, leaving out any holes. \
+Keyword Arguments: d = distance along the path's normal, taper = how much the top shrinks, 0 for straight sides and 1 for a point"
+
+    d: FloatProperty(default=1)
+    taper: FloatProperty(default=0, min=0, max=1)
+
+    @classmethod
+    def poll(cls, context):
+        return context.object.mode == 'EDIT'
+
+    def execute(self, context):
+        canvas = context.object
+        if canvas.get('beginpath_active_vert') is None and not canvas.get('filled_faces'):
+            return {'PASS_THROUGH'}
+
+        engine = engine_from_context(context)
+        engine.ep(self.d, self.taper)
+        apply_engine(context, engine)
+
+        return {'FINISHED'}
+
+
+@timed_execute
+class TURTLE_OT_tube(bpy.types.Operator):
+    bl_idname = "turtle.tube"
+    bl_label = "Tube Pen"
+    bl_description = "Sweeps a polygon along the turtle's path while the pen is down rather than drawing edges. \
+Keyword Arguments: r = radius, 0 goes back to drawing edges, sides = number of sides"
+
+    r: FloatProperty(default=0.1, min=0)
+    sides: IntProperty(default=8, min=3)
+
+    @classmethod
+    def poll(cls, context):
+        return context.object.mode == 'EDIT'
+
+    def execute(self, context):
+        engine = engine_from_context(context)
+        engine.tube(self.r, self.sides)
+        apply_engine(context, engine)
+
+        return {'FINISHED'}
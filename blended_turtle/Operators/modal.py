@@ -0,0 +1,186 @@
+import time
+import bpy
+from bpy.props import StringProperty, IntProperty, FloatProperty, EnumProperty, BoolProperty
+from .. Core.program import ProgramError
+from .. Core.stats import timed_execute
+from .. Utils.canvas import engine_from_context, apply_engine, program_steps, run_in_background, background_runs
+
+KINDS = (
+    ('PROGRAM', "Program", "Turtle commands e.g. 'fd 1 rt 90 fd 1'"),
+    ('LOGO', "Logo", "Logo source"),
+    ('LSYSTEM', "L-System", "source = axiom, see turtle.lsystem"))
+
+
+@timed_execute
+class TURTLE_OT_run_modal(bpy.types.Operator):
+    bl_idname = "turtle.run_modal"
+    bl_label = "Run Program in Background"
+    bl_description = "Runs a program a slice at a time so blender stays responsive. \
+Drawing so far is written to the canvas every flush seconds. Esc cancels, keeping what has been drawn. \
+kind = 'PROGRAM', 'LOGO' or 'LSYSTEM', source = program, Logo source or axiom, \
+rules / n / a / d = L-system rules, iterations, angle and step, budget = milliseconds of work per tick"
+
+    kind: EnumProperty(items=KINDS, default='PROGRAM')
+    source: StringProperty()
+    rules: StringProperty()
+    n: IntProperty(default=1, min=0)
+    a: FloatProperty(default=90)
+    d: FloatProperty(default=1)
+    budget: FloatProperty(default=30, min=1)
+    flush: FloatProperty(default=0.5, min=0)
+
+    @classmethod
+    def poll(cls, context):
+        return context.object is not None and context.object.mode == 'EDIT'
+
+    def invoke(self, context, event):
+        return self.execute(context)
+
+    def execute(self, context):
+        self.engine = engine_from_context(context)
+        try:
+            self.steps, self.total = program_steps(
+                self.engine, self.kind, self.source, self.rules, self.n, self.a, self.d)
+        except ProgramError as err:
+            self.report({'ERROR'}, str(err))
+            return {'CANCELLED'}
+
+        if context.window is None:
+            # no UI to keep responsive e.g. blender -b so just run it
+            try:
+                for step in self.steps:
+                    pass
+            except ProgramError as err:
+                self.report({'ERROR'}, str(err))
+            apply_engine(context, self.engine)
+            return {'FINISHED'}
+
+        self.done = 0
+        self.last_flush = time.perf_counter()
+        self.timer = None
+        wm = context.window_manager
+        self.timer = wm.event_timer_add(0.01, window=context.window)
+        wm.modal_handler_add(self)
+        if self.total:
+            wm.progress_begin(0, self.total)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        try:
+            return self.tick(context, event)
+        except Exception as err:
+            # e.g. the canvas was edited between ticks and can't be
+            # written to. Don't leave the timer and progress bar behind
+            self.cleanup(context)
+            self.report({'ERROR'}, str(err))
+            return {'CANCELLED'}
+
+    def tick(self, context, event):
+        if event.type == 'ESC':
+            self.finish(context)
+            self.report({'WARNING'}, "Cancelled after {} commands".format(self.done))
+            return {'CANCELLED'}
+
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        if context.object is None or context.object.mode != 'EDIT':
+            # someone has left edit mode, so stop and keep what we've drawn
+            self.finish(context)
+            return {'CANCELLED'}
+
+        # run commands until we have used up this tick's budget
+        finished = False
+        deadline = time.perf_counter() + self.budget / 1000
+        try:
+            while time.perf_counter() < deadline:
+                for i in range(64):
+                    next(self.steps)
+                self.done += 64
+        except StopIteration:
+            finished = True
+            self.done += i
+        except ProgramError as err:
+            self.finish(context)
+            self.report({'ERROR'}, str(err))
+            return {'CANCELLED'}
+
+        if finished:
+            self.finish(context)
+            return {'FINISHED'}
+
+        if time.perf_counter() - self.last_flush >= self.flush:
+            apply_engine(context, self.engine, False)
+            self.last_flush = time.perf_counter()
+        self.show_progress(context)
+        return {'RUNNING_MODAL'}
+
+    def show_progress(self, context):
+        if self.total:
+            context.window_manager.progress_update(min(self.done, self.total))
+            text = "Turtle: {} / {} commands. Esc to cancel".format(self.done, self.total)
+        else:
+            text = "Turtle: {} commands. Esc to cancel".format(self.done)
+        context.workspace.status_text_set(text)
+
+    def finish(self, context):
+        """Writes whatever has been drawn to the canvas and cleans up"""
+        try:
+            if context.object is not None and context.object.mode == 'EDIT':
+                apply_engine(context, self.engine)
+        finally:
+            self.cleanup(context)
+
+    def cleanup(self, context):
+        """Removes the timer, progress bar and status text"""
+        if self.timer is None:
+            return
+        wm = context.window_manager
+        wm.event_timer_remove(self.timer)
+        self.timer = None
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+
+
+@timed_execute
+class TURTLE_OT_run_background(bpy.types.Operator):
+    bl_idname = "turtle.run_background"
+    bl_label = "Run Program on a Thread"
+    bl_description = "Works out a program on a worker thread while you carry on working and \
+writes it to the canvas when it is ready. Don't edit the canvas until it is done. \
+kind, source, rules, n, a, d = see turtle.run_modal, stream = write what has been drawn every half a second"
+
+    kind: EnumProperty(items=KINDS, default='PROGRAM')
+    source: StringProperty()
+    rules: StringProperty()
+    n: IntProperty(default=1, min=0)
+    a: FloatProperty(default=90)
+    d: FloatProperty(default=1)
+    stream: BoolProperty(default=True)
+
+    @classmethod
+    def poll(cls, context):
+        return context.object is not None and context.object.mode == 'EDIT'
+
+    def execute(self, context):
+        try:
+            run_in_background(
+                self.kind, self.source, self.rules, self.n, self.a, self.d, self.stream, context)
+        except ProgramError as err:
+            self.report({'ERROR'}, str(err))
+            return {'CANCELLED'}
+
+        return {'FINISHED'}
+
+
+@timed_execute
+class TURTLE_OT_stop_background(bpy.types.Operator):
+    bl_idname = "turtle.stop_background"
+    bl_label = "Stop Background Runs"
+    bl_description = "Stops every program running on a worker thread, keeping what has been drawn"
+
+    def execute(self, context):
+        for run in background_runs:
+            run.stop()
+
+        return {'FINISHED'}
@@ -0,0 +1,86 @@
+import bpy
+from bpy.props import StringProperty, IntProperty, FloatProperty
+from .. Core.program import ProgramError
+from .. Core.stats import timed_execute
+from .. Utils.canvas import run_program, run_lsystem, run_logo
+
+
+@timed_execute
+class TURTLE_OT_run(bpy.types.Operator):
+    bl_idname = "turtle.run"
+    bl_label = "Run Program"
+    bl_description = "Runs a whole program of turtle commands in one go. \
+program = commands e.g. 'fd 1 rt 90 fd 1'"
+
+    program: StringProperty()
+
+    @classmethod
+    def poll(cls, context):
+        return context.object.mode == 'EDIT'
+
+    def execute(self, context):
+        try:
+            run_program(self.program, context)
+        except ProgramError as err:
+            self.report({'ERROR'}, str(err))
+            return {'CANCELLED'}
+
+        return {'FINISHED'}
+
+
+@timed_execute
+class TURTLE_OT_lsystem(bpy.types.Operator):
+    bl_idname = "turtle.lsystem"
+    bl_label = "L-System"
+    bl_description = "Draws an L-system. axiom = starting string, \
+rules = e.g. 'F=F+F-F-F+F', n = iterations, a = turn angle in degrees, d = step length"
+
+    axiom: StringProperty(default='F')
+    rules: StringProperty()
+    n: IntProperty(default=1, min=0)
+    a: FloatProperty(default=90)
+    d: FloatProperty(default=1)
+
+    @classmethod
+    def poll(cls, context):
+        return context.object.mode == 'EDIT'
+
+    def execute(self, context):
+        try:
+            run_lsystem(self.axiom, self.rules, self.n, self.a, self.d, context=context)
+        except ProgramError as err:
+            self.report({'ERROR'}, str(err))
+            return {'CANCELLED'}
+
+        return {'FINISHED'}
+
+
+@timed_execute
+class TURTLE_OT_logo(bpy.types.Operator):
+    bl_idname = "turtle.logo"
+    bl_label = "Run Logo"
+    bl_description = "Runs a Logo program. source = Logo source e.g. \
+'repeat 4 [fd 1 rt 90]', text = name of a text block to run instead"
+
+    source: StringProperty()
+    text: StringProperty()
+
+    @classmethod
+    def poll(cls, context):
+        return context.object.mode == 'EDIT'
+
+    def execute(self, context):
+        source = self.source
+        if self.text:
+            if self.text not in bpy.data.texts:
+                self.report({'ERROR'}, "No text block called {}".format(self.text))
+                return {'CANCELLED'}
+            source = bpy.data.texts[self.text].as_string()
+
+        try:
+            run_logo(source, context)
+        except ProgramError as err:
+            self.report({'ERROR'}, str(err))
+            return {'CANCELLED'}
+
+        return {'FINISHED'}
@@ -0,0 +1,42 @@
+import bpy
+from bpy.props import BoolProperty
+from .. Core import stats
+
+
+class TURTLE_OT_stats(bpy.types.Operator):
+    bl_idname = "turtle.stats"
+    bl_label = "Turtle Stats"
+    bl_description = "Prints the profiling counters to the console"
+
+    def execute(self, context):
+        lines = stats.report()
+        if not stats.enabled:
+            lines.insert(0, "Stats are disabled, enable them with turtle.stats_enable")
+        print('\n'.join(lines))
+        self.report({'INFO'}, '\n'.join(lines))
+
+        return {'FINISHED'}
+
+
+class TURTLE_OT_stats_reset(bpy.types.Operator):
+    bl_idname = "turtle.stats_reset"
+    bl_label = "Reset Turtle Stats"
+    bl_description = "Clears the profiling counters"
+
+    def execute(self, context):
+        stats.reset()
+
+        return {'FINISHED'}
+
+
+class TURTLE_OT_stats_enable(bpy.types.Operator):
+    bl_idname = "turtle.stats_enable"
+    bl_label = "Enable Turtle Stats"
+    bl_description = "Turns the profiling counters on or off. on = True to record"
+
+    on: BoolProperty(default=True)
+
+    def execute(self, context):
+        stats.enable(self.on)
+
+        return {'FINISHED'}
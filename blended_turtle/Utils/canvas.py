@@ -0,0 +1,416 @@
+import logging
+import multiprocessing
+import sys
+from contextlib import contextmanager
+
+import bpy
+import numpy as np
+
+from .. Core.background import BackgroundRun
+from .. Core.engine import TurtleEngine
+from .. Core.cache import MotifCache
+from .. Core.logo import compile_logo, run, steps as logo_steps
+from .. Core.lsystem import LSystem, default_mapping
+from .. Core.parallel import generate
+from .. Core.program import parse_program, execute, steps as command_steps
+from . session import get_session
+from . utils import find_vert_by_loc, vert_cos
+
+log = logging.getLogger(__name__)
+
+# motifs drawn by cached Logo procedures, kept between runs. Background
+# runs use it from their worker threads, which MotifCache allows
+motif_cache = MotifCache()
+
+# BackgroundRuns that are still being applied
+background_runs = []
+
+
+def set_head_vert(canvas, index):
+    """Stores the index of the vert the turtle is sitting on in the canvas"""
+    canvas['turtle_head_vert'] = -1 if index is None else index
+
+
+def write_paths(
+        canvas, path_start, path_stack=(), inner_paths=(), path_closed=False, path_filled=False,
+        path_stop=None):
+    """Stores the state of a TurtleEngine's paths, see
+    TurtleEngine.path_state, in the canvas as flat int arrays"""
+    if path_start is None:
+        for key in (
+                'beginpath_active_vert', 'beginpath_stack', 'beginpath_inner',
+                'beginpath_closed', 'beginpath_filled', 'beginpath_stop'):
+            if key in canvas:
+                del canvas[key]
+        return
+    canvas['beginpath_active_vert'] = path_start
+    canvas['beginpath_stack'] = [int(start) for start in path_stack]
+    canvas['beginpath_inner'] = [int(i) for inner in inner_paths for i in inner]
+    canvas['beginpath_closed'] = path_closed
+    canvas['beginpath_filled'] = path_filled
+    if path_stop is None:
+        if 'beginpath_stop' in canvas:
+            del canvas['beginpath_stop']
+    else:
+        canvas['beginpath_stop'] = path_stop
+
+
+def read_paths(canvas):
+    """Returns the path state stored in the canvas by write_paths"""
+    inner = list(canvas.get('beginpath_inner', ()))
+    return (
+        canvas.get('beginpath_active_vert'),
+        list(canvas.get('beginpath_stack', ())),
+        [tuple(inner[i:i + 4]) for i in range(0, len(inner), 4)],
+        # canvases from before paths nested only had beginpath_active_vert,
+        # which bp always replaced
+        bool(canvas.get('beginpath_closed', True)),
+        bool(canvas.get('beginpath_filled', False)),
+        canvas.get('beginpath_stop'))
+
+
+def write_filled(canvas, filled):
+    """Stores the paths an engine has filled since its last ep, see
+    TurtleEngine.filled_state, in the canvas as flat int arrays"""
+    if not filled:
+        for key in ('filled_faces', 'filled_ring_counts', 'filled_ring_sizes', 'filled_rings'):
+            if key in canvas:
+                del canvas[key]
+        return
+    rings = [ring for first, stop, path in filled for ring in path]
+    canvas['filled_faces'] = [i for first, stop, path in filled for i in (first, stop)]
+    canvas['filled_ring_counts'] = [len(path) for first, stop, path in filled]
+    canvas['filled_ring_sizes'] = [len(ring) for ring in rings]
+    canvas['filled_rings'] = [i for ring in rings for i in ring]
+
+
+def read_filled(canvas):
+    """Returns the filled paths stored in the canvas by write_filled"""
+    faces = list(canvas.get('filled_faces', ()))
+    ring_counts = list(canvas.get('filled_ring_counts', ()))
+    sizes = iter(canvas.get('filled_ring_sizes', ()))
+    indices = iter(canvas.get('filled_rings', ()))
+    filled = []
+    for i, ring_count in enumerate(ring_counts):
+        path = [[next(indices) for _ in range(next(sizes))] for _ in range(ring_count)]
+        filled.append((faces[2 * i], faces[2 * i + 1], path))
+    return filled
+
+
+def write_profile(canvas, profile):
+    """Stores the turtle's tube profile in the canvas"""
+    if profile is None:
+        if 'turtle_profile' in canvas:
+            del canvas['turtle_profile']
+    else:
+        canvas['turtle_profile'] = [float(x) for x in profile.ravel()]
+
+
+def read_profile(canvas):
+    """Returns the tube profile stored by write_profile or None"""
+    profile = canvas.get('turtle_profile')
+    if profile is None or len(profile) < 6:
+        return None
+    return np.array(list(profile), dtype=float).reshape(-1, 2)
+
+
+def head_vert(canvas, session, location, buffer=0.001):
+    """Returns the index of the vert the turtle is sitting on or None.
+
+    This is normally the vert stored by set_head_vert. If the turtle has
+    been moved away from it e.g. by moving the 3D cursor by hand we fall
+    back to searching for a vert at the turtle's location.
+    """
+    index = canvas.get('turtle_head_vert', -1)
+    if 0 <= index < session.vert_count():
+        co = canvas.matrix_world @ session.vert(index).co
+        if (co - location).length <= buffer:
+            return index
+
+    index = find_vert_by_loc(location, buffer=buffer)
+    set_head_vert(canvas, index)
+    return index
+
+
+def engine_from_context(context):
+    """Returns a TurtleEngine starting from the turtle (3D cursor) and canvas
+    (active object) in context.
+
+    With the pen up the canvas's mesh isn't looked at until the engine
+    draws something, so moving the turtle around is just maths.
+    """
+    canvas = context.object
+    turtle = context.scene.cursor
+
+    # check our object has a "pendownp" property and if not add one
+    if canvas.get('pendownp') is None:
+        canvas['pendownp'] = True
+
+    engine = TurtleEngine(
+        location=turtle.location,
+        rotation=turtle.rotation_euler,
+        pendown=canvas['pendownp'],
+        origin=canvas.location,
+        origin_rotation=canvas.rotation_euler)
+    engine.set_path_state(*read_paths(canvas))
+    engine.set_filled_state(read_filled(canvas))
+    engine.profile = read_profile(canvas)
+    engine.find_vert = lambda co, distance: find_vert_by_loc(co, buffer=distance)
+    engine.vert_cos = lambda indices: vert_cos(indices, canvas)
+    engine.flip_faces = lambda first, stop: get_session(canvas).flip_faces(first, stop)
+
+    if engine.pendown:
+        session = get_session(canvas)
+        engine.head = head_vert(canvas, session, turtle.location)
+        engine.buffer.vert_offset = session.vert_count()
+        engine.buffer.face_offset = session.face_count()
+    else:
+        engine.count_verts = lambda: get_session(canvas).vert_count()
+        engine.count_faces = lambda: get_session(canvas).face_count()
+
+    return engine
+
+
+def apply_engine(context, engine, finished=True):
+    """Writes the geometry an engine has drawn to the canvas and moves the
+    turtle to the engine's pose. The engine can carry on drawing and be
+    applied again. If it isn't finished any tube it is drawing is left
+    open to carry on with"""
+    canvas = context.object
+
+    if finished:
+        engine.end_stroke()
+    if engine.is_opened():
+        session = get_session(canvas)
+        session.commit(engine.detach_buffer(), engine.head)
+        session.flush()
+
+    turtle = context.scene.cursor
+    turtle.location = engine.location
+    turtle.rotation_euler = engine.rotation
+    canvas['pendownp'] = engine.pendown
+    set_head_vert(canvas, engine.head)
+    write_paths(canvas, *engine.path_state())
+    write_filled(canvas, engine.filled_state())
+    write_profile(canvas, engine.profile)
+
+
+def turn(context, command, *args):
+    """Runs an engine command that only rotates the turtle. The canvas
+    isn't touched at all"""
+    turtle = context.scene.cursor
+    engine = TurtleEngine(turtle.location, turtle.rotation_euler)
+    getattr(engine, command)(*args)
+    turtle.rotation_euler = engine.rotation
+
+
+@contextmanager
+def batch(context=None):
+    """Yields a TurtleEngine and writes everything it draws to the canvas in
+    one go when the block exits e.g.
+
+    with batch() as t:
+        for i in range(1000):
+            t.fd(1)
+            t.rt(1)
+    """
+    if context is None:
+        context = bpy.context
+    engine = engine_from_context(context)
+    yield engine
+    apply_engine(context, engine)
+
+
+def run_program(program, context=None):
+    """Validates and runs a whole turtle program against the canvas with a
+    single write to the mesh e.g.
+
+    run_program("fd 1 rt 90 fd 1 rt 90 fd 1")
+    run_program([('fd', 1), ('rt', 90), ('fd', 1)])
+
+    Keyword arguments:
+
+    program -- string or list of commands, see Core.program
+    context -- defaults to bpy.context
+    """
+    commands = parse_program(program)
+    with batch(context) as engine:
+        execute(commands, engine)
+
+
+def run_lsystem(axiom, rules, iterations, angle=90, step=1, mapping=None, context=None):
+    """Expands an L-system and draws it on the canvas. The expanded string
+    is streamed straight into the turtle so it never has to fit in memory.
+
+    Keyword arguments:
+
+    axiom -- starting string e.g. "F"
+    rules -- dict or string of production rules e.g. "F=F+F-F-F+F"
+    iterations -- number of times to apply the rules
+    angle -- turn angle in degrees used by the default mapping
+    step -- distance moved by F, G and f in the default mapping
+    mapping -- dict of symbol -> list of commands, see Core.lsystem
+    context -- defaults to bpy.context
+    """
+    if mapping is None:
+        mapping = default_mapping(angle, step)
+    commands = LSystem(axiom, rules, iterations).commands(mapping)
+    with batch(context) as engine:
+        execute(commands, engine)
+
+
+def run_logo(source, context=None):
+    """Compiles and runs a Logo program against the canvas with a single
+    write to the mesh e.g.
+
+    run_logo("to square :s repeat 4 [fd :s rt 90] end square 2")
+
+    Keyword arguments:
+
+    source -- Logo source, see Core.logo
+    context -- defaults to bpy.context
+    """
+    # compile before touching the canvas so syntax errors leave it alone
+    main, procedures = compile_logo(source)
+    with batch(context) as engine:
+        run(main, engine, motif_cache)
+
+
+def _set_worker_executable():
+    """Before 2.91 sys.executable is blender itself, which can't be used to
+    spawn worker processes, so point multiprocessing at blender's python"""
+    if sys.executable == bpy.app.binary_path:
+        python = getattr(bpy.app, 'binary_path_python', None)
+        if python:
+            multiprocessing.set_executable(python)
+
+
+def run_parallel(jobs, max_workers=None, context=None):
+    """Draws independent jobs in a pool of processes and writes them all to
+    the canvas in one go. The turtle doesn't move.
+
+    run_parallel([Job('lsystem', ('F', 'F=F+F-F-F+F', 4), (x, 0, 0)) for x in range(0, 100, 10)])
+
+    Keyword arguments:
+
+    jobs -- iterable of Core.parallel.Job
+    max_workers -- number of processes, defaults to the number of CPUs
+    context -- defaults to bpy.context
+    """
+    with batch(context) as engine:
+        # jobs are added straight to the buffer rather than drawn, so with
+        # the pen up the engine wouldn't know to open the canvas
+        engine.open_canvas()
+        _set_worker_executable()
+        generate(engine.buffer, jobs, max_workers)
+
+
+def program_steps(engine, kind, source, rules='', iterations=0, angle=90, step=1):
+    """Compiles a program and returns a generator that runs it against
+    engine one turtle command at a time, and the number of commands it will
+    run or None if that isn't known until it has run.
+
+    Keyword arguments:
+
+    engine -- TurtleEngine to draw with
+    kind -- 'PROGRAM', 'LOGO' or 'LSYSTEM'
+    source -- program, Logo source or L-system axiom
+    rules, iterations, angle, step -- see run_lsystem
+    """
+    if kind == 'PROGRAM':
+        commands = parse_program(source)
+        return command_steps(commands, engine), len(commands)
+    if kind == 'LOGO':
+        main, procedures = compile_logo(source)
+        return logo_steps(main, engine, motif_cache), None
+
+    mapping = default_mapping(angle, step)
+    lsystem = LSystem(source, rules, iterations)
+    total = lsystem.length({symbol: len(commands) for symbol, commands in mapping.items()})
+    return command_steps(lsystem.commands(mapping), engine), total
+
+
+def apply_chunk(canvas, chunk):
+    """Writes a Chunk drawn by a BackgroundRun to canvas and moves the
+    turtle to where the chunk left it"""
+    session = get_session(canvas)
+    session.commit(chunk.buffer, chunk.head)
+    for first, stop in chunk.flipped:
+        session.flip_faces(first, stop)
+    session.flush()
+
+    turtle = bpy.context.scene.cursor
+    turtle.location = chunk.location
+    turtle.rotation_euler = chunk.rotation
+    canvas['pendownp'] = chunk.pendown
+    set_head_vert(canvas, chunk.head)
+    write_paths(canvas, *chunk.paths)
+    write_filled(canvas, chunk.filled)
+    write_profile(canvas, chunk.profile)
+
+
+def run_in_background(kind, source, rules='', iterations=0, angle=90, step=1, stream=True, context=None):
+    """Runs a program on a worker thread and writes the result to the
+    canvas from a bpy.app.timers callback, so blender stays usable while
+    it is worked out. The canvas should be left alone until it is done. If
+    it is deleted, stops being the active object or leaves edit mode the
+    run is cancelled, keeping what has been written so far.
+
+    Keyword arguments:
+
+    kind, source, rules, iterations, angle, step -- see program_steps
+    stream -- write what has been drawn every half a second rather than
+    only at the end
+    context -- defaults to bpy.context
+
+    returns -- the BackgroundRun, call its stop method to cancel it
+    """
+    if context is None:
+        context = bpy.context
+    canvas = context.object
+    canvas_name = canvas.name
+
+    # the worker can't look anything up in the canvas so do it now
+    engine = engine_from_context(context)
+    engine.open_canvas()
+    # reads the verts of the open path and filled paths while we still can,
+    # the buffer is empty
+    engine.detach_buffer(keep_paths=True)
+    engine.find_vert = None
+    engine.vert_cos = None
+    steps, total = program_steps(engine, kind, source, rules, iterations, angle, step)
+
+    run = BackgroundRun(steps, engine, 0.5 if stream else None).start()
+    background_runs.append(run)
+
+    def cancel(reason):
+        log.warning("Stopped background run on %s, %s", canvas_name, reason)
+        run.stop()
+        background_runs.remove(run)
+
+    def apply_chunks():
+        canvas = bpy.data.objects.get(canvas_name)
+        if canvas is None:
+            cancel("the canvas has been deleted")
+            return None
+        # committing switches modes on the active object, which has to be
+        # the canvas
+        if bpy.context.view_layer.objects.active is not canvas or canvas.mode != 'EDIT':
+            cancel("the canvas is no longer the object being edited")
+            return None
+        try:
+            for chunk in run.take():
+                apply_chunk(canvas, chunk)
+        except ValueError as err:
+            # the canvas has been edited since we started
+            cancel(err)
+            return None
+        if run.is_finished():
+            background_runs.remove(run)
+            if run.error is not None:
+                log.error("Background run on %s failed, %s", canvas_name, run.error)
+            return None
+        return 0.1
+
+    bpy.app.timers.register(apply_chunks, first_interval=0.1)
+    return run
@@ -0,0 +1,285 @@
+import bpy
+import bmesh
+from bpy.app.handlers import persistent
+import numpy as np
+
+from .. Core.spatial import SpatialHash
+from .. Core.stats import count, timed
+
+# canvas name -> EditSession
+_sessions = {}
+
+
+def _append(collection, attr, values, width, dtype):
+    """Appends values to a mesh collection using a single foreach_set"""
+    old_len = len(collection)
+    existing = np.empty(old_len * width, dtype=dtype)
+    collection.foreach_get(attr, existing)
+    collection.add(len(values))
+    collection.foreach_set(attr, np.concatenate((existing, values.astype(dtype).ravel())))
+
+
+def write_buffer(mesh, buffer, matrix_world):
+    """Appends the contents of a GeometryBuffer to a mesh in one bulk write.
+
+    The mesh must not be in edit mode and must contain exactly
+    buffer.vert_offset vertices.
+
+    Keyword arguments:
+
+    mesh -- bpy.types.Mesh
+    buffer -- GeometryBuffer with verts in world space
+    matrix_world -- world matrix of the object that owns mesh
+
+    returns -- the new verts in local space
+    """
+    if len(mesh.vertices) != buffer.vert_offset:
+        raise ValueError(
+            "Mesh has {} verts but buffer expects {}".format(
+                len(mesh.vertices), buffer.vert_offset))
+
+    # convert verts into the object's local space
+    inverse = np.array(matrix_world.inverted())
+    local_co = buffer.verts @ inverse[:3, :3].T + inverse[:3, 3]
+
+    if buffer.vert_count:
+        _append(mesh.vertices, 'co', local_co, 3, np.float32)
+    if buffer.edge_count:
+        _append(mesh.edges, 'vertices', buffer.edges, 2, np.int32)
+    if buffer.face_count:
+        first_loop = len(mesh.loops)
+        _append(mesh.loops, 'vertex_index', buffer.loops, 1, np.int32)
+        old_len = len(mesh.polygons)
+        loop_starts = np.empty(old_len, dtype=np.int32)
+        loop_totals = np.empty(old_len, dtype=np.int32)
+        mesh.polygons.foreach_get('loop_start', loop_starts)
+        mesh.polygons.foreach_get('loop_total', loop_totals)
+        mesh.polygons.add(buffer.face_count)
+        mesh.polygons.foreach_set('loop_start', np.concatenate(
+            (loop_starts, (buffer.face_starts + first_loop).astype(np.int32))))
+        mesh.polygons.foreach_set('loop_total', np.concatenate(
+            (loop_totals, buffer.face_sizes.astype(np.int32))))
+
+    # faces need edges around them so let blender add any that are missing
+    mesh.update(calc_edges=buffer.face_count > 0)
+
+    return local_co
+
+
+def deselect_mesh(mesh):
+    """Deselects all verts, edges and faces of a mesh that isn't in edit mode"""
+    for collection in (mesh.vertices, mesh.edges, mesh.polygons):
+        collection.foreach_set('select', np.zeros(len(collection), dtype=bool))
+
+
+class EditSession:
+    """Keeps the edit mode BMesh of a canvas alive across turtle commands.
+
+    Geometry is written straight into the BMesh so we never have to toggle
+    in and out of edit mode to sync the mesh. bmesh.update_edit_mesh is
+    only called by flush at the end of a batch of commands.
+    """
+
+    # buffers with more verts than this are written with foreach_set
+    # rather than one vert at a time
+    bulk_threshold = 5000
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.bm = bmesh.from_edit_mesh(canvas.data)
+        self._verts = {}
+        self._selected = None
+        self._vert_count = len(self.bm.verts)
+        self._index = None
+        # set when the depsgraph sees the canvas's geometry change, which
+        # may mean verts have been moved by hand
+        self.geometry_changed = False
+        self.dirty = False
+        # counts our own writes to the mesh so the depsgraph updates they
+        # cause aren't taken for edits, see on_depsgraph_update
+        self.flush_generation = 0
+        self.seen_generation = 0
+
+    def is_valid(self, canvas):
+        try:
+            return (
+                canvas == self.canvas
+                and canvas.mode == 'EDIT'
+                and self.bm.is_valid)
+        except ReferenceError:
+            # canvas has been removed e.g. by undo
+            return False
+
+    def check(self):
+        """Forgets the verts we are holding on to if the canvas has been
+        edited by something other than us"""
+        if len(self.bm.verts) != self._vert_count:
+            self.touch()
+            self._index = None
+
+    def vert(self, index):
+        """Returns the BMVert at index"""
+        vert = self._verts.get(index)
+        if vert is None or not vert.is_valid:
+            self.bm.verts.ensure_lookup_table()
+            vert = self.bm.verts[index]
+            self._verts[index] = vert
+        return vert
+
+    def spatial_index(self):
+        """Returns a SpatialHash of the canvas's verts in local space.
+
+        The index is built the first time it is asked for and then kept up
+        to date as the turtle adds verts. It is rebuilt if the canvas is
+        edited by anything else, including verts being moved without
+        changing how many there are.
+        """
+        index = self._index
+        if index is not None and len(index) == len(self.bm.verts) and not self.geometry_changed:
+            return index
+
+        self.geometry_changed = False
+        # sync the mesh so we can read every co in one go
+        self.canvas.update_from_editmode()
+        cos = np.empty(len(self.canvas.data.vertices) * 3, dtype=np.float32)
+        self.canvas.data.vertices.foreach_get('co', cos)
+        cos = cos.reshape(-1, 3)
+        # an edit may have only changed e.g. the selection, so only rebuild
+        # if the verts aren't where the index thinks they are
+        if index is None or len(index) != len(cos) or not np.array_equal(
+                index.points.astype(np.float32), cos):
+            count('spatial index rebuilds')
+            self._index = SpatialHash.from_points(cos)
+        return self._index
+
+    def _index_verts(self, local_co):
+        if self._index is not None:
+            self._index.insert_many(local_co)
+
+    def vert_count(self):
+        return len(self.bm.verts)
+
+    def face_count(self):
+        return len(self.bm.faces)
+
+    def flip_faces(self, first, stop):
+        """Turns over the faces from first up to stop e.g. a filled path's
+        faces when a later ep makes them the bottom of a prism"""
+        self.bm.faces.ensure_lookup_table()
+        for index in range(first, min(stop, len(self.bm.faces))):
+            self.bm.faces[index].normal_flip()
+        self.dirty = True
+
+    def touch(self):
+        """Call after running a bpy.ops operator on the canvas as it may
+        have invalidated any verts we are holding on to"""
+        self._verts.clear()
+        self._selected = None
+        self._vert_count = len(self.bm.verts)
+
+    def select_vert(self, index):
+        """Selects the vert at index and deselects the last one we selected"""
+        if self._selected is not None and self._selected.is_valid:
+            self._selected.select = False
+        self._selected = None
+        if index is not None:
+            self._selected = self.vert(index)
+            self._selected.select = True
+        self.dirty = True
+
+    @timed('EditSession.commit')
+    def commit(self, buffer, head=None):
+        """Appends the contents of a GeometryBuffer to the canvas and
+        selects the turtle's head vert"""
+        if buffer.is_empty():
+            self.select_vert(head)
+            return
+
+        if buffer.vert_count > self.bulk_threshold:
+            # one round trip through object mode is cheaper than creating
+            # this many BMesh elements from python
+            count('bpy.ops.object.mode_set', 2)
+            bpy.ops.object.mode_set(mode='OBJECT')
+            local_co = write_buffer(self.canvas.data, buffer, self.canvas.matrix_world)
+            self._index_verts(local_co)
+            deselect_mesh(self.canvas.data)
+            bpy.ops.object.mode_set(mode='EDIT')
+            self.flush_generation += 1
+            self.bm = bmesh.from_edit_mesh(self.canvas.data)
+            self.touch()
+        else:
+            self._append(buffer)
+        self._vert_count = len(self.bm.verts)
+        self.select_vert(head)
+
+    def _append(self, buffer):
+        bm = self.bm
+        if len(bm.verts) != buffer.vert_offset:
+            raise ValueError(
+                "Canvas has {} verts but buffer expects {}".format(
+                    len(bm.verts), buffer.vert_offset))
+
+        inverse = np.array(self.canvas.matrix_world.inverted())
+        local_co = buffer.verts @ inverse[:3, :3].T + inverse[:3, 3]
+        for index, co in enumerate(local_co.tolist(), buffer.vert_offset):
+            self._verts[index] = bm.verts.new(co)
+        self._index_verts(local_co)
+
+        for v1, v2 in buffer.edges.tolist():
+            verts = (self.vert(v1), self.vert(v2))
+            if bm.edges.get(verts) is None:
+                bm.edges.new(verts)
+
+        loops = buffer.loops.tolist()
+        for start, size in zip(buffer.face_starts.tolist(), buffer.face_sizes.tolist()):
+            verts = [self.vert(i) for i in loops[start:start + size]]
+            if bm.faces.get(verts) is None:
+                bm.faces.new(verts)
+
+        self.dirty = True
+
+    @timed('EditSession.flush')
+    def flush(self):
+        """Pushes changes made to the BMesh to the mesh and viewport"""
+        if self.dirty:
+            count('bmesh.update_edit_mesh')
+            bmesh.update_edit_mesh(self.canvas.data)
+            self.flush_generation += 1
+            self.dirty = False
+
+
+@persistent
+def on_depsgraph_update(scene, depsgraph=None):
+    """depsgraph_update_post handler that tells sessions their canvas's
+    geometry may have changed. Updates that follow the session's own
+    flushes are ignored, so drawing doesn't make the next spatial_index
+    read the whole mesh"""
+    for session in _sessions.values():
+        try:
+            ids = (session.canvas, session.canvas.data)
+        except ReferenceError:
+            continue
+        if depsgraph is None:
+            session.geometry_changed = True
+            continue
+        if session.seen_generation != session.flush_generation:
+            session.seen_generation = session.flush_generation
+            continue
+        for update in depsgraph.updates:
+            if update.is_updated_geometry and update.id.original in ids:
+                session.geometry_changed = True
+                break
+
+
+def get_session(canvas=None):
+    """Returns the EditSession for canvas, opening one if needed"""
+    if canvas is None:
+        canvas = bpy.context.object
+    session = _sessions.get(canvas.name)
+    if session is None or not session.is_valid(canvas):
+        count('edit sessions opened')
+        session = EditSession(canvas)
+        _sessions[canvas.name] = session
+    else:
+        session.check()
+    return session
@@ -1,5 +1,9 @@
 import bpy
 import bmesh
+import numpy as np
+from mathutils import Vector
+from .. Core.stats import count, timed
+from . session import get_session
 
 C = bpy.context
 D = bpy.data
@@ -47,8 +51,10 @@ def delete_all():
 def mode(mode_name):
     """switch modes, ensuring that if we enter edit mode we deselect all selected vertices"""
     if len(D.objects) != 0:
+        count('bpy.ops.object.mode_set')
         O.object.mode_set(mode=mode_name)
         if mode_name == "EDIT":
+            count('bpy.ops.mesh.select_all')
             O.mesh.select_all(action="DESELECT")
 
 #select object by name
@@ -76,12 +82,75 @@ def in_bbox(lbound, ubound, v, buffer=0.001):
         lbound[2]-buffer<=v[2]<=ubound[2]+buffer
 
 
+def local_bbox(lbound, ubound, coords='GLOBAL', buffer=0.001):
+    """Returns the lower and upper bounds in the active object's local space
+    of a box that encloses a bounding box plus buffer"""
+    lbound = [l - buffer for l in lbound]
+    ubound = [u + buffer for u in ubound]
+    if coords == 'LOCAL':
+        return lbound, ubound
+
+    inverse = bpy.context.object.matrix_world.inverted()
+    corners = [
+        inverse @ Vector((x, y, z))
+        for x in (lbound[0], ubound[0])
+        for y in (lbound[1], ubound[1])
+        for z in (lbound[2], ubound[2])]
+    return (
+        [min(c[i] for c in corners) for i in range(3)],
+        [max(c[i] for c in corners) for i in range(3)])
+
+
+@timed('select_by_loc_indexed')
+def select_by_loc_indexed(lbound, ubound, select_mode, coords, buffer):
+    """select_by_loc using the canvas's spatial index so only verts near
+    the bounding box are looked at"""
+    obj = bpy.context.object
+    world = obj.matrix_world
+    session = get_session(obj)
+
+    candidates = session.spatial_index().query_box(
+        *local_bbox(lbound, ubound, coords, buffer))
+    count('verts scanned', len(candidates))
+
+    count('bpy.ops.mesh.select_all')
+    bpy.ops.mesh.select_all(action='DESELECT')
+
+    inside = set()
+    for index in candidates.tolist():
+        vert = session.vert(index)
+        co = world @ vert.co if coords == 'GLOBAL' else vert.co
+        if in_bbox(lbound, ubound, co, buffer):
+            inside.add(vert)
+
+    if select_mode == 'VERT':
+        for vert in inside:
+            vert.select = True
+
+    if select_mode == 'EDGE':
+        for vert in inside:
+            for edge in vert.link_edges:
+                if all(v in inside for v in edge.verts):
+                    edge.select = True
+
+    if select_mode == 'FACE':
+        for vert in inside:
+            for face in vert.link_faces:
+                if all(v in inside for v in face.verts):
+                    face.select = True
+
+    session.dirty = True
+    session.flush()
+
+
+@timed('select_by_loc')
 def select_by_loc(
         lbound=(0,0,0),
         ubound=(0,0,0),
         select_mode='VERT',
         coords='GLOBAL',
-        buffer=0.001):
+        buffer=0.001,
+        use_index=False):
     """select faces, edges or verts by location that are wholly
     within a boundingcuboid
 
@@ -92,56 +161,130 @@ def select_by_loc(
     select_mode -- default 'VERT'
     coords -- default 'GLOBAL'
     buffer - buffer around selection default = 0.001
+    use_index -- use the canvas's spatial index rather than testing every
+    element. The index is rebuilt when the canvas enters edit mode, its
+    vert count changes or the depsgraph sees its verts move.
+    default = False
     """
 
     #set selection mode
+    count('bpy.ops.mesh.select_mode')
     bpy.ops.mesh.select_mode(type=select_mode)
-    #grab the transformation matrix
-    world = bpy.context.object.matrix_world
 
-    #instantiate a bmesh object and ensure lookup table (bm.faces.ensure... works for all)
-    bm = bmesh.from_edit_mesh(bpy.context.object.data)
-    bm.faces.ensure_lookup_table()
+    if use_index:
+        select_by_loc_indexed(lbound, ubound, select_mode, coords, buffer)
+        return
 
-    #initialise list of verts and parts to be selected
-    verts = []
-    to_select = []
+    obj = bpy.context.object
+    mesh = obj.data
 
-    #for VERT, EDGE or FACE
-        #grab list of global or local coords
-        #test if the piece is entirely within the rectangular
-        #prism defined by lbound and ubound
-        #select each piece that returned TRUE and deselect each piece that returned FALSE
+    # sync the mesh with the edit mesh so we can read it in bulk
+    obj.update_from_editmode()
 
-    if select_mode == 'VERT':
-        if coords == 'GLOBAL':
-            [verts.append((world @ v.co).to_tuple())for v in bm.verts]
-        elif coords == 'LOCAL':
-            [verts.append(v.co.to_tuple())for v in bm.verts]
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', co)
+    co = co.reshape(-1, 3)
+    count('verts scanned', len(co))
+    if coords == 'GLOBAL':
+        world = np.array(obj.matrix_world)
+        co = co @ world[:3, :3].T + world[:3, 3]
 
-        [to_select.append(in_bbox(lbound, ubound, v))for v in verts]
+    # test every vert against the bounding box in one go
+    inside = np.all(
+        (co >= np.array(lbound) - buffer) & (co <= np.array(ubound) + buffer),
+        axis=1)
 
-        for vert_obj, select in zip(bm.verts, to_select):
-            vert_obj.select = select
+    if select_mode == 'VERT':
+        collection, to_select = mesh.vertices, inside
 
     if select_mode == 'EDGE':
-        if coords == 'GLOBAL':
-            [verts.append([(world @ v.co).to_tuple() for v in e.verts]) for e in bm.edges]
-        elif coords == 'LOCAL':
-            [verts.append([v.co.to_tuple()for v in e.verts]) for e in bm.edges]
+        edge_verts = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+        mesh.edges.foreach_get('vertices', edge_verts)
+        collection = mesh.edges
+        to_select = inside[edge_verts.reshape(-1, 2)].all(axis=1)
 
-        [to_select.append(all(in_bbox(lbound, ubound, v)for v in e)) for e in verts]
+    if select_mode == 'FACE':
+        loop_verts = np.empty(len(mesh.loops), dtype=np.int32)
+        loop_starts = np.empty(len(mesh.polygons), dtype=np.int32)
+        mesh.loops.foreach_get('vertex_index', loop_verts)
+        mesh.polygons.foreach_get('loop_start', loop_starts)
+        collection = mesh.polygons
+        to_select = np.zeros(len(mesh.polygons), dtype=bool)
+        if len(loop_starts):
+            to_select = np.logical_and.reduceat(inside[loop_verts], loop_starts)
 
-        for edge_obj, select in zip(bm.edges, to_select):
-            edge_obj.select = select
+    write_selection(obj, select_mode, collection, to_select)
 
-    if select_mode == 'FACE':
-        if coords == 'GLOBAL':
-            [verts.append([(world @ v.co).to_tuple() for v in f.verts])for f in bm.faces]
-        elif coords == 'LOCAL':
-            [verts.append([v.co.to_tuple()for v in f.verts]) for f in bm.faces]
 
-        [to_select.append(all(in_bbox(lbound, ubound, v, buffer) for v in f))for f in verts]
+def write_selection(obj, select_mode, collection, to_select):
+    """Sets the selection state of every vert, edge or face of obj from an
+    array of bools
 
-        for face_obj, select in zip(bm.faces, to_select):
-            face_obj.select = select
+    Keyword arguments:
+
+    obj -- object in edit mode whose mesh has been synced with update_from_editmode
+    select_mode -- 'VERT', 'EDGE' or 'FACE'
+    collection -- mesh.vertices, mesh.edges or mesh.polygons
+    to_select -- array of bools, one per element
+    """
+    selected = np.empty(len(collection), dtype=bool)
+    collection.foreach_get('select', selected)
+
+    # foreach_set would be lost when we leave edit mode so only touch the
+    # BMesh elements whose selection actually changes
+    session = get_session(obj)
+    elements = {
+        'VERT': session.bm.verts,
+        'EDGE': session.bm.edges,
+        'FACE': session.bm.faces}[select_mode]
+    changed = np.flatnonzero(selected != to_select)
+    count('selection changes', len(changed))
+    if len(changed):
+        elements.ensure_lookup_table()
+        for index in changed.tolist():
+            elements[index].select = bool(to_select[index])
+        session.dirty = True
+        session.flush()
+
+
+@timed('find_vert_by_loc')
+def find_vert_by_loc(location, coords='GLOBAL', buffer=0.001):
+    """Returns the index of the first vert of the active object within
+    buffer of location or None if there isn't one
+
+    Keyword arguments:
+
+    location -- location to search at
+    coords -- default 'GLOBAL'
+    buffer - buffer around location default = 0.001
+    """
+    obj = bpy.context.object
+    world = obj.matrix_world
+    session = get_session(obj)
+
+    candidates = session.spatial_index().query_box(
+        *local_bbox(location, location, coords, buffer))
+    count('verts scanned', len(candidates))
+    for index in candidates.tolist():
+        co = world @ session.vert(index).co if coords == 'GLOBAL' else session.vert(index).co
+        if in_bbox(location, location, co, buffer):
+            return index
+
+    return None
+
+
+def vert_cos(indices, obj=None):
+    """Returns an (n, 3) array of the world space coordinates of the verts
+    at indices
+
+    Keyword arguments:
+
+    indices -- vert indices
+    obj -- object in edit mode, defaults to the active object
+    """
+    if obj is None:
+        obj = bpy.context.object
+    world = np.array(obj.matrix_world)
+    session = get_session(obj)
+    local_co = np.array([session.vert(index).co for index in indices], dtype=float).reshape(-1, 3)
+    return local_co @ world[:3, :3].T + world[:3, 3]
@@ -0,0 +1,71 @@
+"""Registers the turtle operators with blender"""
+import bpy
+from . Operators.blended_turtle import OBJECT_OT_add_turtle
+from . Operators.commands import *
+from . Operators.run import TURTLE_OT_run, TURTLE_OT_lsystem, TURTLE_OT_logo
+from . Operators.modal import TURTLE_OT_run_modal, TURTLE_OT_run_background, TURTLE_OT_stop_background
+from . Operators.stats import TURTLE_OT_stats, TURTLE_OT_stats_reset, TURTLE_OT_stats_enable
+from . Utils.session import on_depsgraph_update
+
+classes = (
+    OBJECT_OT_add_turtle,
+    TURTLE_OT_clear_screen,
+    TURTLE_OT_clean,
+    TURTLE_OT_merge,
+    TURTLE_OT_home,
+    TURTLE_OT_pen_down,
+    TURTLE_OT_pen_up,
+    TURTLE_OT_forward,
+    TURTLE_OT_backward,
+    TURTLE_OT_up,
+    TURTLE_OT_down,
+    TURTLE_OT_left,
+    TURTLE_OT_right,
+    TURTLE_OT_left_turn,
+    TURTLE_OT_right_turn,
+    TURTLE_OT_look_up,
+    TURTLE_OT_look_down,
+    TURTLE_OT_roll_left,
+    TURTLE_OT_roll_right,
+    TURTLE_OT_set_pos,
+    TURTLE_OT_set_rotation,
+    TURTLE_OT_set_heading,
+    TURTLE_OT_set_pitch,
+    TURTLE_OT_set_roll,
+    TURTLE_OT_quadratic_curve,
+    TURTLE_OT_cubic_curve,
+    TURTLE_OT_begin_path,
+    TURTLE_OT_stroke_path,
+    TURTLE_OT_fill_path,
+    TURTLE_OT_select_all,
+    TURTLE_OT_deselect_all,
+    TURTLE_OT_extrude,
+    TURTLE_OT_extrude_path,
+    TURTLE_OT_tube,
+    TURTLE_OT_select_path,
+    TURTLE_OT_run,
+    TURTLE_OT_lsystem,
+    TURTLE_OT_logo,
+    TURTLE_OT_run_modal,
+    TURTLE_OT_run_background,
+    TURTLE_OT_stop_background,
+    TURTLE_OT_stats,
+    TURTLE_OT_stats_reset,
+    TURTLE_OT_stats_enable)
+
+
+def register():
+    for cls in classes:
+        bpy.utils.register_class(cls)
+    bpy.utils.register_manual_map(OBJECT_OT_add_turtle.add_object_manual_map)
+    bpy.types.VIEW3D_MT_mesh_add.append(OBJECT_OT_add_turtle.add_object_button)
+    bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update)
+
+
+def unregister():
+    if on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update)
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
+    bpy.types.VIEW3D_MT_mesh_add.remove(OBJECT_OT_add_turtle.add_object_button)
+    bpy.utils.unregister_manual_map(OBJECT_OT_add_turtle.add_object_manual_map)
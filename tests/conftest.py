@@ -0,0 +1,5 @@
+import os
+import sys
+
+# blended_turtle's Core never imports bpy, so the tests run without Blender
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,129 @@
+import numpy as np
+
+from blended_turtle.Core.background import BackgroundRun
+from blended_turtle.Core.buffers import GeometryBuffer
+from blended_turtle.Core.engine import TurtleEngine
+from blended_turtle.Core.program import ProgramError, parse_program, steps
+
+from test_extrude import volume
+
+
+def merged(chunks):
+    """Appends the chunks' buffers the way the canvas would"""
+    buffer = GeometryBuffer()
+    for chunk in chunks:
+        assert chunk.buffer.vert_offset == buffer.next_index
+        buffer.add_verts(chunk.buffer.verts)
+        buffer.add_edges(chunk.buffer.edges)
+        buffer.add_faces(chunk.buffer.loops, chunk.buffer.face_sizes)
+    return buffer
+
+
+def wait(run):
+    run._thread.join(10)
+    assert not run.is_alive()
+
+
+def test_chunks_add_up_to_the_whole_drawing():
+    program = parse_program('fd 1 rt 1 ' * 3000)
+    engine = TurtleEngine()
+    # a chunk after every batch of steps
+    run = BackgroundRun(steps(program, engine), engine, interval=0).start()
+    wait(run)
+    chunks = run.take()
+    assert len(chunks) > 1
+    assert run.is_finished()
+    assert run.done == len(program)
+    assert run.error is None
+
+    whole = TurtleEngine()
+    for step in steps(program, whole):
+        pass
+    buffer = merged(chunks)
+    assert np.allclose(buffer.verts, whole.buffer.verts)
+    assert np.array_equal(buffer.edges, whole.buffer.edges)
+    assert np.allclose(chunks[-1].location, whole.location)
+    assert chunks[-1].head == whole.head
+
+
+def test_errors_are_kept_for_the_main_thread():
+    def failing(engine):
+        engine.fd(1)
+        yield
+        raise ProgramError("Line 2: bad")
+
+    engine = TurtleEngine()
+    run = BackgroundRun(failing(engine), engine, interval=None).start()
+    wait(run)
+    assert isinstance(run.error, ProgramError)
+    # what was drawn before the error still comes back
+    chunk, = run.take()
+    assert chunk.buffer.vert_count == 2
+
+
+def test_stop():
+    def forever(engine):
+        while True:
+            engine.fd(1)
+            yield
+
+    engine = TurtleEngine()
+    run = BackgroundRun(forever(engine), engine, interval=None).start()
+    run.stop()
+    wait(run)
+    assert run.take()[-1].buffer.vert_count == run.done + 1
+
+
+def test_stop_after_the_current_command():
+    engine = TurtleEngine()
+    run = BackgroundRun(iter(()), engine, interval=None)
+
+    def stopping(engine):
+        for i in range(1000):
+            engine.fd(1)
+            if i == 10:
+                run.stop()
+            yield
+
+    run.steps = stopping(engine)
+    run.start()
+    wait(run)
+    assert run.done == 11
+
+
+def test_chunks_split_open_and_filled_paths():
+    # away from the origin so a bottom facing the wrong way changes the volume
+    program = parse_program('setp (3 4 5) bp ' + 'fd 1 rt 1 ' * 1000 + 'fp ep 1 0')
+    engine = TurtleEngine()
+    run = BackgroundRun(steps(program, engine), engine, interval=0).start()
+    wait(run)
+    chunks = run.take()
+    assert len(chunks) > 1
+    assert run.error is None
+
+    whole = TurtleEngine()
+    for step in steps(program, whole):
+        pass
+    buffer = merged(chunks)
+    assert buffer.vert_count == whole.buffer.vert_count
+    assert buffer.face_count == whole.buffer.face_count
+    assert abs(volume(buffer) - volume(whole.buffer)) < 1e-6
+
+
+class BadEndEngine(TurtleEngine):
+    def end_stroke(self):
+        raise RuntimeError("can't sweep")
+
+
+def test_end_stroke_errors_keep_the_drawing_and_first_error():
+    def failing(engine):
+        engine.fd(1)
+        yield
+        raise ProgramError("Line 2: bad")
+
+    engine = BadEndEngine()
+    run = BackgroundRun(failing(engine), engine, interval=None).start()
+    wait(run)
+    assert isinstance(run.error, ProgramError)
+    chunk, = run.take()
+    assert chunk.buffer.vert_count == 2
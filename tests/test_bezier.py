@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from blended_turtle.Core import bezier
+from blended_turtle.Core.engine import TurtleEngine
+
+CUBIC = np.array(((0, 0, 0), (0, 2, 0), (3, 2, 0), (3, 0, 0)), dtype=float)
+
+
+def distance_to_polyline(points, polyline):
+    """Distance from each point to the nearest segment of polyline"""
+    a, b = polyline[:-1], polyline[1:]
+    ab = b - a
+    t = np.clip(np.einsum('ijk,jk->ij', points[:, None] - a, ab) / np.sum(ab * ab, axis=1), 0, 1)
+    nearest = a + t[..., None] * ab
+    return np.min(np.linalg.norm(points[:, None] - nearest, axis=2), axis=1)
+
+
+def test_split_halves_meet_on_the_curve():
+    left, right = bezier.split(CUBIC)
+    assert np.allclose(left[-1], right[0])
+    assert np.allclose(left[-1], bezier.evaluate(CUBIC, [0.5])[0])
+
+
+@pytest.mark.parametrize('tolerance', [0.1, 0.01, 0.001])
+def test_adaptive_points_stay_within_tolerance(tolerance):
+    points = bezier.adaptive_points(CUBIC, tolerance)
+    assert np.allclose(points[-1], CUBIC[-1])
+    polyline = np.concatenate((CUBIC[:1], points))
+    curve = bezier.evaluate(CUBIC, np.linspace(0, 1, 500))
+    assert distance_to_polyline(curve, polyline).max() <= tolerance
+
+
+def test_tighter_tolerance_adds_points():
+    assert len(bezier.adaptive_points(CUBIC, 0.001)) > len(bezier.adaptive_points(CUBIC, 0.1))
+
+
+def test_straight_curves_are_one_segment():
+    line = np.array(((0, 0, 0), (1, 0, 0), (2, 0, 0)), dtype=float)
+    assert np.allclose(bezier.adaptive_points(line), [(2, 0, 0)])
+
+
+def test_qc_ends_facing_along_the_curve():
+    t = TurtleEngine()
+    t.qc((0, 1, 0), (1, 1, 0))
+    assert np.allclose(t.location, (1, 1, 0))
+    assert t.buffer.edge_count == t.buffer.vert_count - 1
+    # the curve ends heading from the control point to the end point
+    t.pu()
+    t.fd(1)
+    assert np.allclose(t.location, (2, 1, 0))
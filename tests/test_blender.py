@@ -0,0 +1,163 @@
+"""Tests that drive the operators on a real canvas. They only run where bpy
+can be imported e.g.
+
+    blender -b --python-expr "import pytest; pytest.main(['tests'])"
+"""
+import numpy as np
+import pytest
+
+bpy = pytest.importorskip('bpy')
+
+import blended_turtle
+from blended_turtle.Utils.session import get_session
+
+OPS = bpy.ops.turtle
+
+
+@pytest.fixture(scope='module', autouse=True)
+def registered():
+    try:
+        blended_turtle.register()
+    except ValueError:
+        # already installed and enabled
+        pass
+
+
+@pytest.fixture
+def canvas():
+    """Empty turtle world in edit mode with the turtle at the origin"""
+    if bpy.context.object is not None and bpy.context.object.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+    for obj in list(bpy.data.objects):
+        bpy.data.objects.remove(obj)
+    for mesh in list(bpy.data.meshes):
+        bpy.data.meshes.remove(mesh)
+    bpy.context.scene.cursor.location = (0, 0, 0)
+    bpy.context.scene.cursor.rotation_euler = (0, 0, 0)
+    OPS.primitive_turtle_add()
+    return bpy.context.object
+
+
+def vert_count(obj):
+    obj.update_from_editmode()
+    return len(obj.data.vertices)
+
+
+def test_commands_share_one_edit_session(canvas):
+    OPS.fd(d=1)
+    session = get_session(canvas)
+    OPS.rt(d=90)
+    OPS.fd(d=1)
+    assert canvas.mode == 'EDIT'
+    assert get_session(canvas) is session
+    assert vert_count(canvas) == 3
+    assert len(canvas.data.edges) == 2
+
+
+def test_spatial_index_follows_moved_verts(canvas):
+    from blended_turtle.Utils.utils import find_vert_by_loc
+
+    OPS.fd(d=1)
+    session = get_session(canvas)
+    assert find_vert_by_loc((0, 1, 0)) == 1
+    vert = session.vert(1)
+    vert.co = (5, 5, 0)
+    # what the depsgraph handler does when it sees the mesh change
+    session.geometry_changed = True
+    assert find_vert_by_loc((5, 5, 0)) == 1
+    assert find_vert_by_loc((0, 1, 0)) is None
+
+
+def test_own_flushes_are_not_taken_for_edits(canvas):
+    import bmesh
+
+    OPS.fd(d=1)
+    session = get_session(canvas)
+    session.spatial_index()
+    bpy.context.view_layer.update()
+    assert not session.geometry_changed
+
+    # an edit made by something else
+    session.vert(1).co = (5, 5, 0)
+    bmesh.update_edit_mesh(canvas.data)
+    bpy.context.view_layer.update()
+    assert session.geometry_changed
+
+
+@pytest.mark.parametrize('use_index', [False, True])
+def test_select_by_loc(canvas, use_index):
+    from blended_turtle.Utils.utils import select_by_loc
+
+    for i in range(3):
+        OPS.fd(d=1)
+        OPS.rt(d=90)
+    select_by_loc((-0.5, -0.5, -1), (0.5, 1.5, 1), 'EDGE', use_index=use_index)
+    canvas.update_from_editmode()
+    selected = [edge.vertices[:] for edge in canvas.data.edges if edge.select]
+    assert [sorted(edge) for edge in selected] == [[0, 1]]
+
+
+def load_benchmark():
+    import importlib.util
+    import os
+
+    path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'benchmarks', 'benchmark.py')
+    spec = importlib.util.spec_from_file_location('benchmark', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize('mode', ['ops', 'batch'])
+def test_benchmark_workloads_run(mode):
+    benchmark = load_benchmark()
+    result = benchmark.run_workload('forward', mode, 10)
+    assert result['ops'] == 10
+    assert result['verts'] == 11
+
+
+def test_benchmark_finds_regressions():
+    benchmark = load_benchmark()
+    baseline = {'results': [
+        {'workload': 'forward', 'mode': 'ops', 'n': 10, 'ops_per_sec': 100.0},
+        {'workload': 'spiral', 'mode': 'ops', 'n': 10, 'ops_per_sec': 100.0}]}
+    results = [
+        {'workload': 'forward', 'mode': 'ops', 'n': 10, 'ops_per_sec': 70.0},
+        {'workload': 'spiral', 'mode': 'ops', 'n': 10, 'ops_per_sec': 90.0}]
+    regressions = benchmark.compare(results, baseline, 0.2)
+    assert regressions == ['forward ops n=10: 30% slower']
+
+
+def test_batch_writes_the_cursor_once_done(canvas):
+    from blended_turtle.Utils.canvas import batch
+
+    cursor = bpy.context.scene.cursor
+    with batch() as engine:
+        engine.lt(90)
+        engine.fd(2)
+        # the cursor hasn't moved yet
+        assert tuple(cursor.location) == (0, 0, 0)
+    assert tuple(round(v, 6) for v in cursor.location) == (-2, 0, 0)
+    assert round(cursor.rotation_euler[2], 6) == round(np.pi / 2, 6)
+
+
+def test_run_parallel_with_the_pen_up(canvas):
+    from blended_turtle.Core.parallel import Job
+    from blended_turtle.Utils.canvas import run_parallel
+
+    OPS.pu()
+    run_parallel([Job('program', 'fd 1', (x, 0, 0)) for x in range(3)], max_workers=1)
+    assert vert_count(canvas) == 7
+
+
+def test_run_modal_without_a_window_runs_to_the_end(canvas):
+    # blender -b has no window, so the program is run in one go
+    result = OPS.run_modal(source='fd 1 rt 90 fd 1')
+    assert result == {'FINISHED'}
+    assert vert_count(canvas) == 3
+
+
+def test_run_modal_reports_bad_programs(canvas):
+    with pytest.raises(RuntimeError, match="Bad arguments for 'fd'"):
+        OPS.run_modal(source='fd x')
+    assert vert_count(canvas) == 1
@@ -0,0 +1,134 @@
+import threading
+
+import numpy as np
+
+from blended_turtle.Core.cache import MotifCache, record
+from blended_turtle.Core.engine import TurtleEngine
+
+
+def triangle(engine):
+    for i in range(3):
+        engine.fd(1)
+        engine.lt(120)
+
+
+def test_record_is_in_turtle_frame():
+    motif = record(triangle)
+    assert len(motif.verts) == 3
+    assert np.allclose(motif.location, 0)
+
+
+def test_stamp_matches_drawing_directly():
+    cache = MotifCache()
+    stamped = TurtleEngine(location=(1, 2, 0))
+    stamped.rt(30)
+    cache.draw(stamped, 'triangle', triangle)
+
+    drawn = TurtleEngine(location=(1, 2, 0))
+    drawn.rt(30)
+    triangle(drawn)
+
+    assert np.allclose(stamped.buffer.verts, drawn.buffer.verts)
+    assert np.array_equal(stamped.buffer.edges, drawn.buffer.edges)
+    assert np.allclose(stamped.location, drawn.location)
+    assert np.allclose(stamped.matrix, drawn.matrix)
+
+
+def test_hits_and_eviction():
+    cache = MotifCache(maxsize=2)
+    engine = TurtleEngine()
+    for key in ('a', 'b', 'a', 'c', 'b'):
+        cache.draw(engine, key, triangle)
+    assert cache.hits == 1
+    assert cache.misses == 4
+    assert len(cache) == 2
+
+
+def test_eviction_by_size():
+    one = record(triangle).nbytes
+    cache = MotifCache(maxbytes=2 * one)
+    engine = TurtleEngine()
+    for key in ('a', 'b', 'a', 'c'):
+        cache.draw(engine, key, triangle)
+    # b was the least recently used
+    assert len(cache) == 2
+    assert cache.nbytes == 2 * one
+    cache.draw(engine, 'a', triangle)
+    assert cache.hits == 2
+
+    # too big to keep at all
+    small = MotifCache(maxbytes=one - 1)
+    small.draw(engine, 'a', triangle)
+    assert len(small) == 0
+    assert small.nbytes == 0
+
+
+def test_shared_between_threads():
+    cache = MotifCache(maxsize=8)
+    errors = []
+
+    def work(seed):
+        try:
+            engine = TurtleEngine()
+            for i in range(300):
+                cache.draw(engine, (seed + i) % 16, triangle)
+        except Exception as err:
+            errors.append(err)
+
+    threads = [threading.Thread(target=work, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(cache) <= 8
+    assert cache.nbytes == sum(motif.nbytes for motif in cache._motifs.values())
+    assert cache.hits + cache.misses == 8 * 300
+
+
+def filled_square(engine):
+    engine.bp()
+    for i in range(3):
+        engine.fd(1)
+        engine.rt(90)
+    engine.fp()
+
+
+def test_stamped_paths_match_drawing_directly():
+    cache = MotifCache()
+    stamped = TurtleEngine()
+    drawn = TurtleEngine()
+    for t in (stamped, drawn):
+        t.pu()
+        t.setp((3, 0, 0))
+        t.pd()
+        t.lt(45)
+    cache.draw(stamped, 'square', filled_square)
+    filled_square(drawn)
+
+    assert np.allclose(stamped.buffer.verts, drawn.buffer.verts)
+    assert np.array_equal(stamped.buffer.loops, drawn.buffer.loops)
+    assert stamped.path_state() == drawn.path_state()
+
+
+def test_pen_state_is_part_of_the_key():
+    cache = MotifCache()
+    engine = TurtleEngine()
+    cache.draw(engine, 'triangle', triangle)
+    engine.pu()
+    cache.draw(engine, 'triangle', triangle)
+    assert cache.misses == 2
+    assert len(cache) == 2
+
+
+def test_ep_extrudes_stamped_fills():
+    cache = MotifCache()
+    stamped = TurtleEngine()
+    drawn = TurtleEngine()
+    cache.draw(stamped, 'square', filled_square)
+    filled_square(drawn)
+    for t in (stamped, drawn):
+        t.ep(1)
+    assert np.allclose(stamped.buffer.verts, drawn.buffer.verts)
+    assert np.array_equal(stamped.buffer.loops, drawn.buffer.loops)
+    assert np.array_equal(stamped.buffer.face_sizes, drawn.buffer.face_sizes)
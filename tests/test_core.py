@@ -0,0 +1,19 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_core_imports_without_bpy():
+    # a fresh interpreter, with any bpy on the path hidden
+    code = (
+        "import sys\n"
+        "sys.modules['bpy'] = None\n"
+        "import blended_turtle\n"
+        "from blended_turtle.Core import (\n"
+        "    background, bezier, buffers, cache, engine, export, extrude, journal,\n"
+        "    logo, lsystem, parallel, pose, program, spatial, stats, sweep, triangulate)\n"
+        "assert blended_turtle.bpy is None\n"
+        "assert not hasattr(blended_turtle, 'register')\n")
+    subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True)
@@ -0,0 +1,131 @@
+import numpy as np
+
+from blended_turtle.Core.buffers import GeometryBuffer
+from blended_turtle.Core.engine import TurtleEngine
+
+
+def test_buffer_grows_past_its_capacity():
+    buffer = GeometryBuffer(vert_offset=10, capacity=4)
+    first = buffer.add_verts(np.zeros((5, 3)))
+    assert first == 10
+    assert buffer.add_vert((1, 2, 3)) == 15
+    buffer.add_edges([(10, 11)] * 6)
+    buffer.add_faces([10, 11, 12, 13, 14, 15, 10], (4, 3))
+    assert buffer.vert_count == 6 and buffer.next_index == 16
+    assert buffer.edge_count == 6
+    assert buffer.face_starts.tolist() == [0, 4]
+    assert buffer.verts[-1].tolist() == [1, 2, 3]
+
+
+def test_forward_draws_a_chain():
+    t = TurtleEngine()
+    for i in range(4):
+        t.fd(1)
+        t.rt(90)
+    buffer = t.buffer
+    assert buffer.vert_count == 5
+    assert buffer.edges.tolist() == [[0, 1], [1, 2], [2, 3], [3, 4]]
+    assert np.allclose(buffer.verts[-1], (0, 0, 0))
+
+
+def test_indices_follow_the_canvas():
+    t = TurtleEngine(vert_offset=100)
+    t.fd(1)
+    assert t.buffer.edges.tolist() == [[100, 101]]
+    t.detach_buffer()
+    t.fd(1)
+    # the new buffer carries on from the old one
+    assert t.buffer.vert_offset == 102
+    assert t.buffer.edges.tolist() == [[101, 102]]
+
+
+def test_pen_up_draws_nothing():
+    t = TurtleEngine()
+    t.pu()
+    t.fd(5)
+    t.lf(2)
+    assert t.buffer.is_empty()
+    assert np.allclose(t.location, (-2, 5, 0))
+
+
+def test_head_is_the_last_vert_drawn():
+    t = TurtleEngine(head=7, vert_offset=8)
+    t.fd(1)
+    # drawing starts from the vert the turtle was told it is sitting on
+    assert t.buffer.edges.tolist() == [[7, 8]]
+    assert t.head == 8
+    t.pu()
+    assert t.head is None
+
+
+def test_pen_down_again_reuses_the_vert_under_the_turtle():
+    t = TurtleEngine()
+    t.fd(1)
+    t.pu()
+    t.bk(1)
+    t.pd()
+    t.lf(1)
+    assert t.buffer.vert_count == 3
+    assert t.buffer.edges.tolist() == [[0, 1], [0, 2]]
+
+
+def test_head_comes_from_the_canvas():
+    found = []
+
+    def find_vert(co, distance):
+        found.append(tuple(co))
+        return 3
+
+    t = TurtleEngine(vert_offset=5)
+    t.find_vert = find_vert
+    t.fd(1)
+    assert found == [(0, 0, 0)]
+    assert t.buffer.edges.tolist() == [[3, 5]]
+
+
+def test_curves_weld_onto_verts_they_end_on():
+    t = TurtleEngine()
+    t.fd(1)
+    t.pu()
+    t.home()
+    t.pd()
+    # starts on vert 0 and ends on vert 1 drawn by fd
+    t.qc((1, 0.5, 0), (0, 1, 0))
+    edges = t.buffer.edges
+    assert edges[1, 0] == 0
+    assert edges[-1, 1] == 1
+    assert t.head == 1
+
+
+def test_weld_distance():
+    t = TurtleEngine()
+    t.weld_distance = 0.1
+    t.fd(1)
+    t.pu()
+    t.setp((0.05, 0, 0))
+    t.pd()
+    t.fd(1)
+    # the pen went down close enough to vert 0 to draw from it
+    assert t.buffer.edges[-1].tolist()[0] == 0
+
+
+def test_pen_up_moves_never_look_at_the_canvas():
+    calls = []
+
+    def count_verts():
+        calls.append(1)
+        return 10
+
+    t = TurtleEngine(pendown=False)
+    t.count_verts = count_verts
+    for i in range(100):
+        t.fd(1)
+        t.rt(10)
+    t.home()
+    assert not calls
+    assert not t.is_opened()
+
+    t.pd()
+    t.fd(1)
+    assert calls == [1]
+    assert t.buffer.edges.tolist() == [[10, 11]]
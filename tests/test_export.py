@@ -0,0 +1,135 @@
+import struct
+
+import numpy as np
+import pytest
+
+from blended_turtle.Core.buffers import GeometryBuffer
+from blended_turtle.Core.engine import TurtleEngine
+from blended_turtle.Core.export import OBJWriter, PLYWriter, SVGWriter, Writer, export, writer_for
+from blended_turtle.Core.program import parse_program, steps
+
+from test_extrude import volume
+
+
+def mixed_faces():
+    """Buffer with a quad, a triangle and another quad in that order"""
+    buffer = GeometryBuffer()
+    buffer.add_verts(np.arange(18, dtype=float).reshape(6, 3))
+    buffer.add_edge(0, 1)
+    buffer.add_face((0, 1, 2, 3))
+    buffer.add_face((1, 2, 4))
+    buffer.add_face((2, 3, 4, 5))
+    return buffer
+
+
+def read_obj(path):
+    verts, edges, faces = [], [], []
+    with open(path) as file:
+        for line in file:
+            kind, *values = line.split()
+            if kind == 'v':
+                verts.append([float(v) for v in values])
+            elif kind == 'l':
+                edges.append([int(v) - 1 for v in values])
+            elif kind == 'f':
+                faces.append([int(v) - 1 for v in values])
+    return np.array(verts), edges, faces
+
+
+def test_writer_is_abstract():
+    with pytest.raises(TypeError):
+        Writer('unused.obj')
+
+
+def test_obj_faces_keep_buffer_order(tmp_path):
+    path = str(tmp_path / 'faces.obj')
+    with OBJWriter(path) as writer:
+        writer.write(mixed_faces())
+    verts, edges, faces = read_obj(path)
+    assert len(verts) == 6
+    assert edges == [[0, 1]]
+    assert faces == [[0, 1, 2, 3], [1, 2, 4], [2, 3, 4, 5]]
+
+
+def test_chunked_export_matches_one_buffer(tmp_path):
+    program = 'bp\n' + 'fd 1\nrt 36\n' * 10 + 'fp\npu\nfd 5\npd\n' + 'fd 1\nlt 10\n' * 50
+    whole = TurtleEngine()
+    for step in steps(parse_program(program), whole):
+        pass
+    whole.end_stroke()
+
+    path = str(tmp_path / 'chunked.obj')
+    engine = TurtleEngine()
+    counts = export(path, steps(parse_program(program), engine), engine, chunk_size=16)
+    verts, edges, faces = read_obj(path)
+    buffer = whole.buffer
+    assert counts == (buffer.vert_count, buffer.edge_count, buffer.face_count)
+    assert np.allclose(verts, buffer.verts, atol=1e-5)
+    assert edges == buffer.edges.tolist()
+    assert faces == [buffer.loops[start:start + size].tolist() for start, size in zip(
+        buffer.face_starts.tolist(), buffer.face_sizes.tolist())]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 5])
+def test_chunks_split_open_and_filled_paths(tmp_path, chunk_size):
+    # away from the origin so a bottom facing the wrong way changes the volume
+    program = 'setp (3 4 5)\nbp\n' + 'fd 2\nrt 90\n' * 3 + 'fp\nep 1 0'
+    whole = TurtleEngine()
+    for step in steps(parse_program(program), whole):
+        pass
+    whole.end_stroke()
+
+    path = str(tmp_path / 'prism.obj')
+    engine = TurtleEngine()
+    counts = export(path, steps(parse_program(program), engine), engine, chunk_size=chunk_size)
+    verts, edges, faces = read_obj(path)
+    buffer = whole.buffer
+    assert counts == (buffer.vert_count, buffer.edge_count, buffer.face_count)
+    # setp drew from the origin, then a prism with a bottom, a top and 4 sides
+    assert counts[0] == 1 + 8 and counts[2] == 6
+    assert np.allclose(verts, buffer.verts)
+    written = GeometryBuffer()
+    written.add_verts(verts)
+    for face in faces:
+        written.add_face(face)
+    assert abs(volume(written) - volume(buffer)) < 1e-9
+
+
+def test_ply_header_counts(tmp_path):
+    path = str(tmp_path / 'faces.ply')
+    with PLYWriter(path) as writer:
+        writer.write(mixed_faces())
+    with open(path, 'rb') as file:
+        data = file.read()
+    header, body = data.split(b'end_header\n')
+    assert b'element vertex 000000000006' in header
+    assert b'element face 000000000003' in header
+    assert b'element edge 000000000001' in header
+    verts = np.frombuffer(body[:6 * 12], dtype='<f4').reshape(6, 3)
+    assert np.array_equal(verts, np.arange(18).reshape(6, 3))
+    assert struct.unpack('<5i', body[72:92]) == (4, 0, 1, 2, 3)
+
+
+def test_svg_view_box(tmp_path):
+    path = str(tmp_path / 'line.svg')
+    buffer = GeometryBuffer()
+    buffer.add_verts([(0, 0, 0), (2, 1, 0)])
+    buffer.add_edge(0, 1)
+    with SVGWriter(path, stroke_width=0.5) as writer:
+        writer.write(buffer)
+    with open(path) as file:
+        svg = file.read()
+    assert 'viewBox="-0.5 -1.5 3 2"' in svg
+    assert 'M0 -0 L2 -1' in svg
+
+
+def test_writer_rejects_gaps(tmp_path):
+    with OBJWriter(str(tmp_path / 'gap.obj')) as writer:
+        writer.write(GeometryBuffer())
+        with pytest.raises(ValueError):
+            writer.write(GeometryBuffer(vert_offset=3))
+
+
+def test_unknown_extension(tmp_path):
+    with pytest.raises(ValueError):
+        writer_for(str(tmp_path / 'drawing.stl'))
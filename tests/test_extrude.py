@@ -0,0 +1,155 @@
+import pytest
+import numpy as np
+
+from blended_turtle.Core.engine import TurtleEngine
+from blended_turtle.Core.extrude import prisms
+
+
+def square(engine, size=2):
+    """Draws three sides of a square, closing the path draws the fourth"""
+    engine.bp()
+    for i in range(3):
+        engine.fd(size)
+        engine.rt(90)
+
+
+def volume(*buffers):
+    """Signed volume of the closed faces in buffers, which follow on from
+    each other like a canvas and the buffers written to it"""
+    verts = np.concatenate([buffer.verts for buffer in buffers])
+    offset = buffers[0].vert_offset
+    total = 0.0
+    for buffer in buffers:
+        for start, size in zip(buffer.face_starts.tolist(), buffer.face_sizes.tolist()):
+            face = verts[buffer.loops[start:start + size] - offset]
+            for i in range(1, size - 1):
+                total += np.dot(face[0], np.cross(face[i], face[i + 1])) / 6
+    return total
+
+
+def test_prism_volume():
+    cos = np.array(((0, 0, 0), (2, 0, 0), (2, 2, 0), (0, 2, 0)), dtype=float)
+    top, loops, sizes = prisms(cos, [4], 3)
+    assert np.allclose(top[:, 2], 3)
+    assert list(sizes) == [4, 4, 4, 4, 4, 4]
+
+
+def test_prism_with_hole():
+    outline = [(0, 0, 0), (4, 0, 0), (4, 4, 0), (0, 4, 0)]
+    hole = [(1, 1, 0), (3, 1, 0), (3, 3, 0), (1, 3, 0)]
+    top, loops, sizes = prisms(np.array(outline + hole, dtype=float), [4, 4], 1, paths=[0, 0])
+    assert len(top) == 8
+    # 8 sides, then triangulated caps
+    assert np.all(sizes[:8] == 4)
+    assert np.all(sizes[8:] == 3)
+
+
+def test_ep_of_open_path_makes_closed_prism():
+    t = TurtleEngine()
+    square(t)
+    t.ep(1)
+    assert t.buffer.vert_count == 8
+    assert abs(abs(volume(t.buffer)) - 4) < 1e-9
+
+
+def test_ep_twice_does_not_extrude_the_prism():
+    t = TurtleEngine()
+    square(t)
+    t.fp()
+    t.ep(1)
+    verts, faces = t.buffer.vert_count, t.buffer.face_count
+    t.ep(1)
+    t.ep(1)
+    assert t.buffer.vert_count == verts
+    assert t.buffer.face_count == faces
+    assert t.buffer.face_sizes.max() == 4
+
+
+def test_fp_after_ep_does_not_fill_prism_verts():
+    t = TurtleEngine()
+    square(t)
+    t.ep(1)
+    faces = t.buffer.face_count
+    t.fp()
+    assert t.buffer.face_count == faces
+    assert t.buffer.face_sizes.max() == 4
+
+
+def test_repeated_ep_stays_linear():
+    t = TurtleEngine()
+    for i in range(50):
+        square(t)
+        t.ep(1)
+        t.ep(1)
+        t.pu()
+        t.fd(3)
+        t.pd()
+    assert t.buffer.vert_count == 50 * 8
+    assert t.buffer.face_sizes.max() == 4
+
+
+def test_path_ends_where_it_was_closed():
+    t = TurtleEngine()
+    square(t)
+    t.fp()
+    t.fd(5)
+    assert len(t.path_indices()) == 4
+    t.ep(1)
+    # the bottom is the filled square and the top has four verts
+    assert t.buffer.vert_count == 5 + 4
+
+
+def split_engine(first):
+    """Returns a TurtleEngine that carries on from what first has drawn as
+    a separate command would, with first's buffer standing in for the
+    canvas"""
+    canvas = first.detach_buffer()
+    second = TurtleEngine(location=first.location, pendown=first.pendown, head=first.head)
+    second.buffer.vert_offset = canvas.next_index
+    second.buffer.face_offset = canvas.next_face
+    second.set_path_state(*first.path_state())
+    second.set_filled_state(first.filled_state())
+    second.vert_cos = lambda indices: canvas.verts[np.array(indices) - canvas.vert_offset]
+    second.flip_faces = canvas.flip_faces
+    return canvas, second
+
+
+def test_ep_in_another_engine_turns_over_the_fill():
+    # away from the origin so a bottom facing the wrong way changes the volume
+    t = TurtleEngine(location=(3, 4, 5))
+    square(t)
+    t.fp()
+    t.ep(1)
+
+    first = TurtleEngine(location=(3, 4, 5))
+    square(first)
+    first.fp()
+    canvas, second = split_engine(first)
+    second.ep(1)
+    assert canvas.vert_count + second.buffer.vert_count == 8
+    assert canvas.face_count + second.buffer.face_count == 6
+    # the same closed prism as drawing it with one engine
+    assert abs(volume(canvas, second.buffer) - volume(t.buffer)) < 1e-9
+
+
+def test_ep_of_written_fill_needs_flip_faces():
+    first = TurtleEngine()
+    square(first)
+    first.fp()
+    canvas, second = split_engine(first)
+    second.flip_faces = None
+    with pytest.raises(ValueError):
+        second.ep(1)
+
+
+def test_ep_of_unreadable_path_raises():
+    first = TurtleEngine()
+    square(first)
+    canvas, second = split_engine(first)
+    second.vert_cos = None
+    with pytest.raises(ValueError):
+        second.ep(1)
+    # nothing was used up so ep can try again once the verts can be read
+    second.vert_cos = lambda indices: canvas.verts[np.array(indices) - canvas.vert_offset]
+    second.ep(1)
+    assert canvas.vert_count + second.buffer.vert_count == 8
@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+from blended_turtle.Core.engine import TurtleEngine
+from blended_turtle.Core.journal import Journal
+from blended_turtle.Core.program import ProgramError, parse_program
+
+
+def program():
+    """Open strokes, filled and extruded squares and a tube"""
+    commands = []
+    for i in range(30):
+        commands += [('fd', 1), ('rt', 10 + i)]
+        if i % 7 == 0:
+            commands += [('bp',), ('fd', 1), ('lt', 90), ('fd', 1), ('lt', 90), ('fd', 1), ('fp',)]
+        if i % 11 == 0:
+            commands += [('ep', 0.5, 0)]
+    commands += [('tube', 0.2, 4), ('fd', 2), ('lt', 45), ('fd', 2), ('tube', 0, 4)]
+    return parse_program(commands)
+
+
+def drawn(commands):
+    engine = TurtleEngine()
+    for name, args in commands:
+        getattr(engine, name)(*args)
+    engine.end_stroke()
+    return engine.buffer
+
+
+def assert_same(buffer, expected):
+    assert np.allclose(buffer.verts, expected.verts)
+    assert np.array_equal(buffer.edges, expected.edges)
+    assert np.array_equal(buffer.loops, expected.loops)
+    assert np.array_equal(buffer.face_sizes, expected.face_sizes)
+
+
+def recorded(commands, interval=8):
+    journal = Journal(TurtleEngine(), interval)
+    journal.run(commands)
+    return journal
+
+
+def test_commands_round_trip():
+    commands = program()
+    journal = recorded(commands)
+    assert len(journal) == len(commands)
+    assert journal.commands() == commands
+    assert journal.commands(5, 9) == commands[5:9]
+    assert journal.checkpoint_count == 1 + (len(commands) - 1) // 8
+
+
+@pytest.mark.parametrize('start, stop', [(0, 1), (20, 22), (40, 40), (61, 70)])
+def test_splice_matches_drawing_from_scratch(start, stop):
+    commands = program()
+    new = [('lt', 15), ('fd', 3), ('bp',), ('fd', 1), ('lt', 120), ('fd', 1), ('fp',)]
+    journal = recorded(commands)
+    journal.splice(start, stop, new)
+    journal.engine.end_stroke()
+    expected = commands[:start] + parse_program(new) + commands[stop:]
+    assert journal.commands() == expected
+    assert_same(journal.engine.buffer, drawn(expected))
+
+
+def test_replace_and_truncate():
+    commands = program()
+    journal = recorded(commands)
+    journal.replace(3, ('fd', 5))
+    journal.truncate(50)
+    journal.engine.end_stroke()
+    expected = commands[:3] + [('fd', (5.0,))] + commands[4:50]
+    assert_same(journal.engine.buffer, drawn(expected))
+
+
+def test_bad_commands_leave_the_journal_alone():
+    journal = recorded(program())
+    count = len(journal)
+    with pytest.raises(ProgramError, match='Command 11'):
+        journal.splice(10, 12, [('fd', 1), ('jump',)])
+    assert len(journal) == count
+
+
+def test_save_load_and_replay(tmp_path):
+    commands = program()
+    journal = recorded(commands)
+    path = str(tmp_path / 'drawing.tjnl')
+    journal.save(path)
+
+    loaded = Journal.load(path, TurtleEngine())
+    assert loaded.commands() == commands
+    assert loaded.engine.buffer.is_empty()
+    loaded.replay()
+    loaded.engine.end_stroke()
+    assert_same(loaded.engine.buffer, drawn(commands))
+    # the file is mapped copy on write, so editing doesn't change it
+    loaded.replace(0, ('fd', 9))
+    assert Journal.load(path, TurtleEngine()).commands()[0] == ('fd', (1.0,))
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'not a journal at all, just some bytes')
+    with pytest.raises(ValueError):
+        Journal.load(str(path), TurtleEngine())
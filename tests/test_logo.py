@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from blended_turtle.Core.engine import TurtleEngine
+from blended_turtle.Core.logo import LogoError, compile_logo, run
+
+
+def draw(source):
+    engine = TurtleEngine()
+    run(compile_logo(source)[0], engine)
+    return engine
+
+
+def test_repeat_draws_square():
+    t = draw('repeat 4 [fd 2 rt 90]')
+    assert t.buffer.edge_count == 4
+    assert np.allclose(t.location, 0)
+
+
+def test_procedures_and_recursion():
+    t = draw('''
+        to spiral :n
+          if :n < 1 [stop]
+          fd :n rt 90
+          spiral :n - 1
+        end
+        spiral 5''')
+    assert t.buffer.edge_count == 5
+
+
+def test_deep_recursion_does_not_hit_python_limit():
+    t = draw('''
+        to walk :n
+          if :n = 0 [stop]
+          fd 1
+          walk :n - 1
+        end
+        walk 5000''')
+    assert np.allclose(t.location, (0, 5000, 0))
+
+
+def test_output_and_functions():
+    t = draw('''
+        to double :x
+          output :x * 2
+        end
+        fd double sqrt 4''')
+    assert np.allclose(t.location, (0, 4, 0))
+
+
+@pytest.mark.parametrize('source, location', [
+    ('setp 1 -2 3', (1, -2, 3)),
+    ('qc 0 1 0 1 -1 0', (1, -1, 0)),
+    ('fd 3 - 1', (0, 2, 0)),
+    ('fd 3-1', (0, 2, 0)),
+    ('fd -3', (0, -3, 0)),
+    ('fd (-3)', (0, -3, 0)),
+    ('make "x 3 fd -:x', (0, -3, 0))])
+def test_minus(source, location):
+    assert np.allclose(draw(source).location, location)
+
+
+def test_minus_after_an_argument_starts_a_new_statement():
+    with pytest.raises(LogoError):
+        draw('fd 2 -1')
+
+
+def test_type_errors_are_logo_errors_with_lines():
+    with pytest.raises(LogoError, match='Line 2'):
+        draw('make "x 3\nfd :x + "a')
+    with pytest.raises(LogoError, match='Line 2'):
+        draw('make "x "a\nfd -:x')
+
+
+def test_unknown_procedure():
+    with pytest.raises(LogoError, match="I don't know how to"):
+        compile_logo('jump 3')
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from blended_turtle.Core.engine import TurtleEngine
+from blended_turtle.Core.lsystem import LSystem, default_mapping, parse_rules
+from blended_turtle.Core.program import ProgramError, execute
+
+
+def expand(axiom, rules, iterations):
+    """Builds the whole string the way the streaming expansion avoids"""
+    for i in range(iterations):
+        axiom = ''.join(rules.get(symbol, symbol) for symbol in axiom)
+    return axiom
+
+
+def test_symbols_match_string_rewriting():
+    rules = {'X': 'F-[[X]+X]+F[+FX]-X', 'F': 'FF'}
+    system = LSystem('X', rules, 4)
+    expanded = expand('X', rules, 4)
+    assert ''.join(system.symbols()) == expanded
+    assert system.length() == len(expanded)
+    assert system.length({'F': 2}) == 2 * expanded.count('F')
+
+
+def test_parse_rules():
+    assert parse_rules('F = F+F ; G=GG\nX=') == {'F': 'F+F', 'G': 'GG', 'X': ''}
+    with pytest.raises(ProgramError):
+        parse_rules('FF=F')
+    with pytest.raises(ProgramError):
+        parse_rules('F')
+
+
+def test_koch_curve_draws_every_segment():
+    system = LSystem('F', 'F=F+F-F-F+F', 2)
+    t = TurtleEngine()
+    execute(system.commands(default_mapping(90, 1)), t)
+    assert t.buffer.edge_count == 25
+    assert np.allclose(t.location, (0, 9, 0))
+
+
+def test_unmapped_symbols_are_skipped():
+    system = LSystem('AFB', {}, 0)
+    assert list(system.commands({'F': [('fd', 2)]})) == [('fd', (2.0,))]
+
+
+def test_bad_mapping():
+    with pytest.raises(ProgramError, match="Symbol 'F'"):
+        list(LSystem('F', {}, 0).commands({'F': [('jump', 1)]}))
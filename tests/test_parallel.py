@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from blended_turtle.Core.buffers import GeometryBuffer
+from blended_turtle.Core.parallel import Job, draw_job, generate
+from blended_turtle.Core.program import ProgramError
+
+
+def jobs():
+    return [
+        Job('program', 'fd 1\nrt 90\nfd 1', (0, 0, 0)),
+        Job('logo', 'repeat 3 [fd 1 rt 120]', (5, 0, 0)),
+        Job('lsystem', ('F', 'F=F+F', 2), (10, 0, 0), angle=90, step=1)]
+
+
+def test_unknown_kind():
+    with pytest.raises(ProgramError):
+        Job('python', 'fd 1')
+
+
+def test_job_starts_where_it_is_put():
+    verts, edges, loops, face_sizes = draw_job(Job('program', 'fd 1', (3, 4, 0)))
+    assert np.allclose(verts, [(3, 4, 0), (3, 5, 0)])
+    assert edges.tolist() == [[0, 1]]
+
+
+def test_workers_match_drawing_in_process():
+    serial = GeometryBuffer()
+    generate(serial, jobs(), max_workers=1)
+    spawned = GeometryBuffer()
+    generate(spawned, jobs(), max_workers=2)
+    assert np.allclose(serial.verts, spawned.verts)
+    assert np.array_equal(serial.edges, spawned.edges)
+    # jobs are offset so each starts after the last
+    assert serial.edges.max() == serial.vert_count - 1
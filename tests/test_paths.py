@@ -0,0 +1,64 @@
+import numpy as np
+
+from blended_turtle.Core.engine import TurtleEngine
+
+
+def square(engine, size=2):
+    engine.bp()
+    for i in range(4):
+        engine.fd(size)
+        engine.rt(90)
+
+
+def test_closing_on_start_welds():
+    t = TurtleEngine()
+    square(t)
+    assert t.buffer.vert_count == 4
+    assert t.head == t.path_start
+    t.fp()
+    assert t.buffer.edge_count == 4
+    assert list(t.buffer.face_sizes) == [4]
+    edges = t.buffer.edges
+    assert np.all(edges[:, 0] != edges[:, 1])
+
+
+def test_sp_after_closing_adds_no_edge():
+    t = TurtleEngine()
+    square(t)
+    t.sp()
+    assert t.buffer.edge_count == 4
+
+
+def test_nested_path_closes_on_its_own_start():
+    t = TurtleEngine()
+    square(t, 4)
+    t.pu()
+    t.setp((1, 1, 0))
+    t.pd()
+    t.seth(0)
+    square(t, 1)
+    t.sp()
+    t.fp()
+    # 4 outer + 4 hole verts, hole triangulated into the outline
+    assert t.buffer.vert_count == 8
+    assert np.all(t.buffer.face_sizes == 3)
+    assert len(t.buffer.face_sizes) == 8
+
+
+def test_fill_triangles():
+    t = TurtleEngine()
+    t.fill_triangles = True
+    square(t)
+    t.fp()
+    assert list(t.buffer.face_sizes) == [3, 3]
+
+
+def test_path_state_round_trips():
+    t = TurtleEngine()
+    square(t, 4)
+    t.bp()
+    t.fd(1)
+    state = t.path_state()
+    other = TurtleEngine()
+    other.set_path_state(*state)
+    assert other.path_state() == state
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from blended_turtle.Core.engine import TurtleEngine
+from blended_turtle.Core.pose import (
+    axis_matrix, euler_to_matrix, matrix_to_euler, orthonormalized, track_to_matrix)
+
+
+@pytest.mark.parametrize('euler', [(0, 0, 0), (0.3, -0.5, 1.2), (-2, 0.1, 3), (0.4, 1.0, -0.7)])
+def test_euler_round_trip(euler):
+    matrix = euler_to_matrix(euler)
+    assert np.allclose(matrix @ matrix.T, np.identity(3))
+    assert np.allclose(euler_to_matrix(matrix_to_euler(matrix)), matrix)
+
+
+def test_euler_applies_x_then_y_then_z():
+    euler = (0.3, -0.5, 1.2)
+    expected = axis_matrix(2, euler[2]) @ axis_matrix(1, euler[1]) @ axis_matrix(0, euler[0])
+    assert np.allclose(euler_to_matrix(euler), expected)
+
+
+def test_gimbal_lock():
+    matrix = euler_to_matrix((0.3, np.pi / 2, 0.2))
+    assert np.allclose(euler_to_matrix(matrix_to_euler(matrix)), matrix)
+
+
+def test_orthonormalized_keeps_heading():
+    drifted = euler_to_matrix((0.3, -0.5, 1.2)) * 1.01
+    drifted[0, 2] += 0.01
+    fixed = orthonormalized(drifted)
+    assert np.allclose(fixed @ fixed.T, np.identity(3))
+    assert np.allclose(fixed[:, 1], drifted[:, 1] / np.linalg.norm(drifted[:, 1]))
+
+
+def test_track_to_matrix():
+    matrix = track_to_matrix((1, 1, 1))
+    assert np.allclose(matrix[:, 1], np.ones(3) / np.sqrt(3))
+    # z is as close to world z as it can be, so x is level
+    assert np.isclose(matrix[2, 0], 0)
+    assert np.allclose(track_to_matrix((0, 0, 2))[:, 1], (0, 0, 1))
+
+
+def test_turns_are_in_the_turtles_own_frame():
+    t = TurtleEngine()
+    t.lu(90)
+    t.lt(90)
+    t.pu()
+    t.fd(1)
+    # turning left while facing straight up turns around the turtle's up
+    # axis, which now points back along world -y
+    assert np.allclose(t.location, (-1, 0, 0))
+
+
+def test_long_walks_stay_orthonormal():
+    t = TurtleEngine()
+    t.pu()
+    for i in range(1000):
+        t.lt(7)
+        t.lu(3)
+        t.rl(11)
+    assert np.allclose(t.matrix @ t.matrix.T, np.identity(3))
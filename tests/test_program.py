@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from blended_turtle.Core.engine import TurtleEngine
+from blended_turtle.Core.program import ProgramError, execute, parse_program, steps
+
+
+def test_string_and_list_programs_match():
+    text = parse_program('fd 1; rt 90\nqc (0, 1, 0) (1, 1, 0) setp 1,2,3')
+    listed = parse_program([('fd', 1), 'rt 90'.split(), ('qc', (0, 1, 0), (1, 1, 0)), ('setp', (1, 2, 3))])
+    assert text == listed
+    assert text[2] == ('qc', ((0.0, 1.0, 0.0), (1.0, 1.0, 0.0)))
+
+
+def test_commands_without_arguments():
+    assert parse_program('pu fd 2 PD bp fp') == [
+        ('pu', ()), ('fd', (2.0,)), ('pd', ()), ('bp', ()), ('fp', ())]
+
+
+@pytest.mark.parametrize('program, message', [
+    ('fd 1 jump 2', "Unknown command 'jump'"),
+    ('fd', "'fd' expects 1 numbers but got 0"),
+    ('fd x', "Command 0: Bad arguments for 'fd'"),
+    ([('setp', (1, 2))], "Command 0: Bad arguments for 'setp'"),
+    ([('fd', 1), ('rt',)], "Command 1: 'rt' expects 1 arguments but got 0")])
+def test_bad_programs(program, message):
+    with pytest.raises(ProgramError, match=message):
+        parse_program(program)
+
+
+def test_execute_matches_calling_the_engine():
+    commands = parse_program('fd 2 lt 90 fd 1 pu bk 3 pd up 1')
+    run = TurtleEngine()
+    execute(commands, run)
+
+    called = TurtleEngine()
+    called.fd(2)
+    called.lt(90)
+    called.fd(1)
+    called.pu()
+    called.bk(3)
+    called.pd()
+    called.up(1)
+
+    assert np.allclose(run.buffer.verts, called.buffer.verts)
+    assert np.array_equal(run.buffer.edges, called.buffer.edges)
+    assert np.allclose(run.location, called.location)
+
+
+def test_steps_yield_after_each_command():
+    t = TurtleEngine()
+    run = steps(parse_program('fd 1 fd 1 fd 1'), t)
+    next(run)
+    assert t.buffer.vert_count == 2
+    assert sum(1 for step in run) == 2
+    assert t.buffer.vert_count == 4
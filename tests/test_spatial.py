@@ -0,0 +1,36 @@
+import numpy as np
+
+from blended_turtle.Core.spatial import SpatialHash
+
+
+def brute_force(points, lower, upper):
+    return np.flatnonzero(np.all((points >= lower) & (points <= upper), axis=1))
+
+
+def test_box_queries_match_a_full_scan():
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-10, 10, (2000, 3))
+    index = SpatialHash.from_points(points)
+    for i in range(50):
+        lower = rng.uniform(-10, 8, 3)
+        upper = lower + rng.uniform(0, 4, 3)
+        assert np.array_equal(index.query_box(lower, upper), brute_force(points, lower, upper))
+
+
+def test_inserted_points_are_found_before_and_after_sorting():
+    index = SpatialHash(cell_size=0.5)
+    assert index.insert((1, 1, 1)) == 0
+    assert index.query_point((1, 1, 1)).tolist() == [0]
+    # enough points to be merged into the sorted arrays
+    first = index.insert_many(np.column_stack((np.arange(2000.0), np.zeros(2000), np.zeros(2000))))
+    assert first == 1
+    assert len(index) == 2001
+    assert index.query_point((1, 1, 1)).tolist() == [0]
+    assert index.query_point((1500, 0, 0)).tolist() == [1501]
+    assert np.array_equal(index.points[1:, 0], np.arange(2000.0))
+
+
+def test_huge_boxes_fall_back_to_a_scan():
+    index = SpatialHash.from_points(np.eye(3), cell_size=1e-6)
+    assert index.query_box((-1, -1, -1), (2, 2, 2)).tolist() == [0, 1, 2]
+    assert len(index.query_point((5, 5, 5))) == 0
@@ -0,0 +1,61 @@
+import pytest
+
+from blended_turtle.Core import stats
+
+
+@pytest.fixture(autouse=True)
+def clean_stats():
+    stats.reset()
+    yield
+    stats.enable(False)
+    stats.reset()
+
+
+@stats.timed('double')
+def double(x):
+    return 2 * x
+
+
+def test_nothing_is_recorded_while_disabled():
+    assert double(2) == 4
+    stats.count('things')
+    assert stats.timers() == []
+    assert stats.counters() == []
+
+
+def test_timers_and_counters():
+    stats.enable()
+    double(1)
+    double(2)
+    stats.count('things', 3)
+    stats.count('things')
+    (name, calls, total, longest), = stats.timers()
+    assert (name, calls) == ('double', 2)
+    assert 0 <= longest <= total
+    assert stats.counters() == [('things', 4)]
+
+
+def test_timed_execute_keeps_the_signature():
+    class Operator:
+        bl_idname = 'turtle.test'
+
+        def execute(self, context):
+            """Runs"""
+            return {'FINISHED'}
+
+    stats.timed_execute(Operator)
+    stats.enable()
+    assert Operator().execute(None) == {'FINISHED'}
+    assert Operator.execute.__doc__ == 'Runs'
+    assert Operator.execute.__code__.co_argcount == 2
+    assert stats.timers()[0][:2] == ('turtle.test', 1)
+
+
+def test_report():
+    stats.enable()
+    double(1)
+    stats.count('verts scanned', 10)
+    lines = stats.report()
+    assert lines[0].split() == ['timer', 'calls', 'total', 'ms', 'mean', 'ms', 'max', 'ms']
+    assert lines[1].split()[:2] == ['double', '1']
+    assert lines[-1].split() == ['verts', 'scanned', '10']
@@ -0,0 +1,82 @@
+import numpy as np
+
+from blended_turtle.Core.engine import TurtleEngine
+from blended_turtle.Core.sweep import circle_profile, frames, profile_points, ring_quads
+
+from test_extrude import volume
+
+
+def test_frames_are_square_to_the_path():
+    t = np.linspace(0, 4 * np.pi, 200)
+    helix = np.column_stack((np.cos(t), np.sin(t), 0.3 * t))
+    tangents, normals = frames(helix, (0, 0, 1))
+    assert np.allclose(np.linalg.norm(tangents, axis=1), 1)
+    assert np.allclose(np.linalg.norm(normals, axis=1), 1)
+    assert np.allclose(np.einsum('ij,ij->i', tangents, normals), 0)
+
+
+def test_straight_paths_dont_twist():
+    line = np.column_stack((np.zeros(50), np.arange(50.0), np.zeros(50)))
+    tangents, normals = frames(line, (0, 1, 1))
+    # the normal is made square to the path and then carried along it
+    assert np.allclose(normals, (0, 0, 1))
+
+
+def test_u_turn():
+    path = np.array(((0, 0, 0), (0, 1, 0), (0, 0, 0.001)), dtype=float)
+    tangents, normals = frames(path, (0, 0, 1))
+    assert np.all(np.isfinite(normals))
+
+
+def test_ring_quads_join_neighbouring_rings():
+    quads = ring_quads(3, 4)
+    assert len(quads) == 8
+    assert quads[3].tolist() == [3, 7, 4, 0]
+
+
+def test_profile_points_go_anticlockwise():
+    clockwise = circle_profile(1, 5)[::-1]
+    assert np.allclose(profile_points(clockwise), circle_profile(1, 5))
+
+
+def test_tube_is_a_closed_solid():
+    t = TurtleEngine()
+    t.tube(1, 6)
+    t.fd(2)
+    t.rt(90)
+    t.fd(2)
+    t.end_stroke()
+    buffer = t.buffer
+    # a ring at each of the three points, quads between and a cap each end
+    assert buffer.vert_count == 18
+    assert buffer.face_sizes.tolist() == [6] + [4] * 12 + [6]
+    # faces point out so the volume is positive
+    assert volume(buffer) > 0
+
+
+def test_detaching_carries_the_tube_on():
+    whole = TurtleEngine()
+    parts = TurtleEngine()
+    buffers = []
+    for t in (whole, parts):
+        t.tube(0.5, 4)
+        for i in range(4):
+            t.fd(1)
+            t.lt(30)
+            if t is parts:
+                buffers.append(t.detach_buffer())
+        t.end_stroke()
+    buffers.append(parts.detach_buffer())
+    assert sum(b.vert_count for b in buffers) == whole.buffer.vert_count
+    assert np.array_equal(
+        np.concatenate([b.loops for b in buffers]), whole.buffer.loops)
+
+
+def test_tube_zero_goes_back_to_edges():
+    t = TurtleEngine()
+    t.tube(1, 3)
+    t.fd(1)
+    t.tube(0)
+    t.fd(1)
+    assert t.profile is None
+    assert t.buffer.edge_count == 1
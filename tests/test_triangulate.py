@@ -0,0 +1,64 @@
+import numpy as np
+
+from blended_turtle.Core.triangulate import newell_normal, triangulate
+
+
+def ring(radii):
+    angles = np.linspace(0, 2 * np.pi, len(radii), endpoint=False)
+    return np.column_stack((radii * np.cos(angles), radii * np.sin(angles), np.zeros(len(radii))))
+
+
+def area(points):
+    x, y = points[:, 0], points[:, 1]
+    return 0.5 * np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y)
+
+
+def triangle_areas(points, triangles):
+    a, b, c = (points[triangles[:, i]] for i in range(3))
+    return 0.5 * ((b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0]))
+
+
+def check_cover(points, triangles, expected_area):
+    """Triangles all wind the right way and add up to the polygon, so none
+    overlap or stick out"""
+    areas = triangle_areas(points, triangles)
+    assert np.all(areas > -1e-12)
+    assert np.isclose(areas.sum(), expected_area)
+
+
+def test_square():
+    square = np.array(((0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0)), dtype=float)
+    triangles = triangulate(square)
+    assert len(triangles) == 2
+    check_cover(square, triangles, 1)
+
+
+def test_normal_follows_winding():
+    square = np.array(((0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0)), dtype=float)
+    assert np.allclose(newell_normal(square), (0, 0, 1))
+    assert np.allclose(newell_normal(square[::-1]), (0, 0, -1))
+
+
+def test_star():
+    star = ring(1 + 0.5 * (np.arange(40) % 2))
+    triangles = triangulate(star)
+    assert len(triangles) == 38
+    check_cover(star, triangles, area(star))
+
+
+def test_holes():
+    outline = ring(np.full(32, 4.0))
+    holes = [ring(np.full(8, 1.0)) + (1.5, 0, 0), ring(np.full(8, 1.0)) - (1.5, 0, 0)]
+    points = np.concatenate([outline] + holes)
+    triangles = triangulate(outline, holes)
+    # holes wind the same way as the outline, so take their area off
+    check_cover(points, triangles, area(outline) - sum(area(hole) for hole in holes))
+    assert set(triangles.ravel().tolist()) == set(range(len(points)))
+
+
+def test_large_wavy_outline():
+    angles = np.arange(5000)
+    wavy = ring(1 + 0.2 * np.sin(angles * 2 * np.pi * 50 / len(angles)))
+    triangles = triangulate(wavy)
+    assert len(triangles) == len(wavy) - 2
+    check_cover(wavy, triangles, area(wavy))
@@ -4,12 +4,8 @@ import bmesh
 from mathutils import Vector
 from bpy.props import BoolProperty
 
-C = bpy.context
 D = bpy.data
 O = bpy.ops
-S = C.scene
-
-turtle = C.scene.cursor
 
 bpy.types.Scene.pendownp = bpy.props.BoolProperty(default=True)
 bpy.types.Scene.beginpath_vert_index = bpy.props.IntProperty()
@@ -18,13 +14,13 @@ def new_canvas():
     """Create a new canvas"""
     
     #zero the turtle rotation
-    turtle.rotation_euler = (0,0,0)
+    bpy.context.scene.cursor.rotation_euler = (0,0,0)
     
     if len(D.objects) != 0:
         mode('OBJECT')
 
     #create "turtle" collection if one doesn't already exist
-    scene_collection = C.scene.collection
+    scene_collection = bpy.context.scene.collection
 
     #create new mesh
     canvas_mesh = D.meshes.new("canvas_mesh")
@@ -39,10 +35,10 @@ def new_canvas():
    
     #add canvas to collection
     turtle_collection.objects.link(new_canvas)
-    layer_collection = C.view_layer.layer_collection.children[turtle_collection.name]
-    C.view_layer.active_layer_collection = layer_collection
+    layer_collection = bpy.context.view_layer.layer_collection.children[turtle_collection.name]
+    bpy.context.view_layer.active_layer_collection = layer_collection
     
-    new_canvas.location = turtle.location
+    new_canvas.location = bpy.context.scene.cursor.location
     
     select(new_canvas.name)
     activate(new_canvas.name)
@@ -56,20 +52,20 @@ def new_canvas():
 def pd():
     """pen down"""
     O.mesh.primitive_vert_add()
-    S.pendownp =True
+    bpy.context.scene.pendownp =True
 
 def pu():
     """pen up"""
     deselect_all()
-    S.pendownp = False
+    bpy.context.scene.pendownp = False
     
 def pos():
     """returns the turtle's position"""
-    return turtle.location
+    return bpy.context.scene.cursor.location
 
 def heading():
     """returns the turtle's heading in degrees"""
-    rot = turtle.rotation_euler
+    rot = bpy.context.scene.cursor.rotation_euler
     return Vector((degrees(rot[0]), degrees(rot[1]), degrees(rot[2])))
 
 def cs():
@@ -81,8 +77,8 @@ def cs():
 
 def home():
     """Moves the turtle to the centre of the canvas and zeros its heading"""
-    C.scene.cursor.location = C.object.location
-    C.scene.cursor.rotation_euler = (0, 0, 0)
+    bpy.context.scene.cursor.location = bpy.context.object.location
+    bpy.context.scene.cursor.rotation_euler = (0, 0, 0)
     
 
 def fd(distance):
@@ -92,7 +88,7 @@ def fd(distance):
         orient_type ='CURSOR',
         cursor_transform = True)        
     
-    if S.pendownp:
+    if bpy.context.scene.pendownp:
         bpy.ops.mesh.extrude_vertices_move(
             TRANSFORM_OT_translate=
             {"value":(0, distance, 0),
@@ -105,7 +101,7 @@ def bk(distance):
         orient_type ='CURSOR',
         cursor_transform = True)
             
-    if S.pendownp:
+    if bpy.context.scene.pendownp:
         bpy.ops.mesh.extrude_vertices_move(
             TRANSFORM_OT_translate=
             {"value":(0, -distance, 0),
@@ -118,7 +114,7 @@ def up(distance):
         orient_type ='CURSOR',
         cursor_transform = True)
             
-    if S.pendownp:
+    if bpy.context.scene.pendownp:
         bpy.ops.mesh.extrude_vertices_move(
             TRANSFORM_OT_translate=
             {"value":(0, 0, distance),
@@ -131,7 +127,7 @@ def dn(distance):
         orient_type ='CURSOR',
         cursor_transform = True)
             
-    if S.pendownp:
+    if bpy.context.scene.pendownp:
         bpy.ops.mesh.extrude_vertices_move(
             TRANSFORM_OT_translate=
             {"value":(0, 0, -distance),
@@ -144,7 +140,7 @@ def lf(distance):
         orient_type ='CURSOR',
         cursor_transform = True)
             
-    if S.pendownp:
+    if bpy.context.scene.pendownp:
         bpy.ops.mesh.extrude_vertices_move(
             TRANSFORM_OT_translate=
             {"value":(-distance, 0, 0),
@@ -157,7 +153,7 @@ def ri(distance):
         orient_type ='CURSOR',
         cursor_transform = True)
             
-    if S.pendownp:
+    if bpy.context.scene.pendownp:
         bpy.ops.mesh.extrude_vertices_move(
             TRANSFORM_OT_translate=
             {"value":(distance, 0, 0),
@@ -165,38 +161,38 @@ def ri(distance):
        
 def lt(degrees):
     """rotate turtle counter-clockwise"""
-    turtle.rotation_euler = [
-        turtle.rotation_euler[0],
-        turtle.rotation_euler[1],
-        turtle.rotation_euler[2] - radians(degrees)]
+    bpy.context.scene.cursor.rotation_euler = [
+        bpy.context.scene.cursor.rotation_euler[0],
+        bpy.context.scene.cursor.rotation_euler[1],
+        bpy.context.scene.cursor.rotation_euler[2] - radians(degrees)]
 
 def rt(degrees):
     """rotate turtle clockwise"""
-    turtle.rotation_euler = [
-        turtle.rotation_euler[0],
-        turtle.rotation_euler[1],
-        turtle.rotation_euler[2] + radians(degrees)]
+    bpy.context.scene.cursor.rotation_euler = [
+        bpy.context.scene.cursor.rotation_euler[0],
+        bpy.context.scene.cursor.rotation_euler[1],
+        bpy.context.scene.cursor.rotation_euler[2] + radians(degrees)]
 
 def lu(degrees):
     """turtle pitch (look) up"""
-    turtle.rotation_euler = [
-        turtle.rotation_euler[0] + radians(degrees),
-        turtle.rotation_euler[1],
-        turtle.rotation_euler[2]]
+    bpy.context.scene.cursor.rotation_euler = [
+        bpy.context.scene.cursor.rotation_euler[0] + radians(degrees),
+        bpy.context.scene.cursor.rotation_euler[1],
+        bpy.context.scene.cursor.rotation_euler[2]]
         
 def ld(degrees):
     """turtle pitch (look) down"""
-    turtle.rotation_euler = [
-        turtle.rotation_euler[0] + radians(degrees),
-        turtle.rotation_euler[1],
-        turtle.rotation_euler[2]]
+    bpy.context.scene.cursor.rotation_euler = [
+        bpy.context.scene.cursor.rotation_euler[0] + radians(degrees),
+        bpy.context.scene.cursor.rotation_euler[1],
+        bpy.context.scene.cursor.rotation_euler[2]]
 
 def setpos(vector):
     """move turtle to specified location"""    
-    turtle.location=(vector)
+    bpy.context.scene.cursor.location=(vector)
     
     #if pen is down draw a line to the specified location
-    if S.pendownp:
+    if bpy.context.scene.pendownp:
         bpy.ops.mesh.extrude_vertices_move(
             TRANSFORM_OT_translate=
             {"value":(vector),
@@ -212,22 +208,22 @@ def setpos(vector):
 
 def seth(degrees):
     """rotate the turtle to the specified horizontal heading (yaw / rotate around z)"""
-    turtle.rotation_euler = [
-        turtle.rotation_euler[0],
-        turtle.rotation_euler[1],
+    bpy.context.scene.cursor.rotation_euler = [
+        bpy.context.scene.cursor.rotation_euler[0],
+        bpy.context.scene.cursor.rotation_euler[1],
         radians(degrees)]
 
 def setp(degrees):
     """rotate the turtle to the specified vertical heading (pitch aroun x)"""
-    turtle.rotation_euler = [
+    bpy.context.scene.cursor.rotation_euler = [
         radians(degrees),
-        turtle.rotation_euler[1],
-        turtle.rotation_euler[2]]
+        bpy.context.scene.cursor.rotation_euler[1],
+        bpy.context.scene.cursor.rotation_euler[2]]
 
 def arc(angle, radius, steps):
     """Without moving the turtle, draw an arc centered on the turtle, 
     starting at the turtle's heading"""
-    if S.pendownp:
+    if bpy.context.scene.pendownp:
         #we need to switch back to object mode to get selected verts
         mode('OBJECT')
         selected_verts = [v for v in bpy.context.active_object.data.vertices if v.select]
@@ -248,12 +244,12 @@ def arc(angle, radius, steps):
     bpy.ops.mesh.spin(
         steps=steps, 
         angle=radians(angle), 
-        center=turtle.location, 
-        axis=turtle.rotation_euler)
+        center=bpy.context.scene.cursor.location, 
+        axis=bpy.context.scene.cursor.rotation_euler)
     
     deselect_all()
     
-    if S.pendownp:
+    if bpy.context.scene.pendownp:
         me = bpy.context.edit_object.data
         bm = bmesh.from_edit_mesh(me)
         bm.verts.ensure_lookup_table()
@@ -263,7 +259,7 @@ def arc(angle, radius, steps):
 def clean():
     """deletes mesh, leaves turtle where it is"""
     delete_all()
-    if S.pendownp:
+    if bpy.context.scene.pendownp:
         O.mesh.primitive_vert_add()
         
 def qc(cp, ep):
@@ -274,7 +270,7 @@ def qc(cp, ep):
     ep -- coordinate of end point
 
     """
-    if S.pendownp:
+    if bpy.context.scene.pendownp:
         canvas = bpy.context.object
         canvas_name = canvas.name
         bpy.ops.curve.primitive_bezier_curve_add(
@@ -292,14 +288,14 @@ def qc(cp, ep):
         bpy.context.active_object.data.splines[0].bezier_points[1].handle_right = ep
         
         #set turtle location
-        turtle.location = turtle.location + Vector(ep)
+        bpy.context.scene.cursor.location = bpy.context.scene.cursor.location + Vector(ep)
         
         #set turtle rotation
         direction_vec = Vector(ep) - Vector(cp)
         rot_quat = direction_vec.to_track_quat('Y','Z')
-        turtle.rotation_mode = 'QUATERNION'
-        turtle.rotation_quaternion = rot_quat
-        turtle.rotation_mode = 'XYZ'
+        bpy.context.scene.cursor.rotation_mode = 'QUATERNION'
+        bpy.context.scene.cursor.rotation_quaternion = rot_quat
+        bpy.context.scene.cursor.rotation_mode = 'XYZ'
         
         mode('OBJECT')
         
@@ -317,8 +313,8 @@ def qc(cp, ep):
         deselect_all()
         
         #select last vert of converted curve
-        lbound = turtle.location
-        ubound = turtle.location
+        lbound = bpy.context.scene.cursor.location
+        ubound = bpy.context.scene.cursor.location
         select_by_loc(
             lbound,
             ubound,
@@ -328,14 +324,14 @@ def qc(cp, ep):
             )
     else:
         #set turtle location without drawing anything
-        turtle.location=ep
+        bpy.context.scene.cursor.location=ep
         
         #set turtle rotation
         direction_vec = Vector(ep) - Vector(cp)
         rot_quat = direction_vec.to_track_quat('Y','Z')
-        turtle.rotation_mode = 'QUATERNION'
-        turtle.rotation_quaternion = rot_quat
-        turtle.rotation_mode = 'XYZ'
+        bpy.context.scene.cursor.rotation_mode = 'QUATERNION'
+        bpy.context.scene.cursor.rotation_quaternion = rot_quat
+        bpy.context.scene.cursor.rotation_mode = 'XYZ'
 
 def cc(cp1, cp2, ep):
     """moves the turtle on a path described by a cubic Bezier curve.
@@ -346,7 +342,7 @@ def cc(cp1, cp2, ep):
     ep -- coordinate of end point
     """
     
-    if S.pendownp:
+    if bpy.context.scene.pendownp:
         canvas = bpy.context.object
         canvas_name = canvas.name
         bpy.ops.curve.primitive_bezier_curve_add(
@@ -369,14 +365,14 @@ def cc(cp1, cp2, ep):
         p1.handle_left = cp2
         
         #set turtle location
-        turtle.location = turtle.location + Vector(ep)
+        bpy.context.scene.cursor.location = bpy.context.scene.cursor.location + Vector(ep)
         
         #set turtle rotation
         direction_vec = Vector(ep) - Vector(cp2)
         rot_quat = direction_vec.to_track_quat('Y','Z')
-        turtle.rotation_mode = 'QUATERNION'
-        turtle.rotation_quaternion = rot_quat
-        turtle.rotation_mode = 'XYZ'
+        bpy.context.scene.cursor.rotation_mode = 'QUATERNION'
+        bpy.context.scene.cursor.rotation_quaternion = rot_quat
+        bpy.context.scene.cursor.rotation_mode = 'XYZ'
         
         mode('OBJECT')
         
@@ -394,8 +390,8 @@ def cc(cp1, cp2, ep):
         deselect_all()
         
         #select last vert of converted curve
-        lbound = turtle.location
-        ubound = turtle.location
+        lbound = bpy.context.scene.cursor.location
+        ubound = bpy.context.scene.cursor.location
         select_by_loc(
             lbound,
             ubound,
@@ -405,33 +401,33 @@ def cc(cp1, cp2, ep):
             )
     else:
         #set turtle location without drawing anything
-        turtle.location=ep
+        bpy.context.scene.cursor.location=ep
         
         #set turtle rotation
         direction_vec = Vector(ep) - Vector(cp2)
         rot_quat = direction_vec.to_track_quat('Y','Z')
-        turtle.rotation_mode = 'QUATERNION'
-        turtle.rotation_quaternion = rot_quat
-        turtle.rotation_mode = 'XYZ'
+        bpy.context.scene.cursor.rotation_mode = 'QUATERNION'
+        bpy.context.scene.cursor.rotation_quaternion = rot_quat
+        bpy.context.scene.cursor.rotation_mode = 'XYZ'
 
 def beginpath():
     """Sets begin_path_vert to index of selected vert
     """
     #TODO: find a better way of updating whether vert is selected!
     
-    if S.pendownp:
+    if bpy.context.scene.pendownp:
         O.object.mode_set(mode='OBJECT')    
         verts = bpy.context.object.data.vertices
         i = 0
         for v in verts:
             if v.select:
-                S.beginpath_vert_index = i
+                bpy.context.scene.beginpath_vert_index = i
             i += 1
         O.object.mode_set(mode='EDIT')
     
 def strokepath():
     """draws an edge between selected vert and vert indexed in beginpath"""
-    if S.pendownp:
+    if bpy.context.scene.pendownp:
         O.object.mode_set(mode='OBJECT')
         verts = bpy.context.object.data.vertices
         endpath_vert_index = 0
@@ -442,7 +438,7 @@ def strokepath():
                 endpath_vert_index = i
             i += 1
 
-        bpy.context.object.data.vertices[S.beginpath_vert_index].select = True
+        bpy.context.object.data.vertices[bpy.context.scene.beginpath_vert_index].select = True
         O.object.mode_set(mode='EDIT')
         bpy.ops.mesh.edge_face_add()
         deselect_all()
@@ -453,7 +449,7 @@ def strokepath():
 def fillpath():
     """draws an edge between selected vert and vert indexed in beginpath
     and then creates a face between all verts created since last beginpath statement"""    
-    if S.pendownp:
+    if bpy.context.scene.pendownp:
         O.object.mode_set(mode='OBJECT')
         verts = bpy.context.object.data.vertices
 
@@ -465,7 +461,7 @@ def fillpath():
                 endpath_vert_index = i
             i += 1
         
-        i = S.beginpath_vert_index
+        i = bpy.context.scene.beginpath_vert_index
         while i < endpath_vert_index:
             bpy.context.object.data.vertices[i].select = True
             i+= 1
@@ -480,7 +476,7 @@ def fillpath():
 
 def extrudepath(distance):
     """Extrudes the path along its normal"""
-    if S.pendownp:
+    if bpy.context.scene.pendownp:
         O.object.mode_set(mode='OBJECT')
         verts = bpy.context.object.data.vertices
 
@@ -492,7 +488,7 @@ def extrudepath(distance):
                 endpath_vert_index = i
             i += 1
         
-        i = S.beginpath_vert_index
+        i = bpy.context.scene.beginpath_vert_index
         while i < endpath_vert_index:
             bpy.context.object.data.vertices[i].select = True
             i+= 1
@@ -510,7 +506,7 @@ def extrudepath(distance):
 def select_all():
     """Selects all objects if in OBJECT mode or verts / edges / faces if in EDIT mode"""
     if len(D.objects) != 0:
-        current_mode = C.object.mode
+        current_mode = bpy.context.object.mode
         if current_mode == 'EDIT':
             O.mesh.select_all(action="SELECT")
             return {'FINSIHED'}
@@ -523,7 +519,7 @@ def select_all():
 def deselect_all(): #TODO:make work with curves
     """Deselects all objects if in OBJECT mode or verts / edges / faces if in EDIT mode"""
     if len(D.objects) != 0:    
-        current_mode = C.object.mode
+        current_mode = bpy.context.object.mode
         if current_mode == 'EDIT':
             O.mesh.select_all(action="DESELECT")
             return {'FINISHED'}
@@ -536,7 +532,7 @@ def deselect_all(): #TODO:make work with curves
 def delete_all():
     """delete all objects or verts / edges /faces"""
     if len(D.objects) != 0:
-        current_mode = C.object.mode
+        current_mode = bpy.context.object.mode
         if current_mode == 'OBJECT':
             select_all()
             O.object.delete(use_global=False)
@@ -559,7 +555,7 @@ def select(obj_name):
 
 def activate(obj_name):
     """activate object by name """
-    C.view_layer.objects.active = D.objects[obj_name]
+    bpy.context.view_layer.objects.active = D.objects[obj_name]
     
 def in_bbox(lbound, ubound, v, buffer=0.001):
     """Returns vertices that are in a bounding box